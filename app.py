@@ -1,10 +1,35 @@
+import hmac
+import click
 import os
-from flask import Flask, jsonify, request # Flask-Anwendung, JSON-Antworten und Request-Objekt
+from functools import wraps
+from flask import Flask, Response, jsonify, make_response, request # Flask-Anwendung, JSON-Antworten und Request-Objekt
 from flask_migrate import Migrate
 from dotenv import load_dotenv
-from models import db, Topic, Skill
-from sqlalchemy import exists
+from models import db, Topic, Skill, TopicPrerequisite
+from pagination import MAX_LIMIT
+import hierarchy
+import prerequisites
+import export
+import batch
+import serializers
+from serializers import json_response
+import cache
+import changes
+import coalesce
+import compression
+import crud
+import db_pool
+import metrics
+import replicas
+import search_index
+import shedding
+from cache import mark_changed
+from crud import parse_bool
+from sql_repository import SqlRepository, skills_query
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.exc import DataError, IntegrityError
 from flask_cors import CORS
+from werkzeug.http import http_date
 
 load_dotenv()
 
@@ -16,11 +41,41 @@ app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv(
 )
 
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Pool-Größe, Pre-Ping usw. aus DB_POOL_* (siehe db_pool.py); der Pool misst die
+# Wartezeit auf eine Verbindung (siehe /metrics)
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = db_pool.engine_options()
+# Lese-Replikate aus DATABASE_REPLICA_URLS (siehe replicas.py)
+app.config["SQLALCHEMY_BINDS"] = replicas.binds()
 
 db.init_app(app)
 Migrate(app, db)
 
-CORS(app)
+CORS(app, expose_headers=["ETag", "X-Query-Count", "Server-Timing", "X-LSN"])
+metrics.init_app(app)
+replicas.init_app(app)
+shedding.init_app(app)
+compression.init_app(app)
+crud.init_app(app)
+search_index.init_app(app)
+
+topics_table = Topic.__table__
+skills_table = Skill.__table__
+
+# Maximale Anzahl Knoten, die GET /topics/<id>/tree in einer Antwort liefert
+TREE_MAX_NODES = int(os.getenv("TREE_MAX_NODES", 5000))
+# Zeilen pro Fetch aus dem serverseitigen Cursor beim Export
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 2000))
+# Clients mit einem dieser Schlüssel im Header X-Api-Key dürfen Seiten bis
+# TRUSTED_MAX_LIMIT Zeilen anfordern (alle anderen bis MAX_LIMIT)
+TRUSTED_API_KEYS = [key.strip() for key in os.getenv("TRUSTED_API_KEYS", "").split(",") if key.strip()]
+TRUSTED_MAX_LIMIT = int(os.getenv("TRUSTED_MAX_LIMIT", 10000))
+# Seiten mit mehr Zeilen werden gestreamt statt im Speicher gebaut
+STREAM_MIN_LIMIT = int(os.getenv("STREAM_MIN_LIMIT", MAX_LIMIT))
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 1000))
+
+# Topics und Skills auf Postgres; die CRUD- und Listen-Endpunkte teilt sich app.py
+# über crud.py mit edge_app.py
+repository = SqlRepository(STREAM_BATCH_SIZE)
 
 @app.route('/')
 def hello_world():
@@ -35,96 +90,287 @@ def hello_world():
 def healthz():
     return {"status": "ok"}
 
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    Metriken im Prometheus-Textformat: Latenz, Statuscodes und SQL-Statements pro
+    Route sowie Wartezeiten am Verbindungs-Pool.
+    """
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+# --- HILFSFUNKTIONEN ---
+
+
+def trusted_client():
+    """True, wenn der Request einen der TRUSTED_API_KEYS im Header X-Api-Key trägt."""
+    key = request.headers.get("X-Api-Key")
+    return bool(key) and any(hmac.compare_digest(key, trusted) for trusted in TRUSTED_API_KEYS)
+
+
+def max_page_limit():
+    return TRUSTED_MAX_LIMIT if trusted_client() else MAX_LIMIT
+
+
+def large_page():
+    """True bei Seiten über MAX_LIMIT; sie gehen am Antwort-Cache vorbei."""
+    try:
+        return int(request.args.get("limit", 0)) > MAX_LIMIT and trusted_client()
+    except ValueError:
+        return False
+
+
+def cached_response(*tables, bypass=None):
+    """
+    Decorator für lesende Endpunkte: legt erfolgreiche Antworten im Cache des Workers
+    ab, Schlüssel ist (Endpunkt, Pfad- und Query-Argumente, Versionen der Tabellen).
+    Jede Antwort bekommt einen starken ETag; passt If-None-Match, kommt 304 zurück.
+    Gleichzeitige identische Requests teilen sich bei einem Cache-Fehlschlag eine
+    Ausführung des Views (coalesce.py); Antworten mit anderem Status als 200 werden
+    dabei geteilt, aber nicht gecacht. Liefert bypass() True, läuft der View direkt.
+    """
+    def decorator(view):
+        def render(key, kwargs):
+            # Nicht von einem Replikat lesen, das hinter den Versionen im Schlüssel liegt
+            replicas.require_versions_lsn()
+            rv = make_response(view(**kwargs))
+            if rv.status_code != 200:
+                return rv.get_data(), rv.status_code, list(rv.headers.items())
+            return cache.responses.put(key, rv.get_data(), rv.mimetype)
+
+        @wraps(view)
+        def wrapper(**kwargs):
+            if bypass is not None and bypass():
+                return view(**kwargs)
+            key = (
+                request.endpoint,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(request.args.items(multi=True))),
+                cache.versions.snapshot(tables),
+            )
+            entry = cache.responses.get(key)
+            if entry is None:
+                entry = coalesce.flights.do(key, lambda: render(key, kwargs))
+                if not isinstance(entry, cache.CachedResponse):
+                    return Response(*entry)
+            response = Response(entry.body, mimetype=entry.mimetype)
+            response.set_etag(entry.etag)
+            # Clients dürfen speichern, müssen aber per If-None-Match nachfragen
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
 # --- TOPIC ENDPUNKTE ---
 
 
 @app.route('/topics', methods=['GET'])
+@cached_response("topics", "skills", bypass=large_page)
 def list_topics():
-    q = request.args.get("q")
-    parent_id = request.args.get("parentId")
-    try:
-        limit = min(int(request.args.get("limit", 50)), 200)
-        offset = max(int(request.args.get("offset", 0)), 0)
-    except:
-        return jsonify({"error": "limit/offset must be numbers"}), 422
-
-    query = Topic.query
-    if q:
-        query = query.filter(Topic.name.ilike(f"%{q}%"))
-    if parent_id:
-        query = query.filter(Topic.parent_topic_id == parent_id)
-
-    total = query.count()
-    items = query.order_by(Topic.name.asc()).limit(limit).offset(offset).all()
-    return {
-        "data": [t.to_dict() for t in items],
-        "meta": {"total": total, "limit": limit, "offset": offset}
-    }
+    """
+    Listet Topics sortiert nach (name, id), bei ?q= zuerst nach Ähnlichkeit.
+    Paginierung über offset (Standard) oder über den opaken ?cursor=/nextCursor.
+    ?count=exact erzwingt eine exakte Gesamtanzahl, Standard ist eine Schätzung.
+    ?fields=id,name liefert nur die angegebenen Felder, ?include=counts zusätzlich
+    skillCount und childCount je Topic.
+    Clients mit X-Api-Key aus TRUSTED_API_KEYS dürfen bis TRUSTED_MAX_LIMIT Zeilen pro
+    Seite anfordern; Seiten über STREAM_MIN_LIMIT werden gestreamt (siehe crud.py).
+    """
+    return crud.list_topics(repository, max_limit=max_page_limit(), stream_min_limit=STREAM_MIN_LIMIT)
 
 
 @app.route('/topics/<id>', methods=['GET'])
+@cached_response("topics", "skills")
 def get_topic_by_id(id):
     """
     Ruft ein einzelnes Lern-Topic anhand seiner ID ab.
     Gibt 404 Not Found zurück, wenn das Topic nicht gefunden wird.
+    Mit ?include=counts werden skillCount und childCount in derselben Abfrage geliefert.
+    """
+    return crud.get_topic(repository, id)
+
+
+@app.route('/topics/<id>/tree', methods=['GET'])
+def get_topic_tree(id):
+    """
+    Liefert ein Topic und alle Unter-Topics in einem Aufruf, sortiert nach Tiefe und Name.
+    ?depth= begrenzt die Tiefe (0 = nur das Topic selbst). Jeder Eintrag enthält
+    'depth' und 'parentTopicID', sodass der Client den Baum aufbauen kann.
     """
-    topic = Topic.query.get(id)
-    if not topic:
+    try:
+        depth = request.args.get("depth")
+        depth = int(depth) if depth is not None else None
+    except ValueError:
+        return jsonify({"error": "depth must be a number"}), 422
+    if depth is not None and depth < 0:
+        return jsonify({"error": "depth must not be negative"}), 422
+    topic_id = batch.canonical_id(id)
+    if topic_id is None:
         return jsonify({"error": "Topic not found"}), 404
-    return topic.to_dict()
 
+    rows = hierarchy.descendants(topic_id, depth, max_nodes=TREE_MAX_NODES + 1)
+    if not rows:
+        return jsonify({"error": "Topic not found"}), 404
+    truncated = len(rows) > TREE_MAX_NODES
+    return {
+        "data": [dict(t.to_dict(), depth=d) for t, d in rows[:TREE_MAX_NODES]],
+        "meta": {"depth": depth, "count": min(len(rows), TREE_MAX_NODES), "truncated": truncated}
+    }
 
-@app.route('/topics', methods=['POST'])
-def create_topic():
+
+@app.route('/topics/<id>/ancestors', methods=['GET'])
+def get_topic_ancestors(id):
     """
-    Erstellt ein neues Lern-Topic.
-    Erfordert 'name' und 'description' im JSON-Request-Body.
-    Generiert eine eindeutige ID und speichert das Topic.
+    Liefert die Vorfahren eines Topics von der Wurzel bis zum direkten Eltern-Topic (Breadcrumb).
+    """
+    topic_id = batch.canonical_id(id)
+    if topic_id is None:
+        return jsonify({"error": "Topic not found"}), 404
+    chain = hierarchy.ancestors(topic_id)
+    if not chain:
+        return jsonify({"error": "Topic not found"}), 404
+    return {"data": [t.to_dict() for t in chain[:-1]]}
+
+
+@app.route('/topics/<id>/prerequisites', methods=['GET'])
+def list_topic_prerequisites(id):
+    """
+    Listet die direkten Voraussetzungen eines Topics.
+    """
+    topic_id = batch.canonical_id(id)
+    if topic_id is None:
+        return jsonify({"error": "Topic not found"}), 404
+    if not Topic.query.get(topic_id):
+        return jsonify({"error": "Topic not found"}), 404
+    items = (
+        Topic.query
+        .join(TopicPrerequisite, TopicPrerequisite.prerequisite_id == Topic.id)
+        .filter(TopicPrerequisite.topic_id == topic_id)
+        .order_by(Topic.name.asc(), Topic.id.asc())
+        .all()
+    )
+    return {"data": [t.to_dict() for t in items]}
+
+
+@app.route('/topics/<id>/prerequisites', methods=['POST'])
+def add_topic_prerequisite(id):
+    """
+    Legt fest, dass das Topic ein anderes Topic voraussetzt.
+    Erfordert 'prerequisiteID' im JSON-Request-Body. Kanten, die einen Zyklus
+    erzeugen würden, werden mit 422 abgelehnt.
     """
     payload = request.get_json(silent=True) or {}
-    name = (payload.get("name") or "").strip()
-    description = payload.get("description")
-    parent_id = payload.get("parentTopicID")
+    prerequisite_id = payload.get("prerequisiteID") or payload.get("prerequisiteId")
+    if not prerequisite_id:
+        return jsonify({"error": "Field 'prerequisiteID' is required"}), 422
+    topic_id = batch.canonical_id(id)
+    if topic_id is None:
+        return jsonify({"error": "Topic not found"}), 404
+    # Ungültige IDs gar nicht erst als uuid-Parameter an Postgres geben (DataError)
+    prerequisite_id = batch.canonical_id(prerequisite_id)
+    if prerequisite_id is None:
+        return jsonify({"error": "prerequisiteID not found"}), 422
 
-    if not name:
-        return jsonify({"error": "Field 'name' is required."}), 422
+    found = {t.id for t in Topic.query.filter(Topic.id.in_([topic_id, prerequisite_id])).all()}
+    if topic_id not in found:
+        return jsonify({"error": "Topic not found"}), 404
+    if prerequisite_id not in found:
+        return jsonify({"error": "prerequisiteID not found"}), 422
+
+    try:
+        created = prerequisites.add_prerequisite(topic_id, prerequisite_id)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 422
+    db.session.commit()
+    return {"topicID": topic_id, "prerequisiteID": prerequisite_id}, 201 if created else 200
 
-    if parent_id:
-        parent = Topic.query.get(parent_id)
-        if not parent:
-            return jsonify({"error": "parentTopicID not found"}), 422
 
-    topic = Topic(name=name, description=description, parent_topic_id=parent_id)
-    db.session.add(topic)
+@app.route('/topics/<id>/prerequisites/<prerequisite_id>', methods=['DELETE'])
+def delete_topic_prerequisite(id, prerequisite_id):
+    """
+    Entfernt eine Voraussetzung eines Topics.
+    """
+    topic_id = batch.canonical_id(id)
+    if topic_id is None:
+        return jsonify({"error": "Topic not found"}), 404
+    prerequisite_id = batch.canonical_id(prerequisite_id)
+    edge = prerequisite_id and TopicPrerequisite.query.get((topic_id, prerequisite_id))
+    if not edge:
+        return jsonify({"error": "Prerequisite not found"}), 404
+    db.session.delete(edge)
+    mark_changed(db.session, "prerequisites")
     db.session.commit()
-    return topic.to_dict(), 201
+    return "", 204
 
 
-@app.route('/topics/<id>', methods=['PUT'])
-def update_topic(id):
+@app.route('/topics/<id>/path', methods=['GET'])
+def get_learning_path(id):
     """
-    Aktualisiert ein bestehendes Lern-Topic anhand seiner ID.
-    Erfordert 'name' und 'description' im JSON-Request-Body für die vollständige Aktualisierung.
+    Liefert den Lernpfad zu einem Topic: alle transitiven Voraussetzungen in
+    topologischer Reihenfolge (Voraussetzungen zuerst, das Topic selbst zuletzt),
+    jeweils mit ihren Skills. Der Graph kommt aus dem Cache des Workers, Topics und
+    Skills werden mit je einer Abfrage geladen.
     """
-    topic = Topic.query.get(id)
-    if not topic:
+    topic_id = batch.canonical_id(id)
+    if topic_id is None:
+        return jsonify({"error": "Topic not found"}), 404
+    path = prerequisites.graph.learning_path(topic_id)
+    topics = {t.id: t for t in Topic.query.filter(Topic.id.in_(path)).all()}
+    if topic_id not in topics:
         return jsonify({"error": "Topic not found"}), 404
 
-    payload = request.get_json(silent=True) or {}
-    name = (payload.get("name") or topic.name).strip()
-    description = payload.get("description", topic.description)
-    parent_id = payload.get("parentTopicID", topic.parent_topic_id)
+    skills = {}
+    for s in Skill.query.filter(Skill.topic_id.in_(list(topics))).order_by(Skill.name.asc(), Skill.id.asc()):
+        skills.setdefault(s.topic_id, []).append(s.to_dict())
 
-    if parent_id:
-        parent = Topic.query.get(parent_id)
-        if not parent:
-            return jsonify({"error": "parentTopicID not found"}), 422
-    
-    topic.name = name
-    topic.description = description
-    topic.parent_topic_id = parent_id
-    db.session.commit()
-    return topic.to_dict()
+    data = [
+        dict(topics[topic_id].to_dict(), skills=skills.get(topic_id, []))
+        for topic_id in path
+        if topic_id in topics
+    ]
+    return {"data": data, "meta": {"count": len(data)}}
+
+
+@app.route('/topics', methods=['POST'])
+def create_topic():
+    """
+    Erstellt ein neues Lern-Topic.
+    Erfordert 'name' im JSON-Request-Body, optional 'description' und 'parentTopicID'.
+    Ein einziges INSERT .. RETURNING (siehe SqlRepository.create_topic).
+    """
+    return crud.create_topic(repository)
+
+
+@app.route('/topics:batch', methods=['POST'])
+def batch_topics():
+    """
+    Legt Topics an, ändert oder löscht sie im Batch, alles in einer Transaktion.
+    Body: {"operations": [{"op": "create"|"update"|"delete", ...Felder wie bei POST/PUT}]}
+    Antwort: ein Ergebnis pro Operation (index, op, status, data bzw. error).
+    """
+    try:
+        operations = batch.parse_operations(request.get_json(silent=True))
+    except batch.BatchError as e:
+        return jsonify({"error": str(e)}), 422
+    try:
+        body, status = batch.apply_topic_batch(operations)
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "The batch conflicts with a concurrent change, please retry"}), 409
+    return body, status
+
+
+@app.route('/topics/<id>', methods=['PUT'])
+def update_topic(id):
+    """
+    Aktualisiert ein bestehendes Lern-Topic anhand seiner ID; nur die übergebenen
+    Felder werden geändert. Ein einziges UPDATE .. RETURNING mit der Zyklusprüfung für
+    ein neues Eltern-Topic in der WHERE-Klausel; vorher wird wie bei move_topic gesperrt
+    (siehe SqlRepository.update_topic).
+    """
+    return crud.update_topic(repository, id)
 
 
 @app.route('/topics/<id>', methods=['DELETE'])
@@ -132,110 +378,392 @@ def delete_topic(id):
     """
     Löscht ein Lern-Topic anhand seiner ID.
     Gibt 204 No Content zurück, wenn erfolgreich gelöscht.
+    Prüfung auf abhängige Skills/Topics und Löschen laufen in einem Statement
+    (DELETE in einer CTE, die nur greift, wenn keine Abhängigkeiten bestehen).
+    Mit ?cascade=true wird der ganze Teilbaum gelöscht (siehe delete_topic_cascade).
     """
-    topic = Topic.query.get(id)
+    if parse_bool(request.args.get("cascade")):
+        return delete_topic_cascade(id, parse_bool(request.args.get("dryRun")))
+    if parse_bool(request.args.get("dryRun")):
+        return jsonify({"error": "dryRun is only supported with cascade=true"}), 422
+    return crud.delete_topic(repository, id)
+
 
-    if not topic:
+def delete_topic_cascade(topic_id, dry_run):
+    """
+    DELETE /topics/<id>?cascade=true: löscht das Topic samt aller Unter-Topics, ihrer
+    Skills und Voraussetzungs-Kanten in einer Transaktion. Statt eines Requests pro
+    Eintrag (von unten nach oben) laufen wenige Statements über den ganzen Teilbaum:
+    Sperren (sortiert nach id), dann Skills, Kanten und Topics löschen.
+    Mit ?dryRun=true wird nur gezählt, was gelöscht würde.
+    """
+    try:
+        if dry_run:
+            summary = db.session.execute(hierarchy.subtree_summary(topic_id)).one()
+            if not summary.topics:
+                return jsonify({"error": "Topic not found"}), 404
+            return {"data": dict(summary._mapping), "meta": {"dryRun": True}}
+        locked = hierarchy.lock_subtree(topic_id)
+    except DataError:
+        db.session.rollback()
+        locked = []
+    if not locked:
+        db.session.rollback()
         return jsonify({"error": "Topic not found"}), 404
 
-    has_skills = db.session.query(exists().where(Skill.topic_id == id)).scalar()
-    has_topics = db.session.query(exists().where(Topic.parent_topic_id == id)).scalar()
+    # Jedes Statement bestimmt den Teilbaum neu; er kann sich nicht mehr ändern,
+    # solange seine Topics gesperrt sind
+    def subtree_ids():
+        return select(hierarchy.subtree_cte(topic_id).c.id)
 
-    if has_skills:
-        return jsonify({"error": "The topic has dependent skills, cannot delete the topic"}), 409
+    try:
+        skill_ids = db.session.execute(
+            delete(skills_table).where(skills_table.c.topic_id.in_(subtree_ids())).returning(skills_table.c.id)
+        ).scalars().all()
+        # Zwei Statements statt OR, damit jedes seinen Index nutzt
+        edges = sum(
+            db.session.execute(delete(TopicPrerequisite).where(column.in_(subtree_ids()))).rowcount
+            for column in (TopicPrerequisite.topic_id, TopicPrerequisite.prerequisite_id)
+        )
+        topic_ids = db.session.execute(
+            delete(topics_table).where(topics_table.c.id.in_(subtree_ids())).returning(topics_table.c.id)
+        ).scalars().all()
+    except IntegrityError:
+        # Ein Unter-Topic wurde angelegt, bevor die Sperren griffen
+        db.session.rollback()
+        return jsonify({"error": "The subtree changed concurrently, please retry"}), 409
+
+    changes.record(db.session, "skill", "delete", skill_ids)
+    changes.record(db.session, "topic", "delete", topic_ids)
+    mark_changed(db.session, "topics", "skills", "prerequisites")
+    db.session.commit()
+    return {
+        "data": {"topics": len(topic_ids), "skills": len(skill_ids), "prerequisites": edges},
+        "meta": {"dryRun": False}
+    }
+
+
+@app.route('/topics/<id>/move', methods=['POST'])
+def move_topic(id):
+    """
+    Hängt ein Topic samt Teilbaum unter ein anderes Eltern-Topic
+    (Body: {"parentTopicID": <id> oder null für die oberste Ebene}).
+    Gesperrt werden das Topic und die Kette des neuen Eltern-Topics bis zur Wurzel,
+    sortiert nach id; die Zyklusprüfung steckt wie bei PUT in der WHERE-Klausel des
+    UPDATE und sieht daher auch parallel abgeschlossene Verschiebungen.
+    meta nennt die Anzahl der mitverschobenen Topics und Skills; mit ?dryRun=true
+    wird nichts geändert.
+    """
+    payload = request.get_json(silent=True) or {}
+    if "parentTopicID" not in payload:
+        return jsonify({"error": "Field 'parentTopicID' is required"}), 422
+    parent_id = payload["parentTopicID"] or None
+    dry_run = parse_bool(request.args.get("dryRun"))
 
-    if has_topics:
-        return jsonify({"error": "The topic has dependent topics, cannot delete the topic"}), 409
+    try:
+        locked = {row.id: row for row in hierarchy.lock_for_move(id, parent_id, lock=not dry_run)}
+    except DataError:
+        db.session.rollback()
+        if batch.is_uuid(id):
+            return jsonify({"error": "parentTopicID not found"}), 422
+        return jsonify({"error": "Topic not found"}), 404
+    if id not in locked:
+        db.session.rollback()
+        return jsonify({"error": "Topic not found"}), 404
+    if parent_id and parent_id not in locked:
+        db.session.rollback()
+        return jsonify({"error": "parentTopicID not found"}), 422
+
+    summary = db.session.execute(hierarchy.subtree_summary(id)).one()
+    meta = {
+        "dryRun": dry_run,
+        "previousParentTopicID": locked[id].parent_topic_id,
+        "topics": summary.topics,
+        "skills": summary.skills,
+    }
+    if dry_run:
+        if hierarchy.would_create_cycle(id, parent_id):
+            return jsonify({"error": "parentTopicID would create a cycle"}), 422
+        topic = Topic.row_to_dict(db.session.get(Topic, id))
+        return {"data": dict(topic, parentTopicID=parent_id), "meta": meta}
 
-    db.session.delete(topic)
+    statement = update(topics_table).where(topics_table.c.id == id).values(parent_topic_id=parent_id)
+    if parent_id:
+        statement = statement.where(~hierarchy.in_ancestry(id, parent_id))
+    row = db.session.execute(statement.returning(*topics_table.c)).first()
+    if row is None:
+        db.session.rollback()
+        return jsonify({"error": "parentTopicID would create a cycle"}), 422
+    topic = Topic.row_to_dict(row)
+    changes.record(db.session, "topic", "update", [topic])
+    mark_changed(db.session, "topics")
     db.session.commit()
-    return "", 204
-    
+    return {"data": topic, "meta": meta}
+
 
 # --- SKILL ENDPUNKTE ---
 
 @app.route('/skills', methods=['GET'])
+@cached_response("skills", "topics", bypass=large_page)
 def list_skills():
-    q = request.args.get("q")
-    topic_id = request.args.get("topicId")
+    """
+    Listet Skills sortiert nach (name, id), Paginierung, ?fields= und große Seiten
+    wie bei list_topics.
+    Mit ?topicId=...&recursive=true werden auch Skills aller Unter-Topics geliefert.
+    """
+    return crud.list_skills(repository, max_limit=max_page_limit(), stream_min_limit=STREAM_MIN_LIMIT)
+
+
+@app.route('/skills/facets', methods=['GET'])
+@cached_response("skills", "topics")
+def get_skill_facets():
+    """
+    Anzahl Skills je difficulty und je Topic für dieselben Filter wie list_skills
+    (?q=, ?topicId=, ?recursive=). Eine einzige Abfrage mit GROUPING SETS liefert
+    beide Aufteilungen und die Gesamtzahl; je Facette werden höchstens ?limit=
+    Werte geliefert (die häufigsten zuerst).
+    """
     try:
-        limit = min(int(request.args.get("limit", 50)), 200)
-        offset = max(int(request.args.get("offset", 0)), 0)
-    except:
-        return jsonify({"error": "limit/offset must be numbers"}), 422
-
-    query = Skill.query
-    if q:
-        query = query.filter(Skill.name.ilike(f"%{q}%"))
-    if topic_id:
-        query = query.filter(Skill.topic_id == topic_id)
-
-    total = query.count()
-    items = query.order_by(Skill.name.asc()).limit(limit).offset(offset).all()
-    return {
-        "data": [s.to_dict() for s in items],
-        "meta": {"total": total, "limit": limit, "offset": offset}
-    }
+        limit = min(int(request.args.get("limit", 50)), MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be a number"}), 422
+    if limit < 1:
+        return jsonify({"error": "limit must be at least 1"}), 422
+
+    query, _ = skills_query(
+        request.args.get("q"), request.args.get("topicId"), parse_bool(request.args.get("recursive"))
+    )
+    # grouping(): 1 = Zeile der difficulty-Facette, 2 = Topic-Facette, 3 = Gesamtzahl
+    grouped = query.with_entities(
+        Skill.difficulty,
+        Skill.topic_id,
+        func.count().label("count"),
+        func.grouping(Skill.difficulty, Skill.topic_id).label("grouping"),
+    ).group_by(func.grouping_sets(Skill.difficulty, Skill.topic_id, tuple_())).subquery()
+    ranked = select(
+        grouped,
+        func.row_number().over(
+            partition_by=grouped.c.grouping,
+            order_by=(grouped.c["count"].desc(), grouped.c.difficulty, grouped.c.topic_id),
+        ).label("rank"),
+    ).subquery()
+    try:
+        rows = db.session.execute(
+            select(ranked).where(ranked.c.rank <= limit).order_by(ranked.c.grouping, ranked.c.rank)
+        ).all()
+    except DataError:
+        db.session.rollback()
+        return jsonify({"error": "topicId is invalid"}), 422
+
+    facets = {"difficulty": [], "topicID": []}
+    total = 0
+    for row in rows:
+        if row.grouping == 1:
+            facets["difficulty"].append({"value": row.difficulty, "count": row.count})
+        elif row.grouping == 2:
+            facets["topicID"].append({"value": row.topic_id, "count": row.count})
+        else:
+            total = row.count
+    return {"data": facets, "meta": {"total": total, "limit": limit}}
 
 
 @app.route('/skills/<id>', methods=['GET'])
+@cached_response("skills")
 def get_skill(id):
-    s = Skill.query.get(id)
-    if not s:
-        return jsonify({"error": "Skill not found"}), 404
-    return s.to_dict()
+    return crud.get_skill(repository, id)
+
 
-    
 @app.route('/skills', methods=['POST'])
 def create_skill():
-    payload = request.get_json(silent=True) or {}
-    name = (payload.get("name") or "").strip()
-    topic_id = payload.get("topicID") or payload.get("topicId")
-    difficulty = (payload.get("difficulty") or "beginner").strip()
-
-    if not name:
-        return jsonify({"error": "Field 'name' is required"}), 422
-    if not topic_id:
-        return jsonify({"error": "Field 'topicID' is required"}), 422
+    """
+    Erstellt einen Skill mit einem einzigen INSERT .. RETURNING;
+    ob das Topic existiert, prüft der Foreign Key.
+    """
+    return crud.create_skill(repository)
 
-    if not Topic.query.get(topic_id):
-        return jsonify({"error": "topicID not found"}), 422
 
-    s = Skill(name=name, topic_id=topic_id, difficulty=difficulty)
-    db.session.add(s)
-    db.session.commit()
-    return s.to_dict(), 201
+@app.route('/skills:batch', methods=['POST'])
+def batch_skills():
+    """
+    Legt Skills an, ändert oder löscht sie im Batch, alles in einer Transaktion.
+    Aufbau von Request und Antwort wie bei POST /topics:batch.
+    """
+    try:
+        operations = batch.parse_operations(request.get_json(silent=True))
+    except batch.BatchError as e:
+        return jsonify({"error": str(e)}), 422
+    try:
+        return batch.apply_skill_batch(operations)
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "The batch conflicts with a concurrent change, please retry"}), 409
 
 
 @app.route('/skills/<id>', methods=['PUT'])
 def update_skill(id):
-    s = Skill.query.get(id)
-    if not s:
-        return jsonify({"error": "Skill not found"}), 404
+    """
+    Aktualisiert einen Skill mit einem einzigen UPDATE .. RETURNING.
+    """
+    return crud.update_skill(repository, id)
 
-    payload = request.get_json(silent=True) or {}
-    name = (payload.get("name") or s.name).strip()
-    topic_id = payload.get("topicID", payload.get("topicId", s.topic_id))
-    difficulty = (payload.get("difficulty") or s.difficulty).strip()
 
-    if not Topic.query.get(topic_id):
-        return jsonify({"error": "topicID not found"}), 422
+@app.route('/skills/<id>', methods=['DELETE'])
+def delete_skill(id):
+    """
+    Löscht einen Skill mit einem einzigen DELETE .. RETURNING.
+    """
+    return crud.delete_skill(repository, id)
 
-    s.name = name
-    s.topic_id = topic_id
-    s.difficulty = difficulty
-    db.session.commit()
-    return s.to_dict()
 
+# --- SUCHE ---
+
+# Obergrenze für ?limit= bei /search und /suggest
+SEARCH_MAX_LIMIT = 50
+
+
+def search_args(text_param):
+    """
+    Liest den Suchtext, limit und type (topic|skill) für /search und /suggest.
+
+    Returns:
+        tuple: (Suchtext, limit, entity oder None) bzw. eine Fehlerantwort (422)
+    """
+    text = (request.args.get(text_param) or "").strip()
+    if not text:
+        return None, (jsonify({"error": f"Parameter '{text_param}' is required"}), 422)
+    try:
+        limit = min(int(request.args.get("limit", 10)), SEARCH_MAX_LIMIT)
+    except ValueError:
+        return None, (jsonify({"error": "limit must be a number"}), 422)
+    if limit < 1:
+        return None, (jsonify({"error": "limit must be at least 1"}), 422)
+    entity = request.args.get("type")
+    if entity and entity not in changes.ENTITIES:
+        return None, (jsonify({"error": f"type must be one of {', '.join(changes.ENTITIES)}"}), 422)
+    return (text, limit, entity), None
+
+
+@app.route('/search', methods=['GET'])
+def search():
+    """
+    Volltextsuche über Namen und Beschreibungen von Topics und Skills (?q=), sortiert
+    nach Relevanz; ?type=topic|skill schränkt ein. Beantwortet aus dem Suchindex des
+    Workers (search_index.py), ohne Abfrage auf topics/skills.
+    """
+    args, error = search_args("q")
+    if error:
+        return error
+    q, limit, entity = args
+    hits, complete = search_index.index.search(q, limit, entity)
+    return json_response({
+        "data": [{"type": e, "id": i, "name": name, "score": score} for score, e, i, name in hits],
+        "meta": {"q": q, "limit": limit, "count": len(hits), "complete": complete}
+    })
+
+
+@app.route('/suggest', methods=['GET'])
+def suggest():
+    """
+    Autovervollständigung über die Namen von Topics und Skills (?prefix=), für
+    Type-ahead bei jedem Tastendruck. Namen, die mit der Eingabe beginnen, zuerst.
+    """
+    args, error = search_args("prefix")
+    if error:
+        return error
+    prefix, limit, entity = args
+    hits, complete = search_index.index.suggest(prefix, limit, entity)
+    return json_response({
+        "data": [{"type": e, "id": i, "name": name} for e, i, name in hits],
+        "meta": {"prefix": prefix, "limit": limit, "count": len(hits), "complete": complete}
+    })
+
+
+# --- ÄNDERUNGEN ---
+
+# Obergrenzen für GET /changes
+CHANGES_MAX_LIMIT = 1000
+CHANGES_MAX_WAIT = float(os.getenv("CHANGES_MAX_WAIT", 30))
+
+
+@app.route('/changes', methods=['GET'])
+def list_changes():
+    """
+    Liefert alle Änderungen (insert, update, delete) an Topics und Skills nach dem
+    Cursor ?since= (seq der zuletzt verarbeiteten Änderung, Start mit 0), aufsteigend
+    und höchstens ?limit= auf einmal. meta.nextSince ist der Cursor für den nächsten Aufruf.
+    ?entity=topic|skill filtert, ?wait=<Sekunden> wartet (Long-Polling), bis neue
+    Änderungen vorliegen.
+    """
+    try:
+        since = int(request.args.get("since", 0))
+        limit = min(int(request.args.get("limit", 100)), CHANGES_MAX_LIMIT)
+        timeout = min(float(request.args.get("wait", 0)), CHANGES_MAX_WAIT)
+    except ValueError:
+        return jsonify({"error": "since/limit/wait must be numbers"}), 422
+    if since < 0 or limit < 1 or timeout < 0:
+        return jsonify({"error": "since/wait must not be negative, limit must be at least 1"}), 422
+    entity = request.args.get("entity")
+    if entity and entity not in changes.ENTITIES:
+        return jsonify({"error": f"entity must be one of {', '.join(changes.ENTITIES)}"}), 422
+
+    if changes.expired(since):
+        return jsonify({"error": "since is older than the retained changes; resync and start again"}), 410
+
+    items, more = changes.wait(since, limit, entity, timeout)
+    return json_response({
+        "data": [dict(item, changedAt=http_date(item["changedAt"])) for item in items],
+        "meta": {
+            "since": since,
+            "nextSince": items[-1]["seq"] if items else since,
+            "hasMore": more,
+            "limit": limit,
+        }
+    })
+
+
+# --- EXPORT ENDPUNKTE ---
+
+def export_response(fields, name):
+    """
+    Streamt eine Tabelle als NDJSON (Standard) oder CSV (?format=csv).
+    """
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in export.FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(export.FORMATS)}"}), 422
+    return Response(
+        export.generate(db.engine, fields, fmt, EXPORT_BATCH_SIZE),
+        mimetype=export.FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename={name}.{fmt}"},
+    )
+
+
+@app.route('/export/topics', methods=['GET'])
+def export_topics():
+    """
+    Exportiert alle Topics aus einem konsistenten Snapshot, sortiert nach id.
+    """
+    return export_response(serializers.TOPIC_FIELDS, "topics")
+
+
+@app.route('/export/skills', methods=['GET'])
+def export_skills():
+    """
+    Exportiert alle Skills aus einem konsistenten Snapshot, sortiert nach id.
+    """
+    return export_response(serializers.SKILL_FIELDS, "skills")
+
+
+# --- CLI ---
+
+@app.cli.command("prune-changes")
+@click.option("--days", type=float, default=changes.RETENTION_DAYS, show_default=True,
+              help="Änderungen älter als so viele Tage löschen.")
+def prune_changes(days):
+    """
+    Löscht alte Einträge des Änderungsprotokolls (GET /changes), z.B. täglich per Cron.
+    """
+    print(f"{changes.prune(days)} changes deleted")
 
-@app.route('/skills/<id>', methods=['DELETE'])
-def delete_skill(id):
-    s = Skill.query.get(id)
-    if not s:
-        return jsonify({"error": "Skill not found"}), 404
-    db.session.delete(s)
-    db.session.commit()
-    return "", 204
 
 if __name__ == '__main__':
     # Startet den Flask-Entwicklungsserver.
@@ -0,0 +1,393 @@
+"""
+Batch-Schreibzugriffe für POST /topics:batch und POST /skills:batch.
+- Der ganze Batch wird mit mengenbasierten Abfragen validiert (ein SELECT für alle
+  referenzierten Topics bzw. Skills statt einem pro Eintrag)
+- Geschrieben wird mit mehrzeiligen Statements in einer Transaktion:
+  INSERT .. VALUES (..), (..) RETURNING, UPDATE .. FROM (VALUES ..) RETURNING und
+  DELETE .. WHERE id IN (..)
+- Alles oder nichts: ist ein Eintrag ungültig, wird nichts geschrieben und die
+  übrigen Einträge werden mit Status 424 (Failed Dependency) gemeldet
+"""
+import os
+import uuid
+
+from sqlalchemy import String, cast, column, delete, insert, select, update, values
+from sqlalchemy.dialects.postgresql import UUID
+
+import changes
+import hierarchy
+from cache import mark_changed
+from models import db, gen_uuid, Topic, Skill
+
+MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 5000))
+OPS = ("create", "update", "delete")
+
+topics = Topic.__table__
+skills = Skill.__table__
+
+
+class BatchError(ValueError):
+    """
+    Der Batch als Ganzes ist ungültig (kein Array, leer oder zu groß).
+    """
+
+
+def parse_operations(payload):
+    """
+    Liest die Operationen aus dem Request-Body: {"operations": [...]} oder direkt ein Array.
+
+    Raises:
+        BatchError: Wenn keine oder zu viele Operationen übergeben wurden.
+    """
+    operations = payload.get("operations") if isinstance(payload, dict) else payload
+    if not isinstance(operations, list) or not operations:
+        raise BatchError("Field 'operations' must be a non-empty array")
+    if len(operations) > MAX_ITEMS:
+        raise BatchError(f"At most {MAX_ITEMS} operations per batch are allowed")
+    return operations
+
+
+def is_uuid(value):
+    """Prüft, ob value eine gültige UUID ist (vermeidet DataErrors in der Datenbank)."""
+    return canonical_id(value) is not None
+
+
+def canonical_id(value):
+    """
+    Kanonische Schreibweise einer UUID (klein, mit Bindestrichen), wie sie die
+    Datenbank zurückgibt, oder None. Nötig, weil Zeilen nach ihrer id aus der
+    Datenbank nachgeschlagen werden (z.B. "6F9619FF-..." -> "6f9619ff-...").
+    """
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return None
+
+
+class BatchResults:
+    """
+    Sammelt die Ergebnisse pro Eintrag, in der Reihenfolge des Requests.
+    """
+
+    def __init__(self, operations):
+        self.items = [{"index": i, "op": op.get("op") if isinstance(op, dict) else None}
+                      for i, op in enumerate(operations)]
+        self.failed = False
+
+    def error(self, index, status, message):
+        self.items[index].update(status=status, error=message)
+        self.failed = True
+
+    def ok(self, index, status, data=None):
+        self.items[index]["status"] = status
+        if data is not None:
+            self.items[index]["data"] = data
+
+    def response(self):
+        """Liefert (Body, HTTP-Status) für die Antwort des Endpunkts."""
+        if self.failed:
+            # Auch bereits ausgeführte Einträge wurden zurückgerollt
+            for item in self.items:
+                if "error" not in item:
+                    item.pop("data", None)
+                    item.update(status=424, error="Not applied because other operations failed")
+            return {"data": self.items}, 422
+        return {"data": self.items}, 200
+
+
+def split_operations(operations, results, validate_create):
+    """
+    Verteilt die Operationen auf creates/updates/deletes und prüft Form und IDs.
+    Eine ID darf pro Batch nur einmal aktualisiert oder gelöscht werden.
+    """
+    creates, updates, deletes = [], [], []
+    seen = set()
+    for i, item in enumerate(operations):
+        if not isinstance(item, dict) or item.get("op") not in OPS:
+            results.error(i, 422, f"Field 'op' must be one of {', '.join(OPS)}")
+            continue
+        if item["op"] == "create":
+            message = validate_create(item)
+            if message:
+                results.error(i, 422, message)
+            else:
+                creates.append((i, item))
+            continue
+        item_id = canonical_id(item.get("id")) if item.get("id") else None
+        if not item_id:
+            results.error(i, 422, "Field 'id' must be a valid id")
+        elif item_id in seen:
+            results.error(i, 422, "id appears more than once in this batch")
+        else:
+            seen.add(item_id)
+            (updates if item["op"] == "update" else deletes).append((i, dict(item, id=item_id)))
+    return creates, updates, deletes
+
+
+def fetch_rows(table, ids, lock=False, key_share=False):
+    """
+    Lädt alle Zeilen mit den gegebenen IDs in einer Abfrage (id -> Zeile).
+
+    Args:
+        lock (bool): Zeilen bis zum Ende der Transaktion sperren (FOR UPDATE, sortiert
+            nach id, damit parallele Batches nicht verklemmen).
+        key_share (bool): Mit lock nur FOR KEY SHARE: die Zeilen können nicht gelöscht
+            werden, andere Änderungen bleiben möglich (wie bei einer Foreign-Key-Prüfung).
+    """
+    if not ids:
+        return {}
+    query = select(*table.c).where(table.c.id.in_(ids))
+    if lock:
+        query = query.order_by(table.c.id).with_for_update(key_share=key_share)
+    return {row.id: row for row in db.session.execute(query)}
+
+
+def apply_topic_batch(operations):
+    """
+    Validiert und schreibt einen Topic-Batch.
+
+    Returns:
+        tuple: (Antwort-Body, HTTP-Status)
+    """
+    results = BatchResults(operations)
+
+    def validate_create(item):
+        if not (item.get("name") or "").strip():
+            return "Field 'name' is required."
+
+    creates, updates, deletes = split_operations(operations, results, validate_create)
+
+    def parent_of(item, default=None):
+        parent_id = item.get("parentTopicID", default)
+        return (canonical_id(parent_id) or parent_id) if parent_id else None
+
+    # Wie bei POST /topics/<id>/move: die geänderten Topics und die Ketten ihrer neuen
+    # Eltern-Topics sortiert nach id sperren, bevor sie gelesen werden. Sonst bilden
+    # parallele Verschiebungen zusammen einen Zyklus, den cyclic_topic_ids im Snapshot
+    # dieser Transaktion nicht sieht (und ein Update ohne parentTopicID schriebe ein
+    # veraltetes Eltern-Topic zurück)
+    if updates:
+        hierarchy.lock_for_moves([
+            (item["id"], parent_of(item) if is_uuid(parent_of(item)) else None)
+            for _, item in updates
+        ])
+
+    delete_ids = {item["id"] for _, item in deletes}
+    parent_ids = {parent_of(item) for _, item in creates + updates if is_uuid(parent_of(item))}
+    existing = fetch_rows(topics, parent_ids | delete_ids | {item["id"] for _, item in updates})
+
+    def parent_error(parent_id):
+        if parent_id and (parent_id not in existing or parent_id in delete_ids):
+            return "parentTopicID not found"
+
+    create_rows = []
+    for i, item in creates:
+        parent_id = parent_of(item)
+        if message := parent_error(parent_id):
+            results.error(i, 422, message)
+            continue
+        create_rows.append((i, {
+            "id": gen_uuid(),
+            "name": item["name"].strip(),
+            "description": item.get("description"),
+            "parent_topic_id": parent_id,
+        }))
+
+    update_rows = []
+    for i, item in updates:
+        topic = existing.get(item["id"])
+        if not topic:
+            results.error(i, 404, "Topic not found")
+            continue
+        parent_id = parent_of(item, topic.parent_topic_id)
+        if message := parent_error(parent_id):
+            results.error(i, 422, message)
+            continue
+        if parent_id == topic.id:
+            results.error(i, 422, "parentTopicID would create a cycle")
+            continue
+        update_rows.append((i, (
+            topic.id,
+            (item.get("name") or topic.name).strip(),
+            item.get("description", topic.description),
+            parent_id,
+        )))
+
+    if delete_ids:
+        with_skills = set(db.session.execute(
+            select(skills.c.topic_id).where(skills.c.topic_id.in_(delete_ids)).distinct()
+        ).scalars())
+        # Unter-Topics, die im selben Batch gelöscht werden, blockieren nicht
+        with_children = set(db.session.execute(
+            select(topics.c.parent_topic_id)
+            .where(topics.c.parent_topic_id.in_(delete_ids), topics.c.id.notin_(delete_ids))
+            .distinct()
+        ).scalars())
+        for i, item in deletes:
+            if item["id"] not in existing:
+                results.error(i, 404, "Topic not found")
+            elif item["id"] in with_skills:
+                results.error(i, 409, "The topic has dependent skills, cannot delete the topic")
+            elif item["id"] in with_children:
+                results.error(i, 409, "The topic has dependent topics, cannot delete the topic")
+
+    if results.failed:
+        db.session.rollback()
+        return results.response()
+
+    if create_rows:
+        rows = db.session.execute(
+            insert(topics).returning(*topics.c, sort_by_parameter_order=True),
+            [row for _, row in create_rows],
+        )
+        created = [Topic.row_to_dict(row) for row in rows]
+        for (i, _), topic in zip(create_rows, created):
+            results.ok(i, 201, topic)
+        changes.record(db.session, "topic", "insert", created)
+
+    if update_rows:
+        v = values(
+            column("id", String), column("name", String), column("description", String),
+            column("parent_topic_id", String), name="v",
+        ).data([row for _, row in update_rows])
+        rows = db.session.execute(
+            update(topics)
+            .where(topics.c.id == cast(v.c.id, UUID(as_uuid=False)))
+            .values(name=v.c.name, description=v.c.description,
+                    parent_topic_id=cast(v.c.parent_topic_id, UUID(as_uuid=False)))
+            .returning(*topics.c)
+        )
+        updated = {row.id: Topic.row_to_dict(row) for row in rows}
+        cyclic = hierarchy.cyclic_topic_ids([row[0] for _, row in update_rows if row[3]])
+        for i, row in update_rows:
+            if row[0] in cyclic:
+                results.error(i, 422, "parentTopicID would create a cycle")
+            else:
+                results.ok(i, 200, updated[row[0]])
+        if results.failed:
+            db.session.rollback()
+            return results.response()
+        changes.record(db.session, "topic", "update", list(updated.values()))
+
+    if delete_ids:
+        db.session.execute(delete(topics).where(topics.c.id.in_(delete_ids)))
+        for i, _ in deletes:
+            results.ok(i, 204)
+        changes.record(db.session, "topic", "delete", sorted(delete_ids))
+
+    mark_changed(db.session, "topics")
+    if delete_ids:
+        # Gelöschte Topics entfernen per ON DELETE CASCADE auch ihre Voraussetzungen
+        mark_changed(db.session, "prerequisites")
+    db.session.commit()
+    return results.response()
+
+
+def apply_skill_batch(operations):
+    """
+    Validiert und schreibt einen Skill-Batch.
+
+    Returns:
+        tuple: (Antwort-Body, HTTP-Status)
+    """
+    results = BatchResults(operations)
+
+    def validate_create(item):
+        if not (item.get("name") or "").strip():
+            return "Field 'name' is required"
+        if not (item.get("topicID") or item.get("topicId")):
+            return "Field 'topicID' is required"
+
+    creates, updates, deletes = split_operations(operations, results, validate_create)
+
+    def topic_of(item, default=None):
+        topic_id = item.get("topicID", item.get("topicId", default))
+        return (canonical_id(topic_id) or topic_id) if topic_id else topic_id
+
+    # Gesperrt bis zum Commit: sonst kann ein paralleler Request einen Skill zwischen
+    # Prüfung und UPDATE löschen bzw. ein Ziel-Topic, auf das der Batch verweist
+    existing = fetch_rows(skills, {item["id"] for _, item in updates + deletes}, lock=True)
+    topic_ids = {
+        topic_of(item) for _, item in creates + updates
+        if topic_of(item) and is_uuid(topic_of(item))
+    }
+    known_topics = set(fetch_rows(topics, topic_ids, lock=True, key_share=True))
+
+    create_rows = []
+    for i, item in creates:
+        topic_id = topic_of(item)
+        if topic_id not in known_topics:
+            results.error(i, 422, "topicID not found")
+            continue
+        create_rows.append((i, {
+            "id": gen_uuid(),
+            "name": item["name"].strip(),
+            "topic_id": topic_id,
+            "difficulty": (item.get("difficulty") or "beginner").strip(),
+        }))
+
+    update_rows = []
+    for i, item in updates:
+        s = existing.get(item["id"])
+        if not s:
+            results.error(i, 404, "Skill not found")
+            continue
+        topic_id = topic_of(item, s.topic_id)
+        if not topic_id:
+            # Wie PUT /skills/<id> mit "topicID": null
+            results.error(i, 422, "Field 'topicID' is required")
+            continue
+        if topic_id != s.topic_id and topic_id not in known_topics:
+            results.error(i, 422, "topicID not found")
+            continue
+        update_rows.append((i, (
+            s.id,
+            (item.get("name") or s.name).strip(),
+            topic_id,
+            (item.get("difficulty") or s.difficulty).strip(),
+        )))
+
+    for i, item in deletes:
+        if item["id"] not in existing:
+            results.error(i, 404, "Skill not found")
+
+    if results.failed:
+        db.session.rollback()
+        return results.response()
+
+    if create_rows:
+        rows = db.session.execute(
+            insert(skills).returning(*skills.c, sort_by_parameter_order=True),
+            [row for _, row in create_rows],
+        )
+        created = [Skill.row_to_dict(row) for row in rows]
+        for (i, _), skill in zip(create_rows, created):
+            results.ok(i, 201, skill)
+        changes.record(db.session, "skill", "insert", created)
+
+    if update_rows:
+        v = values(
+            column("id", String), column("name", String), column("topic_id", String),
+            column("difficulty", String), name="v",
+        ).data([row for _, row in update_rows])
+        rows = db.session.execute(
+            update(skills)
+            .where(skills.c.id == cast(v.c.id, UUID(as_uuid=False)))
+            .values(name=v.c.name, topic_id=cast(v.c.topic_id, UUID(as_uuid=False)), difficulty=v.c.difficulty)
+            .returning(*skills.c)
+        )
+        updated = {row.id: Skill.row_to_dict(row) for row in rows}
+        for i, row in update_rows:
+            results.ok(i, 200, updated[row[0]])
+        changes.record(db.session, "skill", "update", list(updated.values()))
+
+    if deletes:
+        delete_ids = [item["id"] for _, item in deletes]
+        db.session.execute(delete(skills).where(skills.c.id.in_(delete_ids)))
+        for i, _ in deletes:
+            results.ok(i, 204)
+        changes.record(db.session, "skill", "delete", delete_ids)
+
+    mark_changed(db.session, "skills")
+    db.session.commit()
+    return results.response()
@@ -0,0 +1,131 @@
+# benchmarks/large_pages.py
+"""
+Vergleicht große Seiten von GET /skills: Bytes auf der Leitung, Dauer und
+Spitzen-Speicher (VmHWM) des Gunicorn-Workers.
+- pages200: --rows Zeilen in Seiten zu 200 (bisheriges Limit, ohne X-Api-Key)
+- buffered: Seiten zu --limit Zeilen für einen vertrauenswürdigen Client, komplett
+  im Speicher gebaut (STREAM_MIN_LIMIT sehr hoch gesetzt)
+- streamed: dieselben Seiten als Stream aus einem serverseitigen Cursor
+Jede Variante läuft in einem frischen Gunicorn (ein sync-Worker) einmal pro
+Kodierung (identity, gzip und, falls installiert, br und zstd).
+
+Aufruf:
+    python benchmarks/large_pages.py --rows 30000 --limit 10000
+"""
+import argparse
+import gzip
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+import compression
+
+API_KEY = "large-pages-benchmark"
+MODES = {
+    "pages200": {},
+    "buffered": {"STREAM_MIN_LIMIT": "1000000"},
+    "streamed": {},
+}
+
+
+def start_server(port, env_overrides):
+    env = dict(os.environ, TRUSTED_API_KEYS=API_KEY, RESPONSE_CACHE_SIZE="0", **env_overrides)
+    process = subprocess.Popen(
+        ["gunicorn", "--bind", f"127.0.0.1:{port}", "--workers", "1", "--timeout", "300", "app:app"],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/healthz")
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Gunicorn did not become ready")
+
+
+def worker_pid(master_pid):
+    with open(f"/proc/{master_pid}/task/{master_pid}/children", encoding="ascii") as f:
+        return int(f.read().split()[0])
+
+
+def peak_rss_mb(pid):
+    with open(f"/proc/{pid}/status", encoding="ascii") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def fetch_rows(port, rows, limit, encoding, trusted):
+    """Lädt rows Zeilen seitenweise (Keyset); liefert (Bytes auf der Leitung, Sekunden)."""
+    headers = {"Accept-Encoding": encoding}
+    if trusted:
+        headers["X-Api-Key"] = API_KEY
+    cursor, fetched, wire = "", 0, 0
+    started = time.perf_counter()
+    while fetched < rows:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+        connection.request("GET", f"/skills?limit={min(limit, rows - fetched)}&count=none&cursor={cursor}", headers=headers)
+        response = connection.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise RuntimeError(f"GET /skills -> {response.status}")
+        wire += len(body)
+        if response.getheader("Content-Encoding"):
+            body = decode(body, response.getheader("Content-Encoding"))
+        page = json.loads(body)
+        fetched += len(page["data"])
+        cursor = page["meta"]["nextCursor"]
+        if not cursor:
+            break
+    return wire, time.perf_counter() - started
+
+
+def decode(body, encoding):
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "br":
+        return compression.brotli.decompress(body)
+    if encoding == "zstd":
+        return compression.zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    raise ValueError(encoding)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Große Seiten: Bytes, Dauer und Spitzen-Speicher.")
+    parser.add_argument("--rows", type=int, default=30000, help="Zeilen pro Durchlauf")
+    parser.add_argument("--limit", type=int, default=10000, help="Seitengröße für buffered/streamed")
+    parser.add_argument("--port", type=int, default=5058)
+    args = parser.parse_args(argv)
+    if not os.getenv("DATABASE_URL"):
+        parser.error("DATABASE_URL is not set")
+
+    encodings = ["identity", *reversed(list(compression.ENCODERS))]
+    print(f"{'Variante':<10}{'Kodierung':<10}{'Bytes':>12}{'ms':>9}{'Worker-RSS MB':>15}")
+    for mode, env in MODES.items():
+        process = start_server(args.port, env)
+        try:
+            pid = worker_pid(process.pid)
+            for encoding in encodings:
+                if mode == "pages200":
+                    wire, seconds = fetch_rows(args.port, args.rows, 200, encoding, trusted=False)
+                else:
+                    wire, seconds = fetch_rows(args.port, args.rows, args.limit, encoding, trusted=True)
+                print(f"{mode:<10}{encoding:<10}{wire:>12}{seconds * 1000:>9.0f}{peak_rss_mb(pid):>15.1f}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+# benchmarks/load.py
+"""
+Lasttest für die API anhand der Requests aus postman_collection.json.
+- Befüllt die Datenbank optional mit synthetischen Daten in einer festen Größe
+  (1k / 100k / 1m Topics, jeweils zehnmal so viele Skills) über data/bulk_load.py
+- Startet die App unter Gunicorn (oder nutzt mit --url einen laufenden Server) und
+  spielt die Requests der Collection mit n parallelen Clients ab; IDs wie "t1" oder
+  "s1" werden durch zufällige IDs der synthetischen Daten ersetzt
+- Misst pro Endpunkt p50/p95/p99, Requests pro Sekunde, Fehler und SQL-Statements
+  pro Request (Header X-Query-Count, siehe metrics.py)
+- Schreibt das Ergebnis als JSON; mit --baseline wird gegen einen früheren Lauf
+  verglichen und bei Verschlechterung mit Exit-Code 1 beendet
+
+Aufruf:
+    python benchmarks/load.py --scale 100k --seed-data --concurrency 16 --duration 30 --out results.json
+    python benchmarks/load.py --scale 100k --concurrency 16 --baseline results.json
+    python benchmarks/load.py --scale 100k --concurrency 32 --profile gthread --threads 8
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlparse
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+SCALES = {
+    "1k": (1_000, 10_000),
+    "100k": (100_000, 1_000_000),
+    "1m": (1_000_000, 10_000_000),
+}
+# Gewichtung der Szenarien im Mix: überwiegend Lesezugriffe wie im Betrieb
+WEIGHTS = {"GET": 20, "POST": 2, "PUT": 2, "DELETE": 2}
+LEGACY_ID = re.compile(r'^([ts])(\d+)$')
+
+
+def seed(scale, batch_size, reset):
+    """Lädt die synthetischen Daten der gewählten Größe (idempotent)."""
+    from app import app
+    from models import db
+    from data.bulk_load import load_skills, load_topics
+    from data.generate import synthetic_skills, synthetic_topics
+    from cache import versions
+
+    topics, skills = SCALES[scale]
+    with app.app_context():
+        connection = db.engine.raw_connection()
+        try:
+            if reset:
+                cursor = connection.cursor()
+                cursor.execute("TRUNCATE topics, skills, topic_prerequisites")
+                connection.commit()
+            print(" ", load_topics(connection, synthetic_topics(topics), batch_size))
+            print(" ", load_skills(connection, synthetic_skills(skills, topics), batch_size))
+        finally:
+            connection.close()
+            versions.bump("topics", "skills", "prerequisites", "unlogged")
+
+
+def load_scenarios(path):
+    """
+    Liest die Requests der Postman-Collection.
+
+    Returns:
+        list: dicts mit name (z.B. "GET /topics/{id}"), method, path und body.
+    """
+    with open(path, encoding="utf-8") as f:
+        collection = json.load(f)
+    scenarios = []
+
+    def walk(items):
+        for item in items:
+            if "item" in item:
+                walk(item["item"])
+                continue
+            request = item["request"]
+            url = request["url"] if isinstance(request["url"], str) else request["url"]["raw"]
+            path = urlparse(url).path
+            template = "/".join("{id}" if LEGACY_ID.match(part) else part for part in path.split("/"))
+            raw = (request.get("body") or {}).get("raw")
+            scenarios.append({
+                "name": f"{request['method']} {template}",
+                "method": request["method"],
+                "path": template,
+                "body": json.loads(raw) if raw else None,
+            })
+
+    walk(collection["item"])
+    return scenarios
+
+
+class Client(threading.Thread):
+    """
+    Ein paralleler Client mit eigener Keep-Alive-Verbindung. Angelegte Einträge
+    merkt er sich, damit DELETE nur eigene Einträge entfernt.
+    """
+
+    def __init__(self, base_url, scenarios, ids, stop_at, record_after, seed):
+        super().__init__(daemon=True)
+        self.url = urlparse(base_url)
+        self.scenarios = scenarios
+        self.weights = [WEIGHTS.get(s["method"], 1) for s in scenarios]
+        self.ids = ids
+        self.stop_at = stop_at
+        self.record_after = record_after
+        self.rnd = random.Random(seed)
+        self.created = {"topics": [], "skills": []}
+        self.samples = []
+        self.connection = None
+
+    def request(self, method, path, body=None):
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload else {}
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.url.hostname, self.url.port or 80, timeout=30)
+            try:
+                self.connection.request(method, path, body=payload, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                return response.status, response.getheader("X-Query-Count"), data
+            except (http.client.HTTPException, OSError):
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+    def random_id(self, kind):
+        return self.rnd.choice(self.ids[kind])
+
+    def prepare(self, scenario):
+        """Setzt IDs in Pfad und Body ein; None, wenn das Szenario gerade nicht möglich ist."""
+        kind = scenario["path"].split("/")[1]
+        path, body = scenario["path"], scenario["body"]
+        if "{id}" in path:
+            if scenario["method"] == "DELETE":
+                if not self.created[kind]:
+                    return None
+                path = path.replace("{id}", self.created[kind].pop())
+            else:
+                path = path.replace("{id}", self.random_id(kind))
+        if body:
+            body = dict(body)
+            for key in ("topicId", "topicID", "parentTopicId", "parentTopicID"):
+                if body.get(key):
+                    body[key] = self.random_id("topics")
+            if scenario["method"] == "POST":
+                body["name"] = f"{body.get('name', 'Load')} {self.rnd.getrandbits(32):08x}"
+        return kind, path, body
+
+    def run(self):
+        while time.monotonic() < self.stop_at:
+            scenario = self.rnd.choices(self.scenarios, self.weights)[0]
+            prepared = self.prepare(scenario)
+            if prepared is None:
+                continue
+            kind, path, body = prepared
+            started = time.monotonic()
+            try:
+                status, query_count, data = self.request(scenario["method"], path, body)
+            except (http.client.HTTPException, OSError):
+                status, query_count, data = 0, None, b""
+            finished = time.monotonic()
+            if scenario["method"] == "POST" and status == 201:
+                self.created[kind].append(json.loads(data)["id"])
+            if started >= self.record_after:
+                self.samples.append((scenario["name"], finished - started, status, query_count))
+
+
+def percentile(sorted_values, p):
+    """Perzentil per nächstem Rang aus einer sortierten Liste."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, duration):
+    """Fasst die Messwerte pro Szenario zusammen."""
+    grouped = {}
+    for name, latency, status, query_count in samples:
+        grouped.setdefault(name, []).append((latency, status, query_count))
+    results = {}
+    for name, entries in sorted(grouped.items()):
+        latencies = sorted(latency * 1000 for latency, _, _ in entries)
+        counts = [int(q) for _, _, q in entries if q is not None]
+        statuses = {}
+        for _, status, _ in entries:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        results[name] = {
+            "requests": len(entries),
+            "rps": round(len(entries) / duration, 2),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "errors": sum(n for status, n in statuses.items() if status == "0" or status.startswith("5")),
+            "statuses": statuses,
+            "sql_per_request": round(statistics.mean(counts), 2) if counts else None,
+        }
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Vergleicht p95 und Durchsatz mit einem früheren Lauf.
+
+    Returns:
+        list: Beschreibungen der Verschlechterungen über threshold (z.B. 0.1 = 10 %).
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        if current["rps"] < previous["rps"] * (1 - threshold):
+            regressions.append(f"{name}: {previous['rps']} -> {current['rps']} req/s")
+        before, after = previous.get("sql_per_request"), current["sql_per_request"]
+        if before is not None and after is not None and after > before + 0.5:
+            regressions.append(f"{name}: SQL/request {previous['sql_per_request']} -> {current['sql_per_request']}")
+    return regressions
+
+
+def start_gunicorn(port, workers, profile=None, threads=None):
+    """
+    Startet die App unter Gunicorn mit X-Query-Count-Headern und wartet auf /healthz.
+    Mit profile (sync, gthread, gevent) über gunicorn.conf.py, sonst nur mit
+    Kommandozeilenoptionen und Standard-Pool.
+    """
+    env = dict(os.environ, METRICS_DEBUG_HEADERS="true", METRICS_DIR=tempfile.mkdtemp(prefix="metrics-"))
+    command = ["gunicorn", "--bind", f"127.0.0.1:{port}", "--workers", str(workers)]
+    if profile:
+        env["GUNICORN_PROFILE"] = profile
+        if threads:
+            env["THREADS"] = str(threads)
+        command += ["-c", "gunicorn.conf.py"]
+    process = subprocess.Popen(command + ["app:app"], cwd=BASE_DIR, env=env)
+    for _ in range(100):
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/healthz")
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Gunicorn did not become ready")
+
+
+def sample_ids(scale):
+    """IDs der synthetischen Daten, aus denen die Clients zufällig wählen."""
+    from data_manager import legacy_uuid
+
+    topics, skills = SCALES[scale]
+    rnd = random.Random(1)
+    return {
+        "topics": [legacy_uuid("topic", f"syn-t{rnd.randint(1, topics)}") for _ in range(10000)],
+        "skills": [legacy_uuid("skill", f"syn-s{rnd.randint(1, skills)}") for _ in range(10000)],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lasttest der API mit den Requests aus postman_collection.json.")
+    parser.add_argument("--scale", choices=SCALES, default="1k")
+    parser.add_argument("--seed-data", action="store_true", help="synthetische Daten vorher laden")
+    parser.add_argument("--reset", action="store_true", help="Tabellen vor dem Laden leeren (TRUNCATE!)")
+    parser.add_argument("--batch-size", type=int, default=50000)
+    parser.add_argument("--url", help="laufenden Server nutzen statt Gunicorn zu starten")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--workers", type=int, default=2, help="Gunicorn-Worker")
+    parser.add_argument("--profile", choices=("sync", "gthread", "gevent"),
+                        help="Worker-Profil aus gunicorn.conf.py (ohne: nur Kommandozeilenoptionen)")
+    parser.add_argument("--threads", type=int, help="Threads pro Worker beim Profil gthread")
+    parser.add_argument("--concurrency", type=int, default=8, help="parallele Clients")
+    parser.add_argument("--duration", type=float, default=30, help="Messdauer in Sekunden")
+    parser.add_argument("--warmup", type=float, default=5, help="Aufwärmphase ohne Messung")
+    parser.add_argument("--collection", default=str(BASE_DIR / "postman_collection.json"))
+    parser.add_argument("--out", help="Ergebnis als JSON schreiben")
+    parser.add_argument("--baseline", help="früheres Ergebnis zum Vergleich")
+    parser.add_argument("--threshold", type=float, default=0.10, help="tolerierte Verschlechterung (0.10 = 10 %%)")
+    args = parser.parse_args(argv)
+
+    if args.seed_data:
+        print(f"Lade Daten ({args.scale})...")
+        seed(args.scale, args.batch_size, args.reset)
+
+    process = None
+    base_url = args.url
+    if not base_url:
+        process = start_gunicorn(args.port, args.workers, args.profile, args.threads)
+        base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        scenarios = load_scenarios(args.collection)
+        ids = sample_ids(args.scale)
+        now = time.monotonic()
+        record_after = now + args.warmup
+        stop_at = record_after + args.duration
+        clients = [Client(base_url, scenarios, ids, stop_at, record_after, seed=i) for i in range(args.concurrency)]
+        print(f"{len(scenarios)} Szenarien, {args.concurrency} Clients, {args.warmup:.0f}s Aufwärmen + {args.duration:.0f}s Messung...")
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    samples = [sample for client in clients for sample in client.samples]
+    results = summarize(samples, args.duration)
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "scale": args.scale,
+            "concurrency": args.concurrency,
+            "workers": None if args.url else args.workers,
+            "profile": None if args.url else args.profile,
+            "duration": args.duration,
+            "total_rps": round(len(samples) / args.duration, 2),
+        },
+        "results": results,
+    }
+
+    print(f"{'Szenario':<26}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'SQL':>6}{'Fehler':>8}")
+    for name, r in results.items():
+        print(f"{name:<26}{r['rps']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}"
+              f"{r['sql_per_request'] if r['sql_per_request'] is not None else '-':>6}{r['errors']:>8}")
+    print(f"Gesamt: {report['meta']['total_rps']} req/s")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Ergebnis -> {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("Verschlechterungen gegenüber der Baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("Keine Verschlechterung gegenüber der Baseline.")
+
+
+if __name__ == "__main__":
+    main()
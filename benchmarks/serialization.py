@@ -0,0 +1,85 @@
+# benchmarks/serialization.py
+"""
+Vergleicht den bisherigen Weg der Listen-Endpunkte (ORM-Objekte, to_dict(), jsonify)
+mit dem spaltenbasierten Weg (select nur der benötigten Spalten, row_serializer(),
+serializers.dumps mit orjson, falls installiert).
+
+Gemessen wird jeweils Abfrage + Serialisierung einer Seite sowie die reine
+Serialisierung bereits geladener Zeilen. Benötigt eine befüllte Datenbank, z.B.:
+    python data/bulk_load.py --synthetic-topics 100000 --synthetic-skills 1000000
+
+Aufruf:
+    python benchmarks/serialization.py --limit 200 --repeat 50
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+from flask import jsonify
+from app import app
+from models import db, Topic, Skill
+import serializers
+
+
+def measure(func, repeat):
+    """Führt func repeat-mal aus und liefert den Median in Millisekunden."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def orm_page(model, limit):
+    return jsonify({"data": [o.to_dict() for o in model.query.order_by(model.name, model.id).limit(limit)]}).get_data()
+
+
+def column_page(model, fields, limit):
+    columns = [column for _, column in fields]
+    rows = db.session.query(*columns).order_by(model.name, model.id).limit(limit).all()
+    serialize = serializers.row_serializer(fields)
+    return serializers.dumps({"data": [serialize(row) for row in rows]})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark der JSON-Serialisierung von Listen-Seiten.")
+    parser.add_argument("--limit", type=int, default=200, help="Zeilen pro Seite")
+    parser.add_argument("--repeat", type=int, default=50, help="Wiederholungen pro Messung")
+    args = parser.parse_args(argv)
+
+    print(f"Encoder: {'orjson' if serializers.orjson else 'json'}, Seite: {args.limit} Zeilen, Median aus {args.repeat} Läufen")
+    print(f"{'Messung':<52}{'ms':>10}{'Faktor':>10}")
+    with app.test_request_context():
+        for model, fields in ((Topic, serializers.TOPIC_FIELDS), (Skill, serializers.SKILL_FIELDS)):
+            name = model.__tablename__
+            sparse = fields[:2]  # id, name
+            baseline = measure(lambda: orm_page(model, args.limit), args.repeat)
+            results = [
+                (f"{name}: ORM + to_dict + jsonify", baseline),
+                (f"{name}: Spalten + row_serializer", measure(lambda: column_page(model, fields, args.limit), args.repeat)),
+                (f"{name}: Spalten + row_serializer, fields=id,name", measure(lambda: column_page(model, sparse, args.limit), args.repeat)),
+            ]
+
+            # Nur Serialisierung, ohne Datenbank
+            objects = model.query.order_by(model.name, model.id).limit(args.limit).all()
+            rows = db.session.query(*[c for _, c in fields]).order_by(model.name, model.id).limit(args.limit).all()
+            serialize = serializers.row_serializer(fields)
+            only_orm = measure(lambda: jsonify({"data": [o.to_dict() for o in objects]}).get_data(), args.repeat)
+            results += [
+                (f"{name}: nur to_dict + jsonify", only_orm),
+                (f"{name}: nur row_serializer + dumps", measure(lambda: serializers.dumps({"data": [serialize(r) for r in rows]}), args.repeat)),
+            ]
+            for label, ms in results:
+                reference = baseline if "nur" not in label else only_orm
+                print(f"{label:<52}{ms:>10.2f}{reference / ms:>9.1f}x")
+            db.session.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/startup_time.py
+"""
+Misst die Zeit vom Containerstart bis zum ersten beantworteten Request, für den
+bisherigen und den neuen Ablauf von entrypoint.sh (ohne Docker, gegen DATABASE_URL):
+- legacy: Warteschleife in eigenem Python-Prozess, `flask db upgrade`, dann Gunicorn
+  ohne Konfiguration (jeder Worker importiert die App selbst)
+- fast: `python startup.py` (eine Abfrage, Alembic nur bei ausstehenden Migrationen),
+  dann Gunicorn mit gunicorn.conf.py (preload_app)
+
+Jeder Ablauf läuft --repeat-mal; ausgegeben werden Median und Minimum der Zeit bis
+zur ersten 200-Antwort auf --path sowie die Dauer der Vorbereitung vor Gunicorn.
+
+Aufruf:
+    python benchmarks/startup_time.py --repeat 5 --workers 2
+"""
+import argparse
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+WAIT_FOR_POSTGRES = (
+    "import os, psycopg2; "
+    "psycopg2.connect(os.environ['DATABASE_URL'].replace('+psycopg2', ''), connect_timeout=3).close()"
+)
+
+
+def steps(mode, port, workers):
+    """Befehle vor Gunicorn und der Gunicorn-Befehl selbst."""
+    bind = ["--bind", f"127.0.0.1:{port}", "--workers", str(workers)]
+    if mode == "legacy":
+        prepare = [[sys.executable, "-c", WAIT_FOR_POSTGRES], ["flask", "db", "upgrade"]]
+        return prepare, ["gunicorn", *bind, "app:app"]
+    return [[sys.executable, "startup.py"]], ["gunicorn", "-c", "gunicorn.conf.py", *bind, "app:app"]
+
+
+def wait_for_response(port, path, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            connection.request("GET", path)
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.01)
+    raise RuntimeError(f"no 200 response on {path} within {timeout}s")
+
+
+def measure(mode, args):
+    """Ein Start: (Sekunden bis zur ersten Antwort, Sekunden für die Vorbereitung)."""
+    env = dict(os.environ, FLASK_APP="app:app")
+    prepare, server = steps(mode, args.port, args.workers)
+    started = time.perf_counter()
+    for command in prepare:
+        subprocess.run(command, cwd=BASE_DIR, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    prepared = time.perf_counter()
+    process = subprocess.Popen(server, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_response(args.port, args.path)
+        return time.perf_counter() - started, prepared - started
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Startzeit bis zum ersten Request: bisheriger vs. neuer Ablauf.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=5057)
+    parser.add_argument("--path", default="/topics?limit=1", help="erster Request")
+    args = parser.parse_args(argv)
+    if not os.getenv("DATABASE_URL"):
+        parser.error("DATABASE_URL is not set")
+
+    print(f"{'Ablauf':<8}{'Median s':>10}{'Min s':>8}{'davon vor Gunicorn':>20}")
+    medians = {}
+    for mode in ("legacy", "fast"):
+        runs = [measure(mode, args) for _ in range(args.repeat)]
+        totals = [total for total, _ in runs]
+        medians[mode] = statistics.median(totals)
+        print(f"{mode:<8}{medians[mode]:>10.2f}{min(totals):>8.2f}"
+              f"{statistics.median(prepare for _, prepare in runs):>20.2f}")
+    print(f"Ersparnis: {(1 - medians['fast'] / medians['legacy']) * 100:.0f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/worker_profiles.py
+"""
+Vergleicht den Durchsatz der Gunicorn-Worker-Profile mit dem bisherigen Start
+(gunicorn --workers n app:app, SQLAlchemy-Standardpool).
+Jedes Profil läuft einmal als eigener Lasttest (benchmarks/load.py) mit denselben
+Szenarien, Clients und derselben Dauer; ausgegeben werden Gesamt-req/s, das
+schlechteste p95 und die Anzahl Fehler pro Profil.
+
+Aufruf:
+    python benchmarks/worker_profiles.py --scale 100k --concurrency 32 --duration 30
+    python benchmarks/worker_profiles.py --profiles plain,gthread --threads 8
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import load
+
+PROFILES = ("plain", "sync", "gthread", "gevent")
+
+
+def run_profile(profile, args):
+    """Ein Lasttest mit dem Profil; liefert den Bericht von load.py."""
+    fd, out = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    argv = [
+        "--scale", args.scale, "--workers", str(args.workers), "--concurrency", str(args.concurrency),
+        "--duration", str(args.duration), "--warmup", str(args.warmup), "--port", str(args.port), "--out", out,
+    ]
+    if profile != "plain":
+        argv += ["--profile", profile]
+        if profile == "gthread":
+            argv += ["--threads", str(args.threads)]
+    try:
+        load.main(argv)
+        with open(out, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.remove(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Durchsatz der Gunicorn-Worker-Profile im Vergleich.")
+    parser.add_argument("--profiles", default="plain,sync,gthread",
+                        help=f"kommagetrennt aus {', '.join(PROFILES)} (plain: bisheriger Start)")
+    parser.add_argument("--scale", choices=load.SCALES, default="1k")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--port", type=int, default=5056)
+    args = parser.parse_args(argv)
+
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    unknown = [p for p in profiles if p not in PROFILES]
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(unknown)}")
+
+    reports = {profile: run_profile(profile, args) for profile in profiles}
+
+    first = reports[profiles[0]]["meta"]["total_rps"]
+    print(f"\n{'Profil':<10}{'req/s':>10}{'vs. ' + profiles[0]:>14}{'max p95':>10}{'Fehler':>8}")
+    for profile, report in reports.items():
+        results = report["results"].values()
+        rps = report["meta"]["total_rps"]
+        worst_p95 = max((r["p95_ms"] for r in results), default=0)
+        errors = sum(r["errors"] for r in results)
+        change = f"{(rps / first - 1) * 100:+.1f} %" if first else "-"
+        print(f"{profile:<10}{rps:>10}{change:>14}{worst_p95:>10}{errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Antwort-Cache und Versionszähler für lesende Endpunkte.
+- Jede Tabelle hat einen Versionszähler, den schreibende Endpunkte nach dem Commit
+  erhöhen (mark_changed() + after_commit-Hook)
+- Antworten werden pro Worker unter (Route, normalisierte Argumente, Tabellenversionen)
+  abgelegt; nach einem Schreibzugriff passt der Schlüssel nicht mehr, veraltete
+  Einträge fallen per LRU heraus
+- Die Zähler liegen in einer per mmap eingeblendeten Datei, damit alle Worker eines
+  Hosts dieselben Versionen sehen (lokaler Ersatz für einen gemeinsamen Speicher
+  wie Redis INCR, wenn die Worker auf mehreren Hosts laufen)
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+TABLES = ("topics", "skills", "prerequisites", "changes")
+# Weitere Werte neben den Tabellenversionen ("lsn": WAL-Position des letzten
+# Schreibzugriffs, siehe replicas.py; "unlogged": Schreibzugriffe ohne Eintrag im
+# Änderungsprotokoll, siehe search_index.py)
+MARKS = ("lsn", "unlogged")
+SLOT = struct.Struct("<Q")
+
+CachedResponse = namedtuple("CachedResponse", "body mimetype etag")
+
+
+class FileVersionStore:
+    """
+    Versionszähler (uint64) pro Name in einer gemeinsam genutzten Datei.
+    Lesen ist ein reiner Speicherzugriff; Erhöhen läuft unter einer fcntl-Sperre
+    (prozessübergreifend) und einem threading.Lock (innerhalb des Workers).
+    """
+
+    def __init__(self, path, names=TABLES + MARKS):
+        """
+        Args:
+            path (str): Pfad der Versionsdatei; wird bei Bedarf angelegt.
+            names (tuple): Namen der Zähler, in fester Reihenfolge.
+        """
+        self.path = path
+        self.slots = {name: i * SLOT.size for i, name in enumerate(names)}
+        size = SLOT.size * len(names)
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+
+    def get(self, name):
+        """Aktuelle Version eines Zählers."""
+        return SLOT.unpack_from(self._map, self.slots[name])[0]
+
+    def snapshot(self, names):
+        """Versionen mehrerer Zähler als Tupel (Teil des Cache-Schlüssels)."""
+        return tuple(self.get(name) for name in names)
+
+    def bump(self, *names):
+        """Erhöht die genannten Zähler um eins."""
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                for name in names:
+                    offset = self.slots[name]
+                    SLOT.pack_into(self._map, offset, SLOT.unpack_from(self._map, offset)[0] + 1)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    def advance(self, name, value):
+        """Setzt einen Zähler auf value, falls er bisher kleiner ist (nie rückwärts)."""
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                offset = self.slots[name]
+                if SLOT.unpack_from(self._map, offset)[0] < value:
+                    SLOT.pack_into(self._map, offset, value)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+
+class ResponseCache:
+    """
+    LRU-Cache für fertig serialisierte Antworten eines Worker-Prozesses.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body, mimetype):
+        """Legt eine Antwort ab und liefert sie samt starkem ETag (Hash des Bodys)."""
+        entry = CachedResponse(body, mimetype, hashlib.blake2b(body, digest_size=16).hexdigest())
+        if self.max_entries <= 0:
+            return entry
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+versions = FileVersionStore(
+    os.getenv("VERSION_STORE_PATH", os.path.join(tempfile.gettempdir(), "topics-api.versions"))
+)
+responses = ResponseCache(int(os.getenv("RESPONSE_CACHE_SIZE", 1024)))
+
+
+def mark_changed(session, *tables):
+    """
+    Merkt vor, dass die laufende Transaktion die Tabellen ändert. Die Versionen
+    werden erst nach einem erfolgreichen Commit erhöht, bei Rollback verworfen.
+    """
+    session.info.setdefault("changed_tables", set()).update(tables)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_changed(session):
+    changed = session.info.pop("changed_tables", None)
+    if changed:
+        versions.bump(*sorted(changed))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed(session):
+    session.info.pop("changed_tables", None)
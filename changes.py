@@ -0,0 +1,143 @@
+"""
+Änderungsprotokoll (Tabelle changes) für GET /changes?since=.
+- Jeder schreibende Endpunkt trägt in derselben Transaktion pro geändertem Topic/Skill
+  eine Zeile ein: insert/update mit dem neuen Stand, delete als Tombstone ohne Daten
+- seq ist fortlaufend und wird in Commit-Reihenfolge vergeben, daher kann ein Client,
+  der bis seq n gelesen hat, später keine kleinere Nummer mehr verpassen. Dafür
+  sammelt record() die Zeilen nur in der Session; eingefügt werden sie erst direkt
+  vor dem Commit unter einer Advisory-Sperre, die bis zum Commit gilt. Gesperrt ist
+  also nur INSERT + COMMIT, nicht die ganze schreibende Transaktion
+- Long-Polling wartet auf die Version "changes" im gemeinsamen Versionsspeicher
+  statt die Datenbank abzufragen
+- Einträge älter als CHANGES_RETENTION_DAYS (Standard 30) löscht prune() bzw.
+  `flask prune-changes` (z.B. täglich per Cron); wessen ?since= davor liegt, muss
+  neu synchronisieren (GET /changes antwortet mit 410)
+"""
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, event, func, insert, select, text
+from sqlalchemy.orm import Session
+from werkzeug.http import http_date
+
+import metrics
+import replicas
+from cache import mark_changed, versions
+from models import db, Change
+
+# Fester Schlüssel für pg_advisory_xact_lock (vgl. PREREQUISITE_LOCK_KEY = 4711)
+CHANGES_LOCK_KEY = 4712
+ENTITIES = ("topic", "skill")
+RETENTION_DAYS = float(os.getenv("CHANGES_RETENTION_DAYS", 30))
+# Abstand, in dem beim Long-Polling die Version geprüft wird (reiner Speicherzugriff)
+POLL_INTERVAL = 0.05
+
+
+def _jsonable(data):
+    # Zeitstempel im selben Format wie die API (HTTP-Datum)
+    return {key: http_date(value) if hasattr(value, "utctimetuple") else value for key, value in data.items()}
+
+
+def record(session, entity, op, items):
+    """
+    Merkt Änderungen für die laufende Transaktion vor; in die Tabelle changes kommen
+    sie beim Commit (siehe _write_changes), bei Rollback werden sie verworfen.
+
+    Args:
+        session: Die SQLAlchemy-Session (db.session).
+        entity (str): 'topic' oder 'skill'.
+        op (str): 'insert', 'update' oder 'delete'.
+        items (list): Bei insert/update dicts im Format von to_dict(), bei delete IDs.
+    """
+    if not items:
+        return
+    if op == "delete":
+        rows = [{"entity": entity, "entity_id": item, "op": op, "data": None} for item in items]
+    else:
+        rows = [{"entity": entity, "entity_id": item["id"], "op": op, "data": _jsonable(item)} for item in items]
+    session.info.setdefault("pending_changes", []).extend(rows)
+    mark_changed(session, "changes")
+
+
+@event.listens_for(Session, "before_commit")
+def _write_changes(session):
+    # Die Sperre gilt bis zum Commit: seq wird so in Commit-Reihenfolge vergeben
+    rows = session.info.pop("pending_changes", None)
+    if rows:
+        session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CHANGES_LOCK_KEY})
+        session.execute(insert(Change), rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changes(session):
+    session.info.pop("pending_changes", None)
+
+
+def prune(days=RETENTION_DAYS):
+    """
+    Löscht Änderungen, die älter als days Tage sind, und committet.
+    Gelöscht wird nur vorne bis zur ersten jüngeren Änderung, die neueste Änderung
+    bleibt immer erhalten, damit expired() den Anfang des Protokolls kennt.
+
+    Returns:
+        int: Anzahl gelöschter Änderungen.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    keep = db.session.execute(
+        select(Change.seq).where(Change.changed_at >= cutoff).order_by(Change.seq).limit(1)
+    ).scalar()
+    if keep is None:
+        keep = db.session.execute(select(func.max(Change.seq))).scalar()
+    if keep is None:
+        return 0
+    deleted = db.session.execute(delete(Change).where(Change.seq < keep)).rowcount
+    db.session.commit()
+    return deleted
+
+
+def expired(since):
+    """
+    True, wenn Änderungen nach since schon von prune() gelöscht sein können.
+    since=0 (Start) liest ab der ältesten erhaltenen Änderung.
+    """
+    if since == 0:
+        return False
+    replicas.require_versions_lsn()
+    oldest = db.session.execute(select(func.min(Change.seq))).scalar()
+    return oldest is not None and since < oldest - 1
+
+
+def fetch(since, limit, entity=None):
+    """
+    Lädt höchstens limit Änderungen mit seq > since, aufsteigend.
+
+    Returns:
+        tuple: (Liste der Änderungen als dict, True wenn weitere folgen)
+    """
+    # Mindestens der Stand, den die Version "changes" verspricht (siehe replicas.py)
+    replicas.require_versions_lsn()
+    query = select(Change.__table__).where(Change.seq > since)
+    if entity:
+        query = query.where(Change.entity == entity)
+    rows = db.session.execute(query.order_by(Change.seq).limit(limit + 1)).all()
+    return [Change.row_to_dict(row) for row in rows[:limit]], len(rows) > limit
+
+
+def wait(since, limit, entity, timeout):
+    """
+    Wie fetch(), wartet aber bis zu timeout Sekunden auf neue Änderungen, falls noch
+    keine vorliegen. Während des Wartens hält der Request keine Datenbankverbindung.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        version = versions.get("changes")
+        items, more = fetch(since, limit, entity)
+        if items or time.monotonic() >= deadline:
+            return items, more
+        # Verbindung an den Pool zurückgeben, bevor gewartet wird
+        db.session.rollback()
+        started = time.monotonic()
+        while versions.get("changes") == version and time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+        metrics.add_idle_time(time.monotonic() - started)
@@ -0,0 +1,67 @@
+"""
+Single-Flight für lesende Endpunkte (pro Worker-Prozess).
+- Kommen gleichzeitig identische Requests an (gleicher Schlüssel wie im Antwort-Cache,
+  also Endpunkt, Argumente und Tabellenversionen), führt nur der erste ("leader") den
+  View aus; die übrigen ("follower") warten auf dessen Ergebnis, ohne selbst eine
+  Datenbankverbindung zu belegen
+- Wirkt bei Workern mit mehreren Threads bzw. Greenlets (GUNICORN_PROFILE gthread,
+  gevent); ein sync-Worker bearbeitet ohnehin nur einen Request gleichzeitig
+- Wartet ein Follower länger als COALESCE_WAIT_TIMEOUT Sekunden, führt er den View
+  selbst aus; Fehler des Leaders bekommen alle Wartenden
+- Metrik http_coalesced_requests_total{role=leader|follower|timeout}; Trefferquote
+  = follower / (leader + follower + timeout)
+"""
+import os
+import threading
+
+import metrics
+
+WAIT_TIMEOUT = float(os.getenv("COALESCE_WAIT_TIMEOUT", 10))
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Führt fn pro Schlüssel höchstens einmal gleichzeitig aus."""
+
+    def __init__(self, timeout=WAIT_TIMEOUT):
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Ergebnis von fn(), bei gleichzeitigen Aufrufen mit gleichem key geteilt."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if leader:
+            metrics.registry.inc("http_coalesced_requests_total", (("role", "leader"),))
+            try:
+                call.result = fn()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        if not call.done.wait(self.timeout):
+            metrics.registry.inc("http_coalesced_requests_total", (("role", "timeout"),))
+            return fn()
+        metrics.registry.inc("http_coalesced_requests_total", (("role", "follower"),))
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+flights = SingleFlight()
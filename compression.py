@@ -0,0 +1,170 @@
+"""
+Komprimierung der Antworten nach Accept-Encoding.
+- Unterstützt zstd und br (optional: pip install zstandard bzw. pip install brotli)
+  sowie gzip (Standardbibliothek); bei gleicher Gewichtung (q) in dieser Reihenfolge
+- Antworten im Speicher werden erst ab COMPRESS_MIN_BYTES (Standard 1024) komprimiert,
+  gestreamte Antworten (große Seiten, Export) immer, Stück für Stück
+- Komprimiert werden JSON, NDJSON, CSV und Text; Antworten mit eigenem
+  Content-Encoding, 204/304 und Antworten auf HEAD bleiben unverändert
+- Ein starker ETag wird beim Komprimieren schwach (W/"..."), If-None-Match vergleicht
+  schwach; komprimierte Varianten von Antworten mit ETag (Antwort-Cache) werden pro
+  (ETag, Kodierung) in einem kleinen LRU gehalten (COMPRESS_CACHE_SIZE)
+"""
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install zstandard
+    zstandard = None
+
+MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+CACHE_SIZE = int(os.getenv("COMPRESS_CACHE_SIZE", 256))
+GZIP_LEVEL = 6
+# Für dynamische Antworten: deutlich schneller als die Standardstufen, kaum größer
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+COMPRESSIBLE = ("application/json", "application/x-ndjson", "text/csv", "text/plain", "text/html")
+
+
+class _Gzip:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+# Kodierung -> Kompressor, in der Reihenfolge der Präferenz
+ENCODERS = {name: encoder for name, encoder, available in (
+    ("zstd", _Zstd, zstandard is not None),
+    ("br", _Brotli, brotli is not None),
+    ("gzip", _Gzip, True),
+) if available}
+
+
+def negotiate(accept_encodings):
+    """Beste verfügbare Kodierung für Accept-Encoding oder None (unkomprimiert)."""
+    best, best_quality = None, 0
+    for name in ENCODERS:
+        quality = accept_encodings.quality(name)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def compress(data, encoding):
+    """Komprimiert bytes vollständig."""
+    encoder = ENCODERS[encoding]()
+    return encoder.compress(data) + encoder.finish()
+
+
+def compress_stream(chunks, encoding):
+    """Komprimiert einen Generator von Stücken (str oder bytes), ohne ihn zu sammeln."""
+    encoder = ENCODERS[encoding]()
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        compressed = encoder.compress(chunk)
+        if compressed:
+            yield compressed
+    yield encoder.finish()
+
+
+class CompressedCache:
+    """LRU für komprimierte Bodies, Schlüssel (ETag, Kodierung)."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compress(self, etag, encoding, data):
+        key = (etag, encoding)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                return body
+        body = compress(data, encoding)
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = body
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return body
+
+
+compressed = CompressedCache(CACHE_SIZE)
+
+
+def _compress_response(response):
+    if (
+        request.method == "HEAD"
+        or response.status_code in (204, 304)
+        or response.status_code < 200
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    etag, weak = response.get_etag()
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < MIN_BYTES:
+            return response
+        if etag and not weak:
+            response.set_data(compressed.get_or_compress(etag, encoding, data))
+        else:
+            response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    """Registriert die Komprimierung als after_request-Hook."""
+    app.after_request(_compress_response)
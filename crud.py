@@ -0,0 +1,189 @@
+"""
+Gemeinsame CRUD- und Listen-Endpunkte für Topics und Skills.
+- app.py (Postgres) und edge_app.py (Dateispeicher) registrieren ihre Routen selbst
+  und rufen hier mit ihrem Repository (siehe repository.py) auf; Request-Parameter,
+  Validierung, Antwortformate und Fehlertexte sind so für beide Apps dieselben
+- Listen liefern {"data": [...], "meta": {...}}; Seiten über stream_min_limit Zeilen
+  werden gestreamt (das data-Array stapelweise, meta am Ende), mit derselben Ausgabe
+  wie im Speicher gebaute Seiten
+- Repository-Fehler werden über init_app als {"error": ...} mit ihrem Status beantwortet
+"""
+from flask import Response, jsonify, request
+
+import serializers
+from pagination import MAX_LIMIT, PaginationError, parse_page_args
+from repository import InvalidError, RepositoryError
+from serializers import FieldsError, json_response, parse_fields, parse_include
+
+
+def init_app(app):
+    """Registriert die Fehlerantworten für Repository-Fehler."""
+    app.register_error_handler(RepositoryError, lambda e: (jsonify({"error": str(e)}), e.status))
+
+
+def page_meta(page, total, exact, next_cursor):
+    """
+    Baut das meta-Objekt der Listen-Endpunkte.
+    Im Offset-Modus bleiben total/limit/offset für bestehende Clients erhalten,
+    im Cursor-Modus (?cursor=) wird stattdessen der übergebene Cursor zurückgegeben.
+    """
+    meta = {"total": total, "totalExact": exact, "limit": page["limit"], "nextCursor": next_cursor}
+    if page["cursor"] is None:
+        meta["offset"] = page["offset"]
+    else:
+        meta["cursor"] = page["cursor"]
+    return meta
+
+
+def list_response(result, page, stream):
+    """
+    Antwort {"data": [...], "meta": {...}} für eine ListPage. Mit stream=True wird das
+    data-Array stapelweise geschrieben und meta (mit nextCursor) am Ende.
+    """
+    if not stream:
+        records = [record for batch in result.batches for record in batch]
+        result.close()
+        return json_response({"data": records, "meta": page_meta(page, result.total, result.exact, result.next_cursor)})
+
+    def generate():
+        yield b'{"data":['
+        separator = b""
+        for batch in result.batches:
+            yield separator + b",".join(serializers.dumps(record) for record in batch)
+            separator = b","
+        yield b'],"meta":' + serializers.dumps(page_meta(page, result.total, result.exact, result.next_cursor)) + b"}"
+
+    response = Response(generate(), mimetype="application/json")
+    # Auch wenn die Antwort nie gesendet wird (z.B. Client getrennt)
+    response.call_on_close(result.close)
+    return response
+
+
+def list_items(list_page, available, include=(), max_limit=MAX_LIMIT, stream_min_limit=None, **filters):
+    """
+    Gemeinsamer Ablauf der Listen-Endpunkte: Parameter lesen, Seite laden, Antwort bauen.
+
+    Args:
+        list_page (callable): repository.list_topics bzw. list_skills.
+        available (list): Felder für ?fields= (serializers.TOPIC_FIELDS bzw. SKILL_FIELDS).
+        include (list): Erlaubte Werte für ?include= (als Schlüsselwort an list_page).
+        max_limit (int): Obergrenze für ?limit=.
+        stream_min_limit (int): Seiten mit mehr Zeilen werden gestreamt (None: nie).
+        filters: Weitere Argumente für list_page (z.B. parent_id).
+    """
+    try:
+        page = parse_page_args(request.args, max_limit)
+        fields = [name for name, _ in parse_fields(request.args.get("fields"), available)]
+        included = parse_include(request.args.get("include"), include) if include else set()
+        stream = stream_min_limit is not None and page["limit"] > stream_min_limit
+        result = list_page(
+            page, fields, q=request.args.get("q"), stream=stream,
+            **filters, **{name: name in included for name in include}
+        )
+    except (PaginationError, FieldsError) as e:
+        return jsonify({"error": str(e)}), 422
+    return list_response(result, page, stream)
+
+
+def parse_bool(value):
+    """Interpretiert Query-Parameter wie ?recursive=true als Wahrheitswert."""
+    return (value or "").lower() in ("1", "true", "yes")
+
+
+# --- Topics ---
+
+
+def list_topics(repository, **options):
+    """
+    GET /topics: sortiert nach (name, id), bei ?q= zuerst nach Relevanz. Paginierung
+    über offset (Standard) oder den opaken ?cursor=/nextCursor, ?count=, ?fields=,
+    ?parentId= und ?include=counts (skillCount, childCount). options siehe list_items.
+    """
+    return list_items(
+        repository.list_topics, serializers.TOPIC_FIELDS, include=["counts"],
+        parent_id=request.args.get("parentId"), **options
+    )
+
+
+def get_topic(repository, topic_id):
+    try:
+        include = parse_include(request.args.get("include"), ["counts"])
+    except FieldsError as e:
+        return jsonify({"error": str(e)}), 422
+    return json_response(repository.get_topic(topic_id, counts="counts" in include))
+
+
+def create_topic(repository):
+    payload = request.get_json(silent=True) or {}
+    name = (payload.get("name") or "").strip()
+    if not name:
+        raise InvalidError("Field 'name' is required.")
+    topic = repository.create_topic(name, payload.get("description"), payload.get("parentTopicID") or None)
+    return json_response(topic, 201)
+
+
+def update_topic(repository, topic_id):
+    payload = request.get_json(silent=True) or {}
+    values = {}
+    name = (payload.get("name") or "").strip()
+    if name:
+        values["name"] = name
+    if "description" in payload:
+        values["description"] = payload["description"]
+    if "parentTopicID" in payload:
+        values["parentTopicID"] = payload["parentTopicID"] or None
+    return json_response(repository.update_topic(topic_id, values))
+
+
+def delete_topic(repository, topic_id):
+    repository.delete_topic(topic_id)
+    return "", 204
+
+
+# --- Skills ---
+
+
+def list_skills(repository, **options):
+    """
+    GET /skills: wie list_topics, gefiltert über ?topicId=; mit &recursive=true auch
+    die Skills aller Unter-Topics.
+    """
+    return list_items(
+        repository.list_skills, serializers.SKILL_FIELDS,
+        topic_id=request.args.get("topicId"), recursive=parse_bool(request.args.get("recursive")), **options
+    )
+
+
+def get_skill(repository, skill_id):
+    return json_response(repository.get_skill(skill_id))
+
+
+def create_skill(repository):
+    payload = request.get_json(silent=True) or {}
+    name = (payload.get("name") or "").strip()
+    topic_id = payload.get("topicID") or payload.get("topicId")
+    difficulty = (payload.get("difficulty") or "beginner").strip()
+    if not name:
+        raise InvalidError("Field 'name' is required")
+    if not topic_id:
+        raise InvalidError("Field 'topicID' is required")
+    return json_response(repository.create_skill(name, topic_id, difficulty), 201)
+
+
+def update_skill(repository, skill_id):
+    payload = request.get_json(silent=True) or {}
+    values = {}
+    name = (payload.get("name") or "").strip()
+    if name:
+        values["name"] = name
+    if "topicID" in payload or "topicId" in payload:
+        values["topicID"] = payload.get("topicID", payload.get("topicId")) or None
+    difficulty = (payload.get("difficulty") or "").strip()
+    if difficulty:
+        values["difficulty"] = difficulty
+    return json_response(repository.update_skill(skill_id, values))
+
+
+def delete_skill(repository, skill_id):
+    repository.delete_skill(skill_id)
+    return "", 204
@@ -0,0 +1,232 @@
+# data/bulk_load.py
+"""
+Bulk-Import für Topics & Skills.
+- Liest JSON-Arrays (data/topics.json, data/skills.json) oder NDJSON beliebiger Größe
+  streamend ein, ohne die Datei komplett in den Speicher zu laden
+- Legacy-IDs wie "t1" oder "s8" werden deterministisch (uuid5) auf UUIDs abgebildet;
+  Verweise (parentTopicId, topicId, prerequisites) lassen sich so ohne Lookup auflösen
+- Schreibt batchweise per COPY in temporäre Staging-Tabellen und von dort per
+  INSERT .. ON CONFLICT (Upsert): ein Commit pro Batch statt pro Zeile
+- Idempotent: erneutes Laden derselben Dateien aktualisiert die Einträge nur
+
+Aufruf:
+    python data/bulk_load.py --topics data/topics.json --skills data/skills.json
+    python data/bulk_load.py --topics topics.ndjson --skills skills.ndjson --batch-size 100000
+    python data/bulk_load.py --synthetic-topics 1000000 --synthetic-skills 10000000
+"""
+import argparse
+import io
+import itertools
+import sys
+import time
+from pathlib import Path
+# Pfad so erweitern, dass 'app.py' und 'models.py' aus dem Projektwurzelordner importierbar sind
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+from app import app
+from cache import versions
+from models import db
+from prerequisites import PREREQUISITE_LOCK_KEY, has_cycle
+from data.generate import synthetic_skills, synthetic_topics
+from data_manager import iter_records, legacy_uuid
+
+BATCH_SIZE = 50000
+
+
+def copy_value(value):
+    """Formatiert einen Wert für COPY im Textformat."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_rows(cursor, table, columns, rows):
+    """Schreibt rows per COPY FROM STDIN in eine (Staging-)Tabelle."""
+    data = io.StringIO("".join("\t".join(map(copy_value, row)) + "\n" for row in rows))
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", data)
+
+
+def batches(records, size):
+    """Teilt einen Iterator in Listen mit höchstens size Einträgen."""
+    records = iter(records)
+    while batch := list(itertools.islice(records, size)):
+        yield batch
+
+
+def load_topics(connection, records, batch_size=BATCH_SIZE):
+    """
+    Lädt Topics in drei Phasen:
+    1. Upsert von id/name/description je Batch (Eltern-Topics müssen noch nicht existieren)
+    2. Setzen aller parent_topic_id mit einem UPDATE .. FROM aus der Staging-Tabelle
+       samt Zyklusprüfung über die gesamte Hierarchie
+    3. Einfügen der Voraussetzungen samt Zyklusprüfung über den gesamten Graphen
+
+    Returns:
+        dict: Anzahl geladener Topics, übersprungener Eltern-Verweise und Voraussetzungen.
+    """
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TEMP TABLE stage_topics (id uuid, name text, description text);
+        CREATE TEMP TABLE stage_topic_parents (id uuid, parent_topic_id uuid);
+        CREATE TEMP TABLE stage_topic_prerequisites (topic_id uuid, prerequisite_id uuid);
+    """)
+    connection.commit()
+
+    loaded = 0
+    for batch in batches(records, batch_size):
+        topics, parents, edges = [], [], []
+        for record in batch:
+            topic_id = legacy_uuid("topic", record["id"])
+            topics.append((topic_id, record["name"], record.get("description")))
+            parent = record.get("parentTopicId", record.get("parentTopicID"))
+            parents.append((topic_id, legacy_uuid("topic", parent)))
+            edges.extend((topic_id, legacy_uuid("topic", p)) for p in record.get("prerequisites") or [])
+
+        cursor.execute("TRUNCATE stage_topics")
+        copy_rows(cursor, "stage_topics", ("id", "name", "description"), topics)
+        copy_rows(cursor, "stage_topic_parents", ("id", "parent_topic_id"), parents)
+        copy_rows(cursor, "stage_topic_prerequisites", ("topic_id", "prerequisite_id"), edges)
+        cursor.execute("""
+            INSERT INTO topics (id, name, description)
+            SELECT DISTINCT ON (id) id, name, description FROM stage_topics ORDER BY id
+            ON CONFLICT (id) DO UPDATE
+            SET name = EXCLUDED.name, description = EXCLUDED.description
+        """)
+        connection.commit()
+        loaded += len(batch)
+        print(f"  Topics: {loaded}")
+
+    # Eltern-Verweise erst jetzt setzen: alle Topics der Datei existieren bereits
+    cursor.execute("""
+        UPDATE topics t SET parent_topic_id = p.parent_topic_id
+        FROM stage_topic_parents p
+        WHERE t.id = p.id
+          AND t.parent_topic_id IS DISTINCT FROM p.parent_topic_id
+          AND (p.parent_topic_id IS NULL OR EXISTS (SELECT 1 FROM topics x WHERE x.id = p.parent_topic_id))
+    """)
+    cursor.execute("""
+        SELECT count(*) FROM stage_topic_parents p
+        WHERE p.parent_topic_id IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM topics x WHERE x.id = p.parent_topic_id)
+    """)
+    missing_parents = cursor.fetchone()[0]
+    # Wie POST /topics/<id>/move: kein Topic darf (auch über mehrere Ebenen) sein eigener Vorfahre sein
+    cursor.execute("SELECT id, parent_topic_id FROM topics WHERE parent_topic_id IS NOT NULL")
+    if has_cycle({topic_id: [parent_id] for topic_id, parent_id in cursor}):
+        connection.rollback()
+        raise RuntimeError("Die Eltern-Verweise enthalten einen Zyklus; Hierarchie und Voraussetzungen wurden nicht übernommen.")
+
+    # Dieselbe Sperre wie POST /topics/<id>/prerequisites, damit parallel kein Zyklus entsteht
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (PREREQUISITE_LOCK_KEY,))
+    cursor.execute("""
+        INSERT INTO topic_prerequisites (topic_id, prerequisite_id)
+        SELECT DISTINCT p.topic_id, p.prerequisite_id
+        FROM stage_topic_prerequisites p
+        JOIN topics a ON a.id = p.topic_id
+        JOIN topics b ON b.id = p.prerequisite_id
+        WHERE p.topic_id <> p.prerequisite_id
+        ON CONFLICT DO NOTHING
+    """)
+    cursor.execute("SELECT topic_id, prerequisite_id FROM topic_prerequisites")
+    graph = {}
+    for topic_id, prerequisite_id in cursor:
+        graph.setdefault(topic_id, []).append(prerequisite_id)
+    if has_cycle(graph):
+        connection.rollback()
+        raise RuntimeError("Die Voraussetzungen enthalten einen Zyklus; Hierarchie und Voraussetzungen wurden nicht übernommen.")
+    cursor.execute("SELECT count(*) FROM stage_topic_prerequisites")
+    edge_count = cursor.fetchone()[0]
+
+    cursor.execute("DROP TABLE stage_topics, stage_topic_parents, stage_topic_prerequisites")
+    connection.commit()
+    return {"topics": loaded, "missing_parents": missing_parents, "prerequisites": edge_count}
+
+
+def load_skills(connection, records, batch_size=BATCH_SIZE):
+    """
+    Lädt Skills per Upsert. Skills, deren Topic nicht existiert, werden übersprungen.
+
+    Returns:
+        dict: Anzahl geladener und übersprungener Skills.
+    """
+    cursor = connection.cursor()
+    cursor.execute("CREATE TEMP TABLE stage_skills (id uuid, name text, topic_id uuid, difficulty text)")
+    connection.commit()
+
+    loaded = skipped = 0
+    for batch in batches(records, batch_size):
+        rows = [
+            (
+                legacy_uuid("skill", record["id"]),
+                record["name"],
+                legacy_uuid("topic", record.get("topicId", record.get("topicID"))),
+                record.get("difficulty") or "beginner",
+            )
+            for record in batch
+        ]
+        cursor.execute("TRUNCATE stage_skills")
+        copy_rows(cursor, "stage_skills", ("id", "name", "topic_id", "difficulty"), rows)
+        cursor.execute("""
+            INSERT INTO skills (id, name, topic_id, difficulty)
+            SELECT DISTINCT ON (s.id) s.id, s.name, s.topic_id, s.difficulty
+            FROM stage_skills s JOIN topics t ON t.id = s.topic_id
+            ORDER BY s.id
+            ON CONFLICT (id) DO UPDATE
+            SET name = EXCLUDED.name, topic_id = EXCLUDED.topic_id, difficulty = EXCLUDED.difficulty
+        """)
+        connection.commit()
+        loaded += cursor.rowcount
+        skipped += len(batch) - cursor.rowcount
+        print(f"  Skills: {loaded}")
+
+    cursor.execute("DROP TABLE stage_skills")
+    connection.commit()
+    return {"skills": loaded, "skipped": skipped}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-Import von Topics & Skills (JSON/NDJSON).")
+    parser.add_argument("--topics", help="JSON-Array oder NDJSON mit Topics")
+    parser.add_argument("--skills", help="JSON-Array oder NDJSON mit Skills")
+    parser.add_argument("--synthetic-topics", type=int, default=0, help="Anzahl synthetischer Topics")
+    parser.add_argument("--synthetic-skills", type=int, default=0, help="Anzahl synthetischer Skills")
+    parser.add_argument("--seed", type=int, default=42, help="Seed für synthetische Daten")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+    if args.synthetic_skills and not args.synthetic_topics:
+        parser.error("--synthetic-skills benötigt --synthetic-topics (Skills verweisen auf synthetische Topics)")
+
+    with app.app_context():
+        connection = db.engine.raw_connection()
+        try:
+            started = time.perf_counter()
+            if args.topics:
+                print(f"Lade Topics aus {args.topics}...")
+                print(" ", load_topics(connection, iter_records(args.topics), args.batch_size))
+            if args.synthetic_topics:
+                print(f"Lade {args.synthetic_topics} synthetische Topics...")
+                print(" ", load_topics(connection, synthetic_topics(args.synthetic_topics, args.seed), args.batch_size))
+            if args.skills:
+                print(f"Lade Skills aus {args.skills}...")
+                print(" ", load_skills(connection, iter_records(args.skills), args.batch_size))
+            if args.synthetic_skills:
+                print(f"Lade {args.synthetic_skills} synthetische Skills...")
+                records = synthetic_skills(args.synthetic_skills, args.synthetic_topics, args.seed)
+                print(" ", load_skills(connection, records, args.batch_size))
+            print(f"Fertig in {time.perf_counter() - started:.1f}s.")
+        finally:
+            connection.close()
+            # Laufende Worker auf demselben Host verwerfen ihre gecachten Antworten;
+            # "unlogged": ohne Änderungsprotokoll, der Suchindex wird neu aufgebaut
+            versions.bump("topics", "skills", "prerequisites", "unlogged")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# data/generate.py
+"""
+Generator für synthetische Topics & Skills (Lasttests).
+- Erzeugt Datensätze im Format von data/topics.json bzw. data/skills.json
+  (Legacy-IDs "syn-t1", "syn-s1", ...), die data/bulk_load.py direkt verarbeitet
+- Hierarchie und Voraussetzungen zeigen nur auf frühere Topics, sind also zyklenfrei
+- Deterministisch über --seed, sodass Lasttests reproduzierbar bleiben
+
+Aufruf (schreibt NDJSON):
+    python data/generate.py --topics 1000000 --skills 10000000 --out-dir /tmp/synthetic
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+
+SUBJECTS = [
+    "Web Development", "Datenbanken", "Machine Learning", "Data Analysis", "Cloud Computing",
+    "Security", "Frontend", "Backend", "DevOps", "Statistik", "Netzwerke", "Mobile Apps",
+    "Grundlagen für Webanwendungen", "Softwarearchitektur", "Testing", "Algorithmen",
+]
+LEVELS = ["Einführung", "Grundlagen", "Fortgeschritten", "Praxis", "Vertiefung", "Übungen"]
+TOOLS = [
+    "Python", "SQL", "JavaScript", "React", "Flask", "Docker", "Kubernetes", "Postgres",
+    "Pandas", "Git", "Linux", "TypeScript", "Java", "Spring", "HTML", "CSS",
+]
+ACTIONS = ["Basics", "Queries", "Routing", "Testing", "Deployment", "Modellierung", "Optimierung", "Debugging"]
+DIFFICULTIES = ["beginner", "intermediate", "advanced"]
+
+
+def synthetic_topics(count, seed=42):
+    """
+    Liefert count Topic-Datensätze. Etwa zwei Drittel haben ein Eltern-Topic,
+    ein Teil hat bis zu drei Voraussetzungen.
+    """
+    rnd = random.Random(seed)
+    for i in range(1, count + 1):
+        parent = f"syn-t{rnd.randint(1, i - 1)}" if i > 1 and rnd.random() < 0.66 else None
+        prerequisites = []
+        if i > 1 and rnd.random() < 0.3:
+            prerequisites = sorted({f"syn-t{rnd.randint(max(1, i - 1000), i - 1)}" for _ in range(rnd.randint(1, 3))})
+        subject = rnd.choice(SUBJECTS)
+        yield {
+            "id": f"syn-t{i}",
+            "name": f"{subject} {rnd.choice(LEVELS)} {i}",
+            "description": f"{rnd.choice(LEVELS)}: {subject} mit {rnd.choice(TOOLS)} und {rnd.choice(TOOLS)}.",
+            "prerequisites": prerequisites,
+            "parentTopicId": parent,
+        }
+
+
+def synthetic_skills(count, topic_count, seed=42):
+    """
+    Liefert count Skill-Datensätze, gleichmäßig zufällig auf topic_count Topics verteilt.
+    """
+    rnd = random.Random(seed + 1)
+    for i in range(1, count + 1):
+        yield {
+            "id": f"syn-s{i}",
+            "name": f"{rnd.choice(TOOLS)} {rnd.choice(ACTIONS)} {i}",
+            "topicId": f"syn-t{rnd.randint(1, topic_count)}",
+            "difficulty": rnd.choice(DIFFICULTIES),
+        }
+
+
+def write_ndjson(path, records):
+    """Schreibt Datensätze zeilenweise als NDJSON und gibt die Anzahl zurück."""
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            written += 1
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Erzeugt synthetische Topics & Skills als NDJSON.")
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--skills", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out-dir", default=".")
+    args = parser.parse_args()
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    n = write_ndjson(out_dir / "topics.ndjson", synthetic_topics(args.topics, args.seed))
+    print(f"{n} Topics -> {out_dir / 'topics.ndjson'}")
+    n = write_ndjson(out_dir / "skills.ndjson", synthetic_skills(args.skills, args.topics, args.seed))
+    print(f"{n} Skills -> {out_dir / 'skills.ndjson'}")
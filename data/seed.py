@@ -3,6 +3,7 @@
 Seed-Skript für Topics & Skills.
 - Läuft ohne create_app(): importiert direkt 'app' aus app.py
 - Idempotent: legt Einträge nur an, wenn sie noch nicht existieren
+- Ein SELECT pro Tabelle und ein gemeinsamer Commit statt eines Commits pro Zeile
 - Ausgabe zeigt erzeugte UUIDs zum manuellen Kopieren in Postman
 """
 import os
@@ -16,6 +17,7 @@ if str(BASE_DIR) not in sys.path:
 # 2) Jetzt sind 'app.py' und 'models.py' importierbar
 from app import app  # verwendet die bereits erstellte Flask-App (kein create_app nötig)
 from models import db, Topic, Skill
+from cache import mark_changed
 load_dotenv()  # optional: liest DATABASE_URL aus .env, falls gesetzt
 # 3) Beispiel-Daten
 TOPICS = [
@@ -36,27 +38,44 @@ SKILLS = [
     ("Joins & Aggregation", "Databases 101", "intermediate"),
     ("Explorative Analyse", "Data Analysis Basics", "beginner"),
 ]
-def get_or_create_topic(name: str, desc: str) -> Topic:
-    """Liefert Topic mit 'name' oder legt es neu an."""
-    t = Topic.query.filter(Topic.name == name).first()
-    if not t:
-        t = Topic(name=name, description=desc)
-        db.session.add(t)
-        db.session.commit()
-    return t
+def get_or_create_topics(topics) -> dict:
+    """
+    Liefert alle Topics aus 'topics' (Name, Beschreibung) als dict name -> Topic.
+    Fehlende Topics werden angelegt: ein SELECT für alle Namen statt einem pro Zeile,
+    geschrieben wird beim gemeinsamen Commit am Ende.
+    """
+    names = [name for name, _ in topics]
+    existing = {t.name: t for t in Topic.query.filter(Topic.name.in_(names)).all()}
+    for name, desc in topics:
+        if name not in existing:
+            existing[name] = Topic(name=name, description=desc)
+            db.session.add(existing[name])
+    db.session.flush()  # vergibt die IDs der neuen Topics
+    return existing
 
 
-def get_or_create_skill(name: str, topic: Topic, diff: str) -> Skill:
-    """Liefert Skill mit (name, topic_id) oder legt ihn neu an."""
-    s = Skill.query.filter(
-        Skill.name == name,
-        Skill.topic_id == topic.id
-    ).first()
-    if not s:
-        s = Skill(name=name, topic_id=topic.id, difficulty=diff)
-        db.session.add(s)
-        db.session.commit()
-    return s
+def get_or_create_skills(skills, topics_by_name: dict) -> list:
+    """
+    Liefert alle Skills aus 'skills' (Name, Topic-Name, Schwierigkeit) in derselben
+    Reihenfolge; fehlende (name, topic_id)-Kombinationen werden angelegt.
+    """
+    topic_ids = [t.id for t in topics_by_name.values()]
+    existing = {
+        (s.name, s.topic_id): s
+        for s in Skill.query.filter(Skill.topic_id.in_(topic_ids), Skill.name.in_([n for n, _, _ in skills])).all()
+    }
+    result = []
+    for name, topic_name, diff in skills:
+        topic = topics_by_name.get(topic_name)
+        if not topic:
+            raise RuntimeError(f"Topic '{topic_name}' wurde nicht gefunden. Reihenfolge im TOPICS-Array prüfen.")
+        key = (name, topic.id)
+        if key not in existing:
+            existing[key] = Skill(name=name, topic_id=topic.id, difficulty=diff)
+            db.session.add(existing[key])
+        result.append(existing[key])
+    db.session.flush()
+    return result
 
     
 if __name__ == "__main__":
@@ -70,16 +89,14 @@ if __name__ == "__main__":
         except Exception as e:
             print("Warnung: Konnte db.create_all() nicht ausführen:", e)
         print("Seeding topics...")
-        topics_by_name = {}
-        for n, d in TOPICS:
-            t = get_or_create_topic(n, d)
-            topics_by_name[n] = t
-            print(f"  - {n}: {t.id}")
+        topics_by_name = get_or_create_topics(TOPICS)
         print("Seeding skills...")
-        for name, topic_name, diff in SKILLS:
-            parent_topic = topics_by_name.get(topic_name)
-            if not parent_topic:
-                raise RuntimeError(f"Topic '{topic_name}' wurde nicht gefunden. Reihenfolge im TOPICS-Array prüfen.")
-            s = get_or_create_skill(name, parent_topic, diff)
+        skills = get_or_create_skills(SKILLS, topics_by_name)
+        mark_changed(db.session, "topics", "skills", "unlogged")
+        db.session.commit()  # ein Commit für alle neuen Einträge
+        for n, _ in TOPICS:
+            print(f"  - {n}: {topics_by_name[n].id}")
+        for (name, topic_name, diff), s in zip(SKILLS, skills):
             print(f"  - {name} ({topic_name}, {diff}): {s.id}")
-        print("\nFertig. Kopiere eine Topic-ID und eine Skill-ID für Postman-Tests.")
\ No newline at end of file
+        print("\nFertig. Kopiere eine Topic-ID und eine Skill-ID für Postman-Tests.")
+        print("Die Beispieldaten aus data/topics.json und data/skills.json lädt data/bulk_load.py.")
\ No newline at end of file
@@ -1,12 +1,134 @@
+"""
+Dateibasierte Speicherung ohne Postgres (Edge-/Lokalmodus, siehe edge_app.py).
+- JsonDataManager liest und schreibt einzelne JSON-Dateien. Geschrieben wird atomar
+  (temporäre Datei + os.replace), ungültiges JSON löst einen Fehler aus statt []
+- JournaledStore hält Topics und Skills im Speicher, mit Indizes nach id, nach
+  Eltern-Topic bzw. Topic und nach Namen (sortiert, für Paginierung und Präfixsuche)
+- Schreibzugriffe werden als NDJSON an ein Journal angehängt (fsync pro Transaktion).
+  Nach STORE_COMPACT_EVERY Einträgen wird ein neuer Snapshot geschrieben und das
+  Journal geleert; der Snapshot wird beim Laden per mmap zeilenweise gelesen
+- Mehrere Worker-Prozesse können dieselben Dateien nutzen: Schreiben läuft unter einer
+  fcntl-Sperre auf dem Journal, vor jedem Zugriff werden neue Einträge anderer
+  Worker nachgeladen (zwei stat()-Aufrufe, solange sich nichts geändert hat)
+"""
+import fcntl
 import json
+import mmap
 import os
+import tempfile
+import threading
+import uuid
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from heapq import merge
+
+from pagination import decode_cursor, encode_cursor
+
+# Fester Namespace für uuid5: dieselbe Legacy-ID ergibt immer dieselbe UUID
+LEGACY_NAMESPACE = uuid.UUID("091054b4-22fc-40d5-ad75-e924b94bf372")
+READ_CHUNK = 1 << 20
+SEPARATORS = " \t\r\n,[]"
+
+# Nach so vielen Journal-Einträgen wird ein neuer Snapshot geschrieben
+COMPACT_EVERY = int(os.getenv("STORE_COMPACT_EVERY", 1000))
+# Entität -> Feld, nach dem gruppiert wird (Unter-Topics bzw. Skills eines Topics)
+GROUP_FIELDS = {"topics": "parentTopicID", "skills": "topicID"}
+# Obergrenze für Präfixe in der Schlüsselliste (größer als jedes Zeichen eines Namens)
+PREFIX_END = "\U0010ffff"
+
+
+class DataFileError(ValueError):
+    """
+    Eine Daten-, Snapshot- oder Journaldatei ist beschädigt. Wird ausgelöst statt
+    leere Daten zu liefern, die beim nächsten Schreiben den Bestand überschreiben würden.
+    """
+
+
+def legacy_uuid(kind, value):
+    """
+    Bildet eine Legacy-ID ("t1") deterministisch auf eine UUID ab.
+    Werte, die bereits UUIDs sind, bleiben unverändert.
+    """
+    if not value:
+        return None
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return str(uuid.uuid5(LEGACY_NAMESPACE, f"{kind}:{value}"))
+
+
+def iter_records(path):
+    """
+    Liest Datensätze streamend aus einer Datei, die entweder ein JSON-Array von
+    Objekten oder NDJSON (ein Objekt pro Zeile) enthält.
+
+    Args:
+        path (str): Pfad zur Datei.
+    Yields:
+        dict: Ein Datensatz nach dem anderen.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+        while True:
+            while pos < len(buf) and buf[pos] in SEPARATORS:
+                pos += 1
+            if pos == len(buf) or not eof and len(buf) - pos < READ_CHUNK // 2:
+                chunk = f.read(READ_CHUNK)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                if eof and not buf.strip(SEPARATORS):
+                    return
+                continue
+            try:
+                record, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Objekt reicht über das Ende des Puffers hinaus: weiterlesen
+                chunk = f.read(READ_CHUNK)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield record
+
+
+def atomic_write(filepath, write):
+    """
+    Schreibt eine Datei atomar: write(f) schreibt in eine temporäre Datei im selben
+    Verzeichnis, die nach fsync per os.replace die Zieldatei ersetzt. Leser sehen so
+    immer entweder den alten oder den vollständigen neuen Inhalt.
+
+    Args:
+        filepath (str): Zieldatei.
+        write (callable): Bekommt die geöffnete Textdatei und schreibt den Inhalt.
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    # Auch den Verzeichniseintrag dauerhaft machen
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
 
 class JsonDataManager:
     """
     Diese Klasse ist für das Lesen und Schreiben von JSON-Daten aus/in Dateien zuständig.
     Sie kapselt die Logik für den Dateizugriff, sodass andere Teile der Anwendung (wie app.py)
     sich nicht darum kümmern müssen, wie die Daten gespeichert oder geladen werden.
-    Sie beinhaltet robuste Fehlerbehandlung für fehlende oder ungültige Dateien.
+    Eine fehlende Datei ergibt leere Daten, eine beschädigte Datei einen DataFileError.
     """
 
     def __init__(self):
@@ -19,48 +141,370 @@ class JsonDataManager:
     def read_data(self, filepath):
         """
         Liest Daten aus einer JSON-Datei.
-        Behandelt FileNotFoundError und json.JSONDecodeError robust.
 
         Args:
             filepath (str): Der vollständige Pfad zur JSON-Datei.
         Returns:
             list or dict: Die aus der Datei gelesenen Daten (Liste oder Dictionary).
-                          Gibt eine leere Liste bei Fehlern oder fehlender Datei zurück.
+                          Gibt eine leere Liste zurück, wenn die Datei nicht existiert.
+        Raises:
+            DataFileError: Wenn die Datei kein gültiges JSON enthält.
         """
         if not os.path.exists(filepath):
             print(f"INFO: Datei nicht gefunden: {filepath}. Gebe leere Liste zurück.")
             return [] # Leere Liste zurückgeben, wenn die Datei nicht existiert
 
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            try:
                 return json.load(f)
-        except json.JSONDecodeError:
-            # Dieser Fehler tritt auf, wenn der Inhalt der Datei kein gültiges JSON ist.
-            print(f"FEHLER: Ungültiges JSON in Datei: {filepath}. Gebe leere Liste zurück.")
-            return []
-        except Exception as e:
-            # Fängt alle anderen unerwarteten Fehler beim Dateizugriff ab.
-            print(f"FEHLER: Ein unerwarteter Fehler ist aufgetreten beim Lesen von {filepath}: {e}. Gebe leere Liste zurück.")
-            return []
+            except json.JSONDecodeError as e:
+                # Kein stilles [] mehr: der nächste write_data() würde sonst alle Daten löschen
+                raise DataFileError(f"invalid JSON in {filepath}: {e}") from e
 
     def write_data(self, filepath, data):
         """
-        Schreibt Daten in eine JSON-Datei.
+        Schreibt Daten atomar in eine JSON-Datei (siehe atomic_write).
         Stellt sicher, dass das Zielverzeichnis existiert.
 
         Args:
             filepath (str): Der vollständige Pfad zur JSON-Datei.
             data (list or dict): Die Daten, die in die Datei geschrieben werden sollen.
         """
-        # Sicherstellen, dass das Verzeichnis existiert, bevor geschrieben wird
-        # exist_ok=True verhindert einen Fehler, wenn das Verzeichnis bereits existiert.
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        # indent=4 macht die JSON-Ausgabe besser lesbar.
+        # ensure_ascii=False stellt sicher, dass Nicht-ASCII-Zeichen (z.B. Umlaute) korrekt geschrieben werden.
+        atomic_write(filepath, lambda f: json.dump(data, f, indent=4, ensure_ascii=False))
+
+    def write_lines(self, filepath, records):
+        """
+        Schreibt Datensätze atomar als NDJSON (ein kompaktes JSON-Objekt pro Zeile).
+
+        Args:
+            filepath (str): Der vollständige Pfad zur Datei.
+            records (iterable): Die Datensätze (dicts).
+        """
+        def write(f):
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+        atomic_write(filepath, write)
+
+
+class JournaledStore:
+    """
+    Topics und Skills im Speicher, persistiert als Snapshot plus Journal in einem
+    Verzeichnis. Datensätze haben das Format von to_dict() (createdAt als HTTP-Datum)
+    und dürfen vom Aufrufer nicht verändert werden.
+
+    Indizes pro Entität:
+    - by_id: id -> Datensatz
+    - names: sortierte Liste (name, id), Reihenfolge der Listen-Endpunkte
+    - groups: Eltern-Topic bzw. Topic -> sortierte Liste (name, id)
+    - prefixes: sortierte Liste (casefold(name), name, id) für die Präfixsuche
+    """
+
+    def __init__(self, directory, compact_every=COMPACT_EVERY, manager=None):
+        """
+        Args:
+            directory (str): Verzeichnis für snapshot.ndjson und journal.ndjson.
+            compact_every (int): Journal-Einträge bis zum nächsten Snapshot.
+            manager (JsonDataManager): Zum atomaren Schreiben des Snapshots.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.snapshot_path = os.path.join(directory, "snapshot.ndjson")
+        self.journal_path = os.path.join(directory, "journal.ndjson")
+        self.compact_every = compact_every
+        self.manager = manager or JsonDataManager()
+        self._lock = threading.RLock()
+        self._journal = os.open(self.journal_path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o600)
+        with self._file_lock(fcntl.LOCK_SH):
+            self._load()
+
+    # --- Laden und Nachladen ---
+
+    @contextmanager
+    def _file_lock(self, mode):
+        fcntl.lockf(self._journal, mode)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self._journal, fcntl.LOCK_UN)
+
+    def _snapshot_id(self):
+        try:
+            st = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return None
+        return st.st_dev, st.st_ino
+
+    def _load(self):
+        """Liest Snapshot und Journal vollständig neu ein und baut die Indizes auf."""
+        self.by_id = {entity: {} for entity in GROUP_FIELDS}
+        self.seq = 0
+        self._snapshot = self._snapshot_id()
+        if self._snapshot is not None:
+            with open(self.snapshot_path, "rb") as f:
+                if os.fstat(f.fileno()).st_size:
+                    # mmap statt read(): die Zeilen werden direkt aus dem Page Cache
+                    # geparst, ohne den ganzen Snapshot als String zu kopieren
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as snapshot:
+                        self._read_snapshot(snapshot)
+        self._build_indexes()
+        self._offset = 0
+        self._journal_entries = 0
+        self._replay()
+
+    def _read_snapshot(self, snapshot):
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                # json.dump schreibt die Python-Daten als JSON-Text in die Datei.
-                # indent=4 macht die JSON-Ausgabe besser lesbar.
-                # ensure_ascii=False stellt sicher, dass Nicht-ASCII-Zeichen (z.B. Umlaute) korrekt geschrieben werden.
-                json.dump(data, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"FEHLER: Ein unerwarteter Fehler ist aufgetreten beim Schreiben von {filepath}: {e}")
+            self.seq = json.loads(snapshot.readline())["seq"]
+            for line in iter(snapshot.readline, b""):
+                record = json.loads(line)
+                self.by_id[record["entity"]][record["data"]["id"]] = record["data"]
+        except (ValueError, KeyError) as e:
+            raise DataFileError(f"invalid snapshot {self.snapshot_path}: {e}") from e
+
+    def _build_indexes(self):
+        self.names, self.groups, self.prefixes = {}, {}, {}
+        for entity, records in self.by_id.items():
+            field = GROUP_FIELDS[entity]
+            self.names[entity] = sorted((r["name"], r["id"]) for r in records.values())
+            self.prefixes[entity] = sorted((r["name"].casefold(), r["name"], r["id"]) for r in records.values())
+            groups = self.groups[entity] = {}
+            for r in records.values():
+                groups.setdefault(r[field], []).append((r["name"], r["id"]))
+            for keys in groups.values():
+                keys.sort()
+
+    def _replay(self):
+        """Wendet Journal-Einträge ab self._offset an (eigene und die anderer Worker)."""
+        size = os.fstat(self._journal).st_size
+        if size <= self._offset:
+            return
+        data = os.pread(self._journal, size - self._offset, self._offset)
+        # Eine unvollständige letzte Zeile (Absturz beim Schreiben) wird ignoriert und
+        # beim nächsten Schreibzugriff abgeschnitten
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                raise DataFileError(f"invalid journal entry in {self.journal_path}: {e}") from e
+            # Einträge, die schon im Snapshot stecken (Absturz während der Kompaktierung)
+            if entry["seq"] > self.seq:
+                self._apply(entry)
+                self.seq = entry["seq"]
+            self._journal_entries += 1
+        self._offset += end
+
+    def refresh(self):
+        """
+        Lädt Änderungen anderer Prozesse nach: neuer Snapshot (Kompaktierung) führt zu
+        einem vollständigen Neuladen, ein gewachsenes Journal zum Nachspielen der neuen Einträge.
+        """
+        with self._lock:
+            if self._snapshot_id() == self._snapshot and os.fstat(self._journal).st_size == self._offset:
+                return
+            with self._file_lock(fcntl.LOCK_SH):
+                self._refresh_locked()
+
+    def _refresh_locked(self):
+        """
+        Wie refresh(), aber der Aufrufer hält die Sperre auf dem Journal schon. fcntl-Sperren
+        gehören dem Prozess: eine verschachtelte LOCK_SH/LOCK_UN würde eine LOCK_EX von
+        transaction() herabstufen und dann ganz aufheben.
+        """
+        size = os.fstat(self._journal).st_size
+        if self._snapshot_id() != self._snapshot or size < self._offset:
+            self._load()
+        elif size > self._offset:
+            self._replay()
+
+    # --- Indizes pflegen ---
+
+    def _apply(self, entry):
+        entity = entry["entity"]
+        if entry["op"] == "put":
+            self._remove(entity, entry["data"]["id"])
+            self._insert(entity, entry["data"])
+        else:
+            self._remove(entity, entry["id"])
+
+    def _insert(self, entity, record):
+        self.by_id[entity][record["id"]] = record
+        key = (record["name"], record["id"])
+        insort(self.names[entity], key)
+        insort(self.groups[entity].setdefault(record[GROUP_FIELDS[entity]], []), key)
+        insort(self.prefixes[entity], (record["name"].casefold(),) + key)
+
+    def _remove(self, entity, record_id):
+        record = self.by_id[entity].pop(record_id, None)
+        if record is None:
+            return
+        key = (record["name"], record["id"])
+        group = record[GROUP_FIELDS[entity]]
+        _discard(self.names[entity], key)
+        _discard(self.groups[entity][group], key)
+        if not self.groups[entity][group]:
+            del self.groups[entity][group]
+        _discard(self.prefixes[entity], (record["name"].casefold(),) + key)
+
+    # --- Lesen ---
+
+    def get(self, entity, record_id):
+        """Datensatz mit der id oder None."""
+        with self._lock:
+            self.refresh()
+            return self.by_id[entity].get(record_id)
+
+    def group_ids(self, entity, group_id):
+        """ids der Datensätze einer Gruppe, z.B. der Unter-Topics eines Topics."""
+        with self._lock:
+            self.refresh()
+            return [record_id for _, record_id in self.groups[entity].get(group_id, ())]
+
+    def group_sizes(self, entity, group_ids):
+        """Anzahl Datensätze je Gruppe, z.B. Skills je Topic (Liste in der Reihenfolge von group_ids)."""
+        with self._lock:
+            self.refresh()
+            return [len(self.groups[entity].get(group_id, ())) for group_id in group_ids]
+
+    def subtree_ids(self, entity, root_id):
+        """root_id und die ids aller Datensätze darunter, z.B. ein Teilbaum von Topics."""
+        with self._lock:
+            self.refresh()
+            ids, pending = {root_id}, [root_id]
+            while pending:
+                for _, record_id in self.groups[entity].get(pending.pop(), ()):
+                    if record_id not in ids:
+                        ids.add(record_id)
+                        pending.append(record_id)
+            return ids
+
+    def page(self, entity, page, groups=None, prefix=None):
+        """
+        Eine Seite sortiert nach (name, id), mit Präfix nach (casefold(name), name, id).
+        Paginierung wie bei den Postgres-Endpunkten über offset oder den opaken Cursor;
+        dank der sortierten Listen per bisect, ohne die Datensätze davor anzusehen.
+
+        Args:
+            entity (str): 'topics' oder 'skills'.
+            page (dict): Ergebnis von pagination.parse_page_args.
+            groups (set): Nur Datensätze dieser Gruppen (parentId bzw. topicId).
+            prefix (str): Nur Namen, die (ohne Groß-/Kleinschreibung) so beginnen.
+        Returns:
+            tuple: (Datensätze, nextCursor oder None, Anzahl Treffer)
+        Raises:
+            PaginationError: Wenn der Cursor ungültig ist.
+        """
+        with self._lock:
+            self.refresh()
+            if prefix:
+                prefix = prefix.casefold()
+                keys = self.prefixes[entity]
+                if groups is not None:
+                    field = GROUP_FIELDS[entity]
+                    keys = [k for k in keys if self.by_id[entity][k[2]][field] in groups]
+                lo = bisect_left(keys, (prefix,))
+                hi = bisect_left(keys, (prefix + PREFIX_END,), lo)
+            else:
+                if groups is None:
+                    keys = self.names[entity]
+                elif len(groups) == 1:
+                    keys = self.groups[entity].get(next(iter(groups)), [])
+                else:
+                    # Die Gruppen sind schon sortiert: zusammenführen statt neu sortieren
+                    keys = list(merge(*(self.groups[entity].get(group, ()) for group in groups)))
+                lo, hi = 0, len(keys)
+
+            start = lo
+            if page["cursor"]:
+                size = 3 if prefix else 2
+                after = tuple(decode_cursor(page["cursor"], size, [str] * size))
+                start = bisect_right(keys, after, lo, hi)
+            elif page["cursor"] is None:
+                start = min(lo + page["offset"], hi)
+
+            end = min(start + page["limit"], hi)
+            records = [self.by_id[entity][key[-1]] for key in keys[start:end]]
+            next_cursor = encode_cursor(list(keys[end - 1])) if end < hi else None
+            return records, next_cursor, hi - lo
+
+    # --- Schreiben ---
+
+    @contextmanager
+    def transaction(self):
+        """
+        Schreibtransaktion: sperrt das Journal prozessübergreifend, lädt den aktuellen
+        Stand nach und liefert ein Transaction-Objekt. Die dort gesammelten Änderungen
+        werden am Ende mit einem write() + fsync ins Journal geschrieben und erst danach
+        im Speicher angewendet; bei einer Exception wird nichts geschrieben.
+        """
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._refresh_locked()
+            # Unvollständige letzte Zeile nach einem Absturz abschneiden
+            if os.fstat(self._journal).st_size != self._offset:
+                os.ftruncate(self._journal, self._offset)
+            tx = Transaction(self)
+            yield tx
+            if tx.entries:
+                self._commit(tx.entries)
+
+    def _commit(self, entries):
+        lines = []
+        for entry in entries:
+            self.seq += 1
+            entry["seq"] = self.seq
+            lines.append(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        data = "".join(lines).encode("utf-8")
+        os.write(self._journal, data)
+        os.fsync(self._journal)
+        for entry in entries:
+            self._apply(entry)
+        self._offset += len(data)
+        self._journal_entries += len(entries)
+        if self._journal_entries >= self.compact_every:
+            self._compact()
+
+    def compact(self):
+        """Schreibt sofort einen neuen Snapshot und leert das Journal."""
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._refresh_locked()
+            self._compact()
+
+    def _compact(self):
+        # Erst den Snapshot ersetzen, dann das Journal leeren: stürzt der Prozess
+        # dazwischen ab, überspringt das Nachspielen alle Einträge bis self.seq
+        def records():
+            yield {"seq": self.seq}
+            for entity, by_id in self.by_id.items():
+                for record in by_id.values():
+                    yield {"entity": entity, "data": record}
+        self.manager.write_lines(self.snapshot_path, records())
+        os.ftruncate(self._journal, 0)
+        self._snapshot = self._snapshot_id()
+        self._offset = 0
+        self._journal_entries = 0
+
+
+class Transaction:
+    """
+    Änderungen einer Schreibtransaktion des JournaledStore. Lesen über den Store
+    liefert innerhalb der Transaktion noch den Stand vor den Änderungen.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.entries = []
+
+    def put(self, entity, record):
+        """Legt einen Datensatz an oder ersetzt ihn (gleiche id)."""
+        self.entries.append({"op": "put", "entity": entity, "data": record})
+
+    def delete(self, entity, record_id):
+        """Entfernt einen Datensatz."""
+        self.entries.append({"op": "delete", "entity": entity, "id": record_id})
+
 
+def _discard(keys, key):
+    i = bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
@@ -0,0 +1,82 @@
+"""
+Konfiguration des Verbindungspools und Lebenszyklus der Engines unter Gunicorn.
+- Pool-Größe, Overflow, Timeout, Recycle und Pre-Ping kommen aus Umgebungsvariablen
+  (siehe ENV); die Werte gelten für den Primary und alle Replikate (SQLALCHEMY_BINDS)
+- Pre-Ping prüft eine Verbindung vor der Ausgabe und ersetzt sie, wenn der Server sie
+  z.B. nach einem Neustart von Postgres verworfen hat
+- DB_PGBOUNCER=true: Betrieb hinter PgBouncer im Transaction-Pooling. Die App hält dann
+  selbst keine Verbindungen (NullPool), gepoolt wird in PgBouncer. Die App nutzt keinen
+  Sitzungszustand über Transaktionen hinweg (nur pg_advisory_xact_lock, SET LOCAL) und
+  psycopg2 keine serverseitigen Prepared Statements
+- Beide Pool-Klassen messen die Wartezeit (metrics.py) und werfen bei dauerhaft
+  gestautem Pool Requests mit 503 ab (shedding.py)
+- dispose_engines() gehört in den post_fork-Hook von Gunicorn (gunicorn.conf.py): Ein
+  Worker darf keine Verbindungen aus dem Master-Prozess weiterverwenden
+"""
+import os
+
+from metrics import TimedNullPool, TimedQueuePool
+from shedding import SheddingPoolMixin
+
+# Variable -> Standardwert
+ENV = {
+    "DB_POOL_SIZE": 5,
+    "DB_MAX_OVERFLOW": 10,
+    "DB_POOL_TIMEOUT": 30,
+    # Sekunden; -1 schaltet das Recycling ab
+    "DB_POOL_RECYCLE": 1800,
+    "DB_POOL_PRE_PING": "true",
+    "DB_CONNECT_TIMEOUT": 10,
+    "DB_PGBOUNCER": "false",
+}
+
+
+class QueuePool(SheddingPoolMixin, TimedQueuePool):
+    """Pool der App: misst die Wartezeit und wirft bei Überlast ab (siehe shedding.py)."""
+
+
+class NullPool(SheddingPoolMixin, TimedNullPool):
+    """Wie QueuePool, aber ohne eigene Verbindungen (DB_PGBOUNCER=true)."""
+
+
+def _setting(name, convert=int):
+    value = os.getenv(name, ENV[name])
+    if convert is bool:
+        return str(value).lower() in ("1", "true", "yes")
+    return convert(value)
+
+
+def engine_options():
+    """SQLALCHEMY_ENGINE_OPTIONS aus den Umgebungsvariablen."""
+    options = {"connect_args": {"connect_timeout": _setting("DB_CONNECT_TIMEOUT")}}
+    if _setting("DB_PGBOUNCER", bool):
+        # Jede Verbindung lebt nur für einen Checkout, ein Pre-Ping wäre ein Roundtrip mehr
+        options["poolclass"] = NullPool
+        return options
+    options.update(
+        poolclass=QueuePool,
+        pool_size=_setting("DB_POOL_SIZE"),
+        max_overflow=_setting("DB_MAX_OVERFLOW"),
+        pool_timeout=_setting("DB_POOL_TIMEOUT", float),
+        pool_recycle=_setting("DB_POOL_RECYCLE"),
+        pool_pre_ping=_setting("DB_POOL_PRE_PING", bool),
+    )
+    return options
+
+
+def pool_capacity():
+    """Höchstzahl gleichzeitiger Verbindungen pro Engine und Worker (None: unbegrenzt)."""
+    if _setting("DB_PGBOUNCER", bool):
+        return None
+    return _setting("DB_POOL_SIZE") + max(_setting("DB_MAX_OVERFLOW"), 0)
+
+
+def dispose_engines(app):
+    """
+    Verwirft nach dem Fork die vom Master geerbten Verbindungen, ohne sie zu schließen
+    (close=False): Die Sockets gehören weiter dem Master bzw. anderen Workern.
+    """
+    db = app.extensions["sqlalchemy"]
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,169 @@
+"""
+Variante des Services ohne Postgres (Edge-/Lokalmodus).
+- Daten liegen in STORE_DIR als Snapshot + Journal (siehe data_manager.JournaledStore)
+  und werden über repository.FileRepository gelesen und geschrieben; der Store wird
+  beim ersten Zugriff geöffnet, nicht schon beim Import
+- Topics und Skills: Listen (Paginierung, ?fields=, ?parentId=/?topicId=), Lesen,
+  Anlegen, Ändern und Löschen über dieselben Endpunkte wie app.py (crud.py);
+  ?q= ist hier eine Präfixsuche auf dem Namen
+
+Start:
+    flask --app edge_app run
+    gunicorn edge_app:app
+Import der Legacy-JSON-Dateien:
+    flask --app edge_app import-json --topics data/topics.json --skills data/skills.json
+"""
+import os
+import threading
+from datetime import datetime, timezone
+
+import click
+from flask import Flask
+from flask_cors import CORS
+from werkzeug.http import http_date
+
+import compression
+import crud
+from data_manager import JournaledStore, iter_records, legacy_uuid
+from repository import FileRepository
+
+STORE_DIR = os.getenv("STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "store"))
+
+app = Flask(__name__)
+CORS(app)
+compression.init_app(app)
+crud.init_app(app)
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def repository():
+    """FileRepository auf STORE_DIR, beim ersten Aufruf angelegt (einmal pro Prozess)."""
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            _repository = FileRepository(JournaledStore(STORE_DIR))
+    return _repository
+
+
+@app.route('/')
+def hello_world():
+    return 'Hello from Topic & Skill Service (edge mode)!'
+
+
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+
+# --- TOPIC ENDPUNKTE ---
+
+
+@app.route('/topics', methods=['GET'])
+def list_topics():
+    return crud.list_topics(repository())
+
+
+@app.route('/topics/<id>', methods=['GET'])
+def get_topic_by_id(id):
+    return crud.get_topic(repository(), id)
+
+
+@app.route('/topics', methods=['POST'])
+def create_topic():
+    return crud.create_topic(repository())
+
+
+@app.route('/topics/<id>', methods=['PUT'])
+def update_topic(id):
+    return crud.update_topic(repository(), id)
+
+
+@app.route('/topics/<id>', methods=['DELETE'])
+def delete_topic(id):
+    return crud.delete_topic(repository(), id)
+
+
+# --- SKILL ENDPUNKTE ---
+
+
+@app.route('/skills', methods=['GET'])
+def list_skills():
+    return crud.list_skills(repository())
+
+
+@app.route('/skills/<id>', methods=['GET'])
+def get_skill(id):
+    return crud.get_skill(repository(), id)
+
+
+@app.route('/skills', methods=['POST'])
+def create_skill():
+    return crud.create_skill(repository())
+
+
+@app.route('/skills/<id>', methods=['PUT'])
+def update_skill(id):
+    return crud.update_skill(repository(), id)
+
+
+@app.route('/skills/<id>', methods=['DELETE'])
+def delete_skill(id):
+    return crud.delete_skill(repository(), id)
+
+
+# --- CLI ---
+
+
+@app.cli.command("import-json")
+@click.option("--topics", "topics_path", help="JSON-Array oder NDJSON mit Topics")
+@click.option("--skills", "skills_path", help="JSON-Array oder NDJSON mit Skills")
+def import_json(topics_path, skills_path):
+    """
+    Importiert Topics und Skills (Format wie data/topics.json bzw. data/skills.json)
+    in einer Transaktion. Legacy-IDs werden wie bei data/bulk_load.py per uuid5
+    abgebildet; vorhandene Einträge werden überschrieben, danach wird kompaktiert.
+    """
+    now = http_date(datetime.now(timezone.utc))
+    topics = [
+        {
+            "id": legacy_uuid("topic", r["id"]),
+            "name": r["name"],
+            "description": r.get("description"),
+            "parentTopicID": legacy_uuid("topic", r.get("parentTopicId", r.get("parentTopicID"))),
+            "createdAt": r.get("createdAt") or now,
+        }
+        for r in (iter_records(topics_path) if topics_path else [])
+    ]
+    skills = [
+        {
+            "id": legacy_uuid("skill", r["id"]),
+            "name": r["name"],
+            "topicID": legacy_uuid("topic", r.get("topicId", r.get("topicID"))),
+            "difficulty": r.get("difficulty") or "beginner",
+            "createdAt": r.get("createdAt") or now,
+        }
+        for r in (iter_records(skills_path) if skills_path else [])
+    ]
+    store = repository().store
+    with store.transaction() as tx:
+        known = {t["id"] for t in topics} | set(store.by_id["topics"])
+        skipped_parents = skipped_skills = 0
+        for topic in topics:
+            if topic["parentTopicID"] not in known:
+                skipped_parents += topic["parentTopicID"] is not None
+                topic["parentTopicID"] = None
+            tx.put("topics", topic)
+        for skill in skills:
+            if skill["topicID"] not in known:
+                skipped_skills += 1
+                continue
+            tx.put("skills", skill)
+    store.compact()
+    print(f"topics: {len(topics)} (unknown parents: {skipped_parents}), "
+          f"skills: {len(skills) - skipped_skills} (unknown topic: {skipped_skills})")
+
+
+if __name__ == '__main__':
+    app.run(debug=True, port=5000)
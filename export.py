@@ -0,0 +1,81 @@
+"""
+Streaming-Export der Topics und Skills als NDJSON oder CSV.
+- Nur die benötigten Spalten werden selektiert (keine ORM-Objekte)
+- Serverseitiger Cursor (stream_results/yield_per): der Speicherverbrauch bleibt
+  unabhängig von der Tabellengröße konstant
+- Eine REPEATABLE-READ-Transaktion pro Export: alle Zeilen stammen aus demselben
+  Snapshot, zwei Exporte lassen sich daher sauber vergleichen
+"""
+import csv
+import io
+import json
+
+from sqlalchemy import select
+from werkzeug.http import http_date
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def stream_rows(engine, fields, batch_size):
+    """
+    Liefert die Zeilen einer Tabelle (sortiert nach id) als Tupel, batchweise aus
+    einem serverseitigen Cursor innerhalb einer REPEATABLE-READ-Transaktion.
+
+    Args:
+        engine: SQLAlchemy-Engine (db.engine).
+        fields (list): serializers.TOPIC_FIELDS oder serializers.SKILL_FIELDS.
+        batch_size (int): Anzahl Zeilen pro Fetch vom Server.
+    """
+    columns = [column for _, column in fields]
+    with engine.connect() as connection:
+        connection = connection.execution_options(
+            isolation_level="REPEATABLE READ",
+            stream_results=True,
+            yield_per=batch_size,
+        )
+        with connection.begin():
+            result = connection.execute(select(*columns).order_by(columns[0]))
+            for partition in result.partitions():
+                yield partition
+
+
+def _value(value):
+    # Zeitstempel im selben Format wie die JSON-Antworten der API (HTTP-Datum)
+    if hasattr(value, "utctimetuple"):
+        return http_date(value)
+    return value
+
+
+def generate_ndjson(engine, fields, batch_size):
+    """Generator für einen NDJSON-Export: ein JSON-Objekt pro Zeile."""
+    names = [name for name, _ in fields]
+    for partition in stream_rows(engine, fields, batch_size):
+        yield "".join(
+            json.dumps(dict(zip(names, map(_value, row))), ensure_ascii=False) + "\n"
+            for row in partition
+        )
+
+
+def generate_csv(engine, fields, batch_size):
+    """Generator für einen CSV-Export mit Kopfzeile."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in fields])
+    for partition in stream_rows(engine, fields, batch_size):
+        writer.writerows([_value(v) for v in row] for row in partition)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Kopfzeile auch bei leeren Tabellen ausgeben
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def generate(engine, fields, fmt, batch_size):
+    """Wählt den Generator passend zum Format ('ndjson' oder 'csv')."""
+    if fmt == "csv":
+        return generate_csv(engine, fields, batch_size)
+    return generate_ndjson(engine, fields, batch_size)
@@ -0,0 +1,87 @@
+"""
+Gunicorn-Konfiguration (gunicorn -c gunicorn.conf.py app:app).
+
+Profile über GUNICORN_PROFILE:
+- sync (Standard): ein Request pro Worker-Prozess
+- gthread: THREADS Threads pro Worker (Standard 4); Long-Polling (/changes?wait=)
+  blockiert damit nicht den ganzen Worker
+- gevent: bis zu WORKER_CONNECTIONS Greenlets pro Worker (Standard 100); braucht die
+  optionalen Pakete gevent und psycogreen (pip install gevent psycogreen)
+
+Die App wird im Master geladen und per Fork an die Worker gegeben (preload_app,
+abschaltbar mit GUNICORN_PRELOAD=false); post_fork verwirft die geerbten Verbindungen.
+Beim gevent-Profil ist preload_app aus, damit die App erst nach dem Monkey-Patching
+geladen wird.
+
+Ohne gesetztes DB_POOL_SIZE wird der Pool auf die Nebenläufigkeit eines Workers
+abgestimmt (Threads bzw. ein Zehntel der Greenlets, mindestens 5); reicht er nicht,
+warten Requests bis DB_POOL_TIMEOUT auf eine Verbindung.
+"""
+import importlib.util
+import os
+import sys
+
+PROFILE = os.getenv("GUNICORN_PROFILE", "sync")
+if PROFILE not in ("sync", "gthread", "gevent"):
+    raise RuntimeError(f"GUNICORN_PROFILE must be sync, gthread or gevent, not {PROFILE!r}")
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv("WORKERS", 2))
+worker_class = PROFILE
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+preload_app = os.getenv("GUNICORN_PRELOAD", "false" if PROFILE == "gevent" else "true").lower() in ("1", "true", "yes")
+
+if PROFILE == "gthread":
+    threads = int(os.getenv("THREADS", 4))
+    os.environ.setdefault("DB_POOL_SIZE", str(max(threads, 5)))
+elif PROFILE == "gevent":
+    missing = [name for name in ("gevent", "psycogreen") if importlib.util.find_spec(name) is None]
+    if missing:
+        raise RuntimeError(f"GUNICORN_PROFILE=gevent requires: pip install {' '.join(missing)}")
+    worker_connections = int(os.getenv("WORKER_CONNECTIONS", 100))
+    os.environ.setdefault("DB_POOL_SIZE", str(max(worker_connections // 10, 5)))
+
+
+def on_starting(server):
+    # Metrik-Dateien früherer Läufe verwerfen (METRICS_DIR, siehe metrics.py)
+    import metrics
+
+    metrics.clear_dir()
+
+
+def worker_exit(server, worker):
+    # Letzten Stand schreiben, bevor child_exit ihn einrechnet
+    import metrics
+
+    metrics.flush()
+
+
+def child_exit(server, worker):
+    import metrics
+
+    metrics.retire_worker(worker.pid)
+
+
+def post_fork(server, worker):
+    # Ist die App schon im Master geladen (preload_app), hat der Worker ihre Engines
+    # geerbt und darf deren Verbindungen nicht weiterverwenden. Sonst lädt der Worker
+    # sie erst selbst (beim gevent-Profil nach dem Monkey-Patching).
+    module = sys.modules.get("app")
+    if module is not None:
+        import db_pool
+
+        db_pool.dispose_engines(module.app)
+
+
+def post_worker_init(worker):
+    if PROFILE == "gevent":
+        # psycopg2 blockiert sonst den ganzen Worker während jeder Abfrage
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
+    # Suchindex im Hintergrund aufbauen, statt im ersten Such-Request (siehe search_index.py)
+    module = sys.modules.get("app")
+    if module is not None:
+        module.search_index.index.start(module.app)
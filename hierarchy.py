@@ -0,0 +1,210 @@
+"""
+Abfragen über die Topic-Hierarchie (parent_topic_id) per rekursiver CTE.
+Teilbäume und Vorfahren werden so in einem einzigen Round Trip geladen; da die
+Hierarchie nur in parent_topic_id steht, muss keine Zusatztabelle gepflegt werden.
+"""
+from sqlalchemy import func, literal, or_, select
+
+from models import db, Topic, Skill, TopicPrerequisite
+
+# Obergrenze für die Rekursionstiefe. Schützt auch vor Endlosschleifen, falls
+# Altdaten bereits einen Zyklus enthalten.
+MAX_DEPTH = 100
+
+
+def subtree_cte(root_id, max_depth=None):
+    """
+    CTE mit (id, parent_topic_id, depth) für root_id und alle Nachfahren.
+    Der Wurzelknoten hat depth 0.
+
+    Args:
+        root_id (str): ID des Wurzel-Topics.
+        max_depth (int): Optionale maximale Tiefe (Standard: MAX_DEPTH).
+    """
+    max_depth = MAX_DEPTH if max_depth is None else min(max_depth, MAX_DEPTH)
+    tree = (
+        select(Topic.id, Topic.parent_topic_id, literal(0).label("depth"))
+        .where(Topic.id == root_id)
+        .cte("subtree", recursive=True)
+    )
+    children = (
+        select(Topic.id, Topic.parent_topic_id, (tree.c.depth + 1).label("depth"))
+        .join(tree, Topic.parent_topic_id == tree.c.id)
+        .where(tree.c.depth < max_depth)
+    )
+    return tree.union_all(children)
+
+
+def ancestors_cte(topic_id):
+    """
+    CTE mit (id, parent_topic_id, depth) für topic_id (depth 0) und alle Vorfahren.
+    Der Elternknoten hat depth 1, die Wurzel die größte Tiefe.
+    """
+    return _chain_cte(Topic.id == topic_id)
+
+
+def _chain_cte(start):
+    """ancestors_cte für alle Topics, die start erfüllen (mehrere Ketten auf einmal)."""
+    chain = (
+        select(Topic.id, Topic.parent_topic_id, literal(0).label("depth"))
+        .where(start)
+        .cte("ancestors", recursive=True)
+    )
+    parents = (
+        select(Topic.id, Topic.parent_topic_id, (chain.c.depth + 1).label("depth"))
+        .join(chain, Topic.id == chain.c.parent_topic_id)
+        .where(chain.c.depth < MAX_DEPTH)
+    )
+    return chain.union_all(parents)
+
+
+def descendants(root_id, max_depth=None, max_nodes=None):
+    """
+    Lädt ein Topic samt Nachfahren, sortiert nach Tiefe und Name.
+
+    Returns:
+        list: Tupel (Topic, depth); leer, wenn root_id nicht existiert.
+    """
+    tree = subtree_cte(root_id, max_depth)
+    query = (
+        db.session.query(Topic, tree.c.depth)
+        .join(tree, Topic.id == tree.c.id)
+        .order_by(tree.c.depth, Topic.name, Topic.id)
+    )
+    if max_nodes is not None:
+        query = query.limit(max_nodes)
+    return query.all()
+
+
+def ancestors(topic_id):
+    """
+    Lädt ein Topic samt Vorfahren, beginnend bei der Wurzel (Breadcrumb).
+
+    Returns:
+        list: Topics von der Wurzel bis einschließlich topic_id; leer, wenn es nicht existiert.
+    """
+    chain = ancestors_cte(topic_id)
+    return (
+        db.session.query(Topic)
+        .join(chain, Topic.id == chain.c.id)
+        .order_by(chain.c.depth.desc())
+        .all()
+    )
+
+
+def in_ancestry(topic_id, start_id):
+    """
+    EXISTS-Ausdruck: topic_id ist start_id selbst oder einer seiner Vorfahren.
+    Lässt sich direkt in die WHERE-Klausel eines UPDATE einbauen.
+    """
+    chain = ancestors_cte(start_id)
+    return select(chain.c.id).where(chain.c.id == topic_id).exists()
+
+
+def would_create_cycle(topic_id, parent_id):
+    """
+    Prüft, ob parent_id als neues Eltern-Topic von topic_id einen Zyklus erzeugen würde,
+    d.h. ob topic_id selbst parent_id oder einer seiner Vorfahren ist.
+    Läuft die Kette von parent_id nach oben ab, die in der Regel kurz ist.
+    """
+    if not parent_id:
+        return False
+    return db.session.query(in_ancestry(topic_id, parent_id)).scalar()
+
+
+def cyclic_topic_ids(topic_ids):
+    """
+    Findet unter topic_ids alle Topics, die (z.B. nach einer Batch-Änderung in der
+    laufenden Transaktion) ihr eigener Vorfahre sind. Eine einzige rekursive Abfrage
+    läuft die Eltern-Kette aller Topics gleichzeitig nach oben ab.
+
+    Returns:
+        set: IDs der Topics, die in einem Zyklus liegen.
+    """
+    if not topic_ids:
+        return set()
+    walk = (
+        select(Topic.id.label("origin"), Topic.parent_topic_id.label("id"), literal(1).label("depth"))
+        .where(Topic.id.in_(topic_ids), Topic.parent_topic_id.isnot(None))
+        .cte("walk", recursive=True)
+    )
+    parents = (
+        select(walk.c.origin, Topic.parent_topic_id, walk.c.depth + 1)
+        .join(walk, Topic.id == walk.c.id)
+        .where(Topic.parent_topic_id.isnot(None), walk.c.id != walk.c.origin, walk.c.depth < MAX_DEPTH)
+    )
+    walk = walk.union_all(parents)
+    return set(db.session.execute(select(walk.c.origin).where(walk.c.id == walk.c.origin).distinct()).scalars())
+
+
+def lock_topics(condition, lock=True):
+    """
+    Lädt (id, parent_topic_id) der Topics, die condition erfüllen, und sperrt sie mit
+    FOR UPDATE. Gesperrt wird immer sortiert nach id: Zwei Transaktionen, die sich
+    überschneidende Mengen sperren, warten so höchstens aufeinander, statt sich
+    gegenseitig zu blockieren (Deadlock). Solange die Zeilen gesperrt sind, kann auch
+    niemand ein Topic oder einen Skill darunter anlegen oder dorthin verschieben,
+    da der Foreign Key dafür eine Sperre auf dem Eltern-Topic braucht.
+
+    Args:
+        condition: WHERE-Bedingung auf Topic.
+        lock (bool): False für einen Probelauf ohne Sperren.
+    Returns:
+        list: Zeilen (id, parent_topic_id), sortiert nach id.
+    """
+    query = select(Topic.id, Topic.parent_topic_id).where(condition).order_by(Topic.id)
+    if lock:
+        query = query.with_for_update()
+    return db.session.execute(query).all()
+
+
+def lock_subtree(root_id, lock=True):
+    """Sperrt root_id und alle Nachfahren (siehe lock_topics)."""
+    tree = subtree_cte(root_id)
+    return lock_topics(Topic.id.in_(select(tree.c.id)), lock)
+
+
+def lock_for_move(topic_id, parent_id, lock=True):
+    """
+    Sperrt das zu verschiebende Topic und die Kette des neuen Eltern-Topics bis zur
+    Wurzel (siehe lock_topics). Ein paralleles Verschieben, das zusammen mit diesem
+    einen Zyklus ergäbe, müsste eine dieser Zeilen ändern und wartet daher.
+    """
+    return lock_for_moves([(topic_id, parent_id)], lock)
+
+
+def lock_for_moves(moves, lock=True):
+    """
+    Wie lock_for_move für mehrere Verschiebungen (topic_id, parent_id) auf einmal, z.B.
+    einen Batch: eine Abfrage sperrt alle Topics und die Ketten aller neuen
+    Eltern-Topics, ebenfalls sortiert nach id.
+    """
+    condition = Topic.id.in_([topic_id for topic_id, _ in moves])
+    parent_ids = [parent_id for _, parent_id in moves if parent_id]
+    if parent_ids:
+        chain = _chain_cte(Topic.id.in_(parent_ids))
+        condition = or_(condition, Topic.id.in_(select(chain.c.id)))
+    return lock_topics(condition, lock)
+
+
+def subtree_summary(root_id):
+    """
+    Statement für die Anzahl Topics, Skills und Voraussetzungs-Kanten im Teilbaum
+    unter root_id (einschließlich root_id), z.B. für einen Probelauf (dryRun).
+    """
+    tree = subtree_cte(root_id)
+    ids = select(tree.c.id)
+    return select(
+        select(func.count()).select_from(tree).scalar_subquery().label("topics"),
+        select(func.count()).where(Skill.topic_id.in_(ids)).scalar_subquery().label("skills"),
+        # UNION statt OR, damit beide Seiten ihren Index nutzen (Primärschlüssel bzw.
+        # ix_topic_prerequisites_prerequisite_id)
+        select(func.count()).select_from(
+            select(TopicPrerequisite.topic_id, TopicPrerequisite.prerequisite_id)
+            .where(TopicPrerequisite.topic_id.in_(ids))
+            .union(
+                select(TopicPrerequisite.topic_id, TopicPrerequisite.prerequisite_id)
+                .where(TopicPrerequisite.prerequisite_id.in_(ids))
+            ).subquery()
+        ).scalar_subquery().label("prerequisites"),
+    )
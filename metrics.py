@@ -0,0 +1,338 @@
+"""
+Metriken im Prometheus-Textformat für GET /metrics.
+- Pro Route (URL-Regel, nicht der konkrete Pfad): Latenz-Histogramm, Anzahl Requests
+  je Statuscode, Anzahl und Dauer der SQL-Statements pro Request
+- Wartezeit beim Auschecken einer Verbindung aus dem Pool (TimedQueuePool bzw. TimedNullPool)
+- SQL-Statements werden über Engine-Events (before/after_cursor_execute) gezählt
+- Langsame Requests (SLOW_REQUEST_MS) werden samt ihrer Statements geloggt
+- Im Debug-Modus bzw. mit METRICS_DEBUG_HEADERS=true bekommt jede Antwort die
+  Header X-Query-Count und Server-Timing
+
+Jeder Worker-Prozess zählt für sich. Ist METRICS_DIR gesetzt, schreibt jeder Worker
+seinen Stand regelmäßig als Datei dorthin und /metrics summiert alle Dateien, sodass
+ein Scrape über Gunicorn unabhängig vom antwortenden Worker alle Requests enthält.
+Wie beim Multiprocess-Modus von prometheus_client leert der Gunicorn-Master das
+Verzeichnis beim Start (clear_dir); die Datei eines beendeten Workers wird in
+retired.json eingerechnet (retire_worker), damit Zähler nicht zurückspringen und
+Dateien alter PIDs nicht ewig mitgezählt werden (siehe gunicorn.conf.py).
+"""
+import fcntl
+import json
+import os
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))
+DEBUG_HEADERS = os.getenv("METRICS_DEBUG_HEADERS", "false").lower() in ("1", "true", "yes")
+METRICS_DIR = os.getenv("METRICS_DIR")
+FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+RETIRED_FILE = "retired.json"
+# Für das Slow-Request-Log gemerkte Statements pro Request (die ersten n)
+MAX_LOGGED_STATEMENTS = 50
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# Name -> (Typ, Hilfetext, Buckets bei Histogrammen)
+METRICS = {
+    "http_requests_total": ("counter", "HTTP requests by route, method and status", None),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency", LATENCY_BUCKETS),
+    "http_request_sql_statements": ("histogram", "SQL statements executed per request", COUNT_BUCKETS),
+    "http_request_sql_duration_seconds": ("histogram", "Time spent in SQL per request", LATENCY_BUCKETS),
+    "http_slow_requests_total": ("counter", "Requests slower than SLOW_REQUEST_MS", None),
+    "db_pool_checkout_wait_seconds": ("histogram", "Time waiting for a pooled connection", LATENCY_BUCKETS),
+    "db_pool_checkout_timeouts_total": ("counter", "Pool checkouts that timed out", None),
+    "db_read_routing_total": ("counter", "Requests whose reads went to a replica or the primary", None),
+    "http_coalesced_requests_total": ("counter", "Cache misses of read endpoints by single-flight role", None),
+    "http_shed_requests_total": ("counter", "Requests rejected with 503 because the connection pool was overloaded", None),
+}
+
+
+class Registry:
+    """
+    Zähler und Histogramme eines Worker-Prozesses. Labels sind Tupel von
+    (Name, Wert)-Paaren; Histogramme speichern Zählungen pro Bucket, Summe und Anzahl.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels=(), value=1):
+        with self._lock:
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=()):
+        buckets = METRICS[name][2]
+        with self._lock:
+            key = (name, labels)
+            entry = self.histograms.get(key)
+            if entry is None:
+                entry = self.histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def snapshot(self):
+        """Stand als JSON-fähiges dict (für Dateien in METRICS_DIR)."""
+        with self._lock:
+            return {
+                "counters": [[name, labels, value] for (name, labels), value in self.counters.items()],
+                "histograms": [
+                    [name, labels, list(counts), total, count]
+                    for (name, labels), (counts, total, count) in self.histograms.items()
+                ],
+            }
+
+
+registry = Registry()
+_last_flush = 0.0
+
+
+def merge(snapshots):
+    """Summiert mehrere Snapshots zu einem Registry-Objekt."""
+    merged = Registry()
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            merged.counters[key] = merged.counters.get(key, 0) + value
+        for name, labels, counts, total, count in snapshot["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            entry = merged.histograms.setdefault(key, [[0] * len(counts), 0.0, 0])
+            entry[0] = [a + b for a, b in zip(entry[0], counts)]
+            entry[1] += total
+            entry[2] += count
+    return merged
+
+
+def flush():
+    """Schreibt den Stand dieses Workers atomar nach METRICS_DIR/<pid>.json."""
+    global _last_flush
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    # Eigene temporäre Datei pro Thread (gthread-Worker schreiben sonst gleichzeitig)
+    _write_json(os.path.join(METRICS_DIR, f"{os.getpid()}.json"), registry.snapshot())
+    _last_flush = time.monotonic()
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def collect():
+    """Liefert die Metriken aller Worker (METRICS_DIR) bzw. nur dieses Workers."""
+    if not METRICS_DIR:
+        return registry
+    flush()
+    snapshots = {}
+    for name in os.listdir(METRICS_DIR):
+        if name.endswith(".json") and name != RETIRED_FILE:
+            snapshot = _read_json(os.path.join(METRICS_DIR, name))
+            if snapshot is not None:
+                snapshots[name[:-len(".json")]] = snapshot
+    # retired.json nach den Worker-Dateien lesen: eine Datei, die retire_worker gerade
+    # eingerechnet hat, steht dann schon in "pids" und wird nicht doppelt gezählt
+    retired = _read_json(os.path.join(METRICS_DIR, RETIRED_FILE))
+    if retired is not None:
+        for pid in retired["pids"]:
+            snapshots.pop(str(pid), None)
+        snapshots[RETIRED_FILE] = retired
+    return merge(snapshots.values())
+
+
+def clear_dir():
+    """Leert METRICS_DIR (Gunicorn on_starting: Dateien früherer Läufe verwerfen)."""
+    if not METRICS_DIR or not os.path.isdir(METRICS_DIR):
+        return
+    for name in os.listdir(METRICS_DIR):
+        if name.endswith((".json", ".tmp")):
+            os.remove(os.path.join(METRICS_DIR, name))
+
+
+def retire_worker(pid):
+    """
+    Rechnet die Datei eines beendeten Workers in retired.json ein und löscht sie
+    (Gunicorn child_exit). Die PID bleibt in retired.json vermerkt, bis ihre Datei
+    gelöscht ist, damit ein paralleler Scrape sie nicht doppelt zählt.
+    """
+    if not METRICS_DIR:
+        return
+    path = os.path.join(METRICS_DIR, f"{pid}.json")
+    snapshot = _read_json(path)
+    if snapshot is None:
+        return
+    retired_path = os.path.join(METRICS_DIR, RETIRED_FILE)
+    with open(os.path.join(METRICS_DIR, ".retire.lock"), "w") as lock:
+        fcntl.lockf(lock, fcntl.LOCK_EX)
+        retired = _read_json(retired_path) or {"pids": [], "counters": [], "histograms": []}
+        merged = merge([retired, snapshot]).snapshot()
+        pids = [p for p in retired["pids"] if os.path.exists(os.path.join(METRICS_DIR, f"{p}.json"))]
+        _write_json(retired_path, dict(merged, pids=pids + [pid]))
+        os.remove(path)
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def render():
+    """Formatiert alle Metriken im Prometheus-Textformat (Version 0.0.4)."""
+    source = collect()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (metric, labels), value in sorted(source.counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(labels)} {value}")
+            continue
+        for (metric, labels), (counts, total, count) in sorted(source.histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, n in zip(buckets, counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class TimedPoolMixin:
+    """
+    Misst die Wartezeit beim Auschecken einer Verbindung (inklusive Verbindungsaufbau,
+    falls der Pool eine neue Verbindung öffnen muss).
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            registry.inc("db_pool_checkout_timeouts_total")
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            registry.observe("db_pool_checkout_wait_seconds", waited)
+            if has_request_context() and "metrics_started" in g:
+                g.pool_wait += waited
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    """
+    QueuePool mit Messung der Wartezeit.
+    Wird über SQLALCHEMY_ENGINE_OPTIONS = {"poolclass": TimedQueuePool} aktiviert.
+    """
+
+
+class TimedNullPool(TimedPoolMixin, NullPool):
+    """NullPool (neue Verbindung pro Checkout, z.B. hinter PgBouncer) mit Messung."""
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["metrics_query_started"].pop()
+    if has_request_context() and "metrics_started" in g:
+        g.sql_count += 1
+        g.sql_time += elapsed
+        if len(g.sql_statements) < MAX_LOGGED_STATEMENTS:
+            g.sql_statements.append((elapsed, statement))
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    started = context.connection.info.get("metrics_query_started") if context.connection else None
+    if started:
+        started.pop()
+
+
+def add_idle_time(seconds):
+    """
+    Zeit, die ein Request absichtlich wartet (z.B. Long-Polling); sie zählt nicht
+    für das Slow-Request-Log.
+    """
+    if has_request_context() and "metrics_started" in g:
+        g.idle_time += seconds
+
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    g.sql_count = 0
+    g.sql_time = 0.0
+    g.pool_wait = 0.0
+    g.sql_statements = []
+    g.idle_time = 0.0
+
+
+def _after_request(response):
+    if "metrics_started" not in g:
+        return response
+    duration = time.perf_counter() - g.metrics_started
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    labels = (("method", request.method), ("route", route))
+
+    registry.inc("http_requests_total", labels + (("status", str(response.status_code)),))
+    registry.observe("http_request_duration_seconds", duration, labels)
+    registry.observe("http_request_sql_statements", g.sql_count, labels)
+    registry.observe("http_request_sql_duration_seconds", g.sql_time, labels)
+
+    if SLOW_REQUEST_MS and (duration - g.idle_time) * 1000 >= SLOW_REQUEST_MS:
+        registry.inc("http_slow_requests_total", labels)
+        statements = "".join(f"\n  [{elapsed * 1000:.1f} ms] {statement}" for elapsed, statement in g.sql_statements)
+        current_app.logger.warning(
+            "Slow request %s %s -> %s in %.1f ms (%d SQL statements, %.1f ms SQL, %.1f ms pool wait)%s",
+            request.method, request.full_path.rstrip("?"), response.status_code, duration * 1000,
+            g.sql_count, g.sql_time * 1000, g.pool_wait * 1000, statements,
+        )
+
+    if DEBUG_HEADERS or current_app.debug:
+        response.headers["X-Query-Count"] = str(g.sql_count)
+        response.headers["Server-Timing"] = (
+            f"app;dur={duration * 1000:.1f}, "
+            f'db;dur={g.sql_time * 1000:.1f};desc="{g.sql_count} queries", '
+            f"pool;dur={g.pool_wait * 1000:.1f}"
+        )
+
+    if METRICS_DIR and time.monotonic() - _last_flush >= FLUSH_INTERVAL:
+        flush()
+    return response
+
+
+def init_app(app):
+    """Registriert die Request-Hooks für die Metriken an der Flask-App."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
@@ -0,0 +1,37 @@
+"""add trigram indexes for name search
+
+Revision ID: 351ef2317796
+Revises: d7299c3358a5
+Create Date: 2026-10-17 09:12:04.118532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '351ef2317796'
+down_revision = 'd7299c3358a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # pg_trgm liefert die gin_trgm_ops-Operatorklasse, mit der ILIKE '%q%'
+    # und similarity() aus einem GIN-Index bedient werden können.
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY sperrt Schreibzugriffe während des Aufbaus nicht, läuft aber nicht
+    # in einer Transaktion; ein ungültiger Index aus einem abgebrochenen Aufbau wird
+    # vorher entfernt.
+    with op.get_context().autocommit_block():
+        for name, table in (('ix_topics_name_trgm', 'topics'), ('ix_skills_name_trgm', 'skills')):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+            op.create_index(name, table, ['name'], unique=False, postgresql_concurrently=True,
+                            postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_skills_name_trgm', table_name='skills', postgresql_concurrently=True)
+        op.drop_index('ix_topics_name_trgm', table_name='topics', postgresql_concurrently=True)
+    # Die Extension bleibt bestehen, da sie auch von anderen Objekten genutzt werden kann.
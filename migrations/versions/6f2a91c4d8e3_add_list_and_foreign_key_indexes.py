@@ -0,0 +1,44 @@
+"""add composite indexes for list filters, sorting and foreign keys
+
+Revision ID: 6f2a91c4d8e3
+Revises: b3835004cc30
+Create Date: 2026-10-17 11:20:37.845102
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f2a91c4d8e3'
+down_revision = 'b3835004cc30'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_topics_name_id', 'topics', ['name', 'id']),
+    ('ix_skills_name_id', 'skills', ['name', 'id']),
+    ('ix_topics_parent_topic_id_name_id', 'topics', ['parent_topic_id', 'name', 'id']),
+    ('ix_skills_topic_id_name_id', 'skills', ['topic_id', 'name', 'id']),
+]
+
+
+def upgrade():
+    # (name, id) entspricht der Sortierung der Listen: ORDER BY name, id LIMIT n und
+    # die Keyset-Bedingung (name, id) > (:name, :id) lesen direkt aus dem Index.
+    # Filter + Sortierung (?parentId= bzw. ?topicId=). Die führende FK-Spalte bedient
+    # außerdem die Abhängigkeitsprüfungen in delete_topic und ON DELETE CASCADE.
+    # CONCURRENTLY sperrt Schreibzugriffe während des Aufbaus nicht, läuft aber nicht
+    # in einer Transaktion. Ein abgebrochener Aufbau hinterlässt einen ungültigen Index,
+    # der beim nächsten Versuch zuerst entfernt wird.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
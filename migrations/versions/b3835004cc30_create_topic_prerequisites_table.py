@@ -0,0 +1,33 @@
+"""create topic_prerequisites table
+
+Revision ID: b3835004cc30
+Revises: 351ef2317796
+Create Date: 2026-10-17 10:03:41.502716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3835004cc30'
+down_revision = '351ef2317796'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('topic_prerequisites',
+    sa.Column('topic_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('prerequisite_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.CheckConstraint('topic_id <> prerequisite_id', name='ck_topic_prerequisites_not_self'),
+    sa.ForeignKeyConstraint(['prerequisite_id'], ['topics.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['topic_id'], ['topics.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('topic_id', 'prerequisite_id')
+    )
+    op.create_index('ix_topic_prerequisites_prerequisite_id', 'topic_prerequisites', ['prerequisite_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_topic_prerequisites_prerequisite_id', table_name='topic_prerequisites')
+    op.drop_table('topic_prerequisites')
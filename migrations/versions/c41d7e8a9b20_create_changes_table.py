@@ -0,0 +1,34 @@
+"""create changes table for the change feed
+
+Revision ID: c41d7e8a9b20
+Revises: 6f2a91c4d8e3
+Create Date: 2026-10-17 12:02:18.553217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e8a9b20'
+down_revision = '6f2a91c4d8e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('changes',
+    sa.Column('seq', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.UUID(as_uuid=False), nullable=False),
+    sa.Column('op', sa.String(), nullable=False),
+    sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.CheckConstraint("op IN ('insert', 'update', 'delete')", name='ck_changes_op'),
+    sa.PrimaryKeyConstraint('seq')
+    )
+
+
+def downgrade():
+    op.drop_table('changes')
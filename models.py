@@ -1,14 +1,22 @@
 import uuid
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 
-db = SQLAlchemy()
+from replicas import RoutingSession
+
+# Lesezugriffe von GET-Requests gehen an Replikate, falls konfiguriert (siehe replicas.py)
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 def gen_uuid():
     return str(uuid.uuid4())
 
 class Topic(db.Model):
     __tablename__ = "topics"
+    __table_args__ = (
+        db.Index("ix_topics_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        db.Index("ix_topics_name_id", "name", "id"),
+        db.Index("ix_topics_parent_topic_id_name_id", "parent_topic_id", "name", "id"),
+    )
 
     id = db.Column(UUID(as_uuid=False), primary_key=True, default=gen_uuid)
     name = db.Column(db.String, nullable=False)
@@ -17,16 +25,26 @@ class Topic(db.Model):
     created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
  
     def to_dict(self):
+        return Topic.row_to_dict(self)
+
+    @staticmethod
+    def row_to_dict(row):
+        # Funktioniert für Topic-Objekte und für Zeilen aus select()/RETURNING
         return {
-            "id": self.id,
-            "name": self.name,
-            "description": self.description,
-            "parentTopicID": self.parent_topic_id,
-            "createdAt": self.created_at
+            "id": row.id,
+            "name": row.name,
+            "description": row.description,
+            "parentTopicID": row.parent_topic_id,
+            "createdAt": row.created_at
         }
 
 class Skill(db.Model):
     __tablename__ = "skills"
+    __table_args__ = (
+        db.Index("ix_skills_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        db.Index("ix_skills_name_id", "name", "id"),
+        db.Index("ix_skills_topic_id_name_id", "topic_id", "name", "id"),
+    )
     id = db.Column(UUID(as_uuid=False), primary_key=True, default=gen_uuid)
     name = db.Column(db.String, nullable=False)
     topic_id = db.Column(
@@ -37,11 +55,69 @@ class Skill(db.Model):
     difficulty = db.Column(db.String, nullable=False)
     created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
 
+    def to_dict(self):
+        return Skill.row_to_dict(self)
+
+    @staticmethod
+    def row_to_dict(row):
+        # Funktioniert für Skill-Objekte und für Zeilen aus select()/RETURNING
+        return {
+            "id": row.id,
+            "name": row.name,
+            "topicID": row.topic_id,
+            "difficulty": row.difficulty,
+            "createdAt": row.created_at
+        }
+
+class TopicPrerequisite(db.Model):
+    __tablename__ = "topic_prerequisites"
+    __table_args__ = (
+        db.CheckConstraint("topic_id <> prerequisite_id", name="ck_topic_prerequisites_not_self"),
+        db.Index("ix_topic_prerequisites_prerequisite_id", "prerequisite_id"),
+    )
+
+    topic_id = db.Column(
+        UUID(as_uuid=False),
+        db.ForeignKey("topics.id", ondelete="CASCADE"),
+        primary_key=True
+        )
+    prerequisite_id = db.Column(
+        UUID(as_uuid=False),
+        db.ForeignKey("topics.id", ondelete="CASCADE"),
+        primary_key=True
+        )
+
     def to_dict(self):
         return {
-            "id": self.id,
-            "name": self.name,
             "topicID": self.topic_id,
-            "difficulty": self.difficulty,
-            "createdAt": self.created_at
-        }
\ No newline at end of file
+            "prerequisiteID": self.prerequisite_id
+        }
+
+class Change(db.Model):
+    __tablename__ = "changes"
+    __table_args__ = (
+        db.CheckConstraint("op IN ('insert', 'update', 'delete')", name="ck_changes_op"),
+    )
+
+    # Fortlaufende Nummer (bigserial); Cursor für GET /changes?since=
+    seq = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    entity = db.Column(db.String, nullable=False)
+    entity_id = db.Column(UUID(as_uuid=False), nullable=False)
+    op = db.Column(db.String, nullable=False)
+    # Stand nach der Änderung im Format von to_dict(); bei 'delete' leer
+    data = db.Column(JSONB)
+    changed_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), nullable=False)
+
+    def to_dict(self):
+        return Change.row_to_dict(self)
+
+    @staticmethod
+    def row_to_dict(row):
+        return {
+            "seq": row.seq,
+            "entity": row.entity,
+            "id": row.entity_id,
+            "op": row.op,
+            "data": row.data,
+            "changedAt": row.changed_at
+        }
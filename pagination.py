@@ -0,0 +1,267 @@
+import base64
+import binascii
+import json
+
+from sqlalchemy import func, literal, select, tuple_
+from sqlalchemy.exc import DataError
+
+from query_plans import explain
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# Liefert der Planner eine Schätzung unterhalb dieser Grenze, wird trotzdem exakt
+# gezählt: Bei so wenigen Zeilen ist COUNT(*) billig und die Schätzung oft ungenau.
+EXACT_COUNT_THRESHOLD = 1000
+
+COUNT_MODES = ("estimate", "exact", "none")
+
+
+class PaginationError(ValueError):
+    """
+    Wird ausgelöst, wenn die Paginierungs-Parameter eines Requests ungültig sind.
+    Die Nachricht kann direkt als Fehlertext (422) an den Client gegeben werden.
+    """
+
+
+def encode_cursor(values):
+    """
+    Kodiert die Sortierschlüssel der letzten Zeile einer Seite als opaken Cursor.
+
+    Args:
+        values (list): Die Werte der Sortierspalten, z.B. [name, id].
+    Returns:
+        str: URL-sicherer Base64-String ohne Padding.
+    """
+    raw = json.dumps(values, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor, size, types=None):
+    """
+    Dekodiert einen mit encode_cursor erzeugten Cursor.
+
+    Args:
+        cursor (str): Der vom Client übergebene Cursor.
+        size (int): Erwartete Anzahl an Sortierschlüsseln.
+        types (list): Optional die erlaubten Python-Typen pro Sortierschlüssel (siehe
+            cursor_types). Ein manipulierter Cursor wie [1, 2] erreicht so nie die
+            Datenbank, wo er als ProgrammingError (500) statt als 422 endete.
+    Returns:
+        list: Die Werte der Sortierspalten.
+    Raises:
+        PaginationError: Wenn der Cursor nicht dekodiert werden kann.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise PaginationError("cursor is invalid")
+    if not isinstance(values, list) or len(values) != size:
+        raise PaginationError("cursor is invalid")
+    if types is not None and not all(
+        isinstance(v, t) and not isinstance(v, bool) for v, t in zip(values, types)
+    ):
+        raise PaginationError("cursor is invalid")
+    return values
+
+
+def cursor_types(sort_keys):
+    """
+    Erlaubte JSON-Typen der Cursor-Werte für die Sortierausdrücke: str für Text und
+    UUIDs, Zahlen für numerische Ausdrücke (z.B. das Suchranking).
+    """
+    types = []
+    for key in sort_keys:
+        try:
+            python_type = key.type.python_type
+        except NotImplementedError:
+            python_type = None
+        types.append((int, float) if python_type in (int, float) else python_type or (str, int, float))
+    return types
+
+
+def parse_page_args(args, max_limit=MAX_LIMIT):
+    """
+    Liest limit/offset/cursor/count aus den Query-Parametern.
+
+    Ist der Parameter 'cursor' vorhanden (auch leer für die erste Seite), wird im
+    Keyset-Modus paginiert, sonst klassisch über offset.
+
+    Args:
+        args: request.args des aktuellen Requests.
+        max_limit (int): Obergrenze für limit (größere Werte werden gekappt).
+    Returns:
+        dict: limit, offset, cursor (None im Offset-Modus) und count.
+    Raises:
+        PaginationError: Bei nicht numerischen Werten oder unbekanntem count-Modus.
+    """
+    try:
+        limit = min(int(args.get("limit", DEFAULT_LIMIT)), max_limit)
+        offset = max(int(args.get("offset", 0)), 0)
+    except ValueError:
+        raise PaginationError("limit/offset must be numbers")
+    if limit < 1:
+        raise PaginationError("limit must be at least 1")
+
+    count = args.get("count", "estimate")
+    if count not in COUNT_MODES:
+        raise PaginationError(f"count must be one of {', '.join(COUNT_MODES)}")
+
+    return {
+        "limit": limit,
+        "offset": offset,
+        "cursor": args.get("cursor"),
+        "count": count,
+    }
+
+
+def page_query(query, sort_keys, page):
+    """
+    Ergänzt eine gefilterte Query um Sortierung, Keyset-Bedingung bzw. offset und
+    limit. Die Sortierwerte werden mitselektiert, damit der Cursor auch für
+    berechnete Ausdrücke (etwa ein Suchranking) exakt die Werte der Datenbank enthält.
+
+    Args:
+        query: Gefilterte ORM-Query ohne Sortierung.
+        sort_keys (list): Aufsteigende, zusammen eindeutige Sortierausdrücke,
+                          z.B. [Topic.name, Topic.id].
+        page (dict): Ergebnis von parse_page_args.
+    Returns:
+        Query: Liefert Zeilen (Eintrag, Sortierwert 1, ..., Sortierwert n), eine mehr als limit.
+    Raises:
+        PaginationError: Wenn der Cursor ungültig ist.
+    """
+    query = query.add_columns(*[k.label(f"sort_key_{i}") for i, k in enumerate(sort_keys)])
+    query = query.order_by(*[k.asc() for k in sort_keys])
+
+    if page["cursor"]:
+        values = decode_cursor(page["cursor"], len(sort_keys), cursor_types(sort_keys))
+        query = query.filter(
+            tuple_(*sort_keys) > tuple_(*[literal(v, k.type) for k, v in zip(sort_keys, values)])
+        )
+    elif page["cursor"] is None and page["offset"]:
+        query = query.offset(page["offset"])
+
+    return query.limit(page["limit"] + 1)
+
+
+def fetch_page(query, sort_keys, page):
+    """
+    Lädt eine Seite und berechnet den nächsten Cursor.
+
+    Im Keyset-Modus wird per (name, id) > (:name, :id) gesucht statt übersprungen,
+    sodass tiefe Seiten genauso schnell sind wie die erste. Es wird immer eine Zeile
+    mehr geladen, um zu erkennen, ob es eine Folgeseite gibt.
+
+    Args:
+        query: Gefilterte Query ohne Sortierung, z.B. db.session.query(Topic.id, Topic.name).
+        sort_keys (list): Sortierausdrücke, siehe page_query.
+        page (dict): Ergebnis von parse_page_args.
+    Returns:
+        tuple: (Liste der Zeilen ohne die Sortierwerte, nextCursor oder None)
+    """
+    limit = page["limit"]
+    width = len(query.column_descriptions)
+    try:
+        rows = page_query(query, sort_keys, page).all()
+    except DataError:
+        # z.B. ein manipulierter Cursor mit einer ungültigen UUID
+        query.session.rollback()
+        raise PaginationError("cursor is invalid")
+
+    items = [row[:width] for row in rows[:limit]]
+    if len(rows) <= limit:
+        return items, None
+    return items, encode_cursor(list(rows[limit - 1][width:]))
+
+
+class PageStream:
+    """
+    Eine Seite wie bei fetch_page, aber aus einem serverseitigen Cursor: die Zeilen
+    kommen in Stapeln von batch_size, sodass auch Seiten mit 10.000 Zeilen den
+    Speicher nicht belasten. Gelesen wird über eine eigene Verbindung (von der Engine,
+    die die Session für die Abfrage wählen würde), weil die Session am Ende des Views
+    geschlossen wird, die Zeilen aber erst beim Senden der Antwort gelesen werden.
+    Die Abfrage wird schon beim Anlegen ausgeführt, ein ungültiger Cursor fällt also
+    vor der ersten Ausgabe auf. Nach dem Durchlaufen enthält next_cursor den Cursor
+    der Folgeseite (oder None); close() gibt die Verbindung frei.
+
+    Raises:
+        PaginationError: Wenn der Cursor ungültig ist.
+    """
+
+    def __init__(self, query, sort_keys, page, batch_size):
+        self.limit = page["limit"]
+        self.width = len(query.column_descriptions)
+        self.next_cursor = None
+        statement = page_query(query, sort_keys, page).statement
+        self._connection = query.session.get_bind(clause=statement).connect()
+        try:
+            self._connection.begin()
+            self._result = self._connection.execution_options(
+                stream_results=True, yield_per=batch_size
+            ).execute(statement)
+        except DataError:
+            self.close()
+            raise PaginationError("cursor is invalid")
+        except Exception:
+            self.close()
+            raise
+
+    def __iter__(self):
+        """Liefert Listen von Zeilen ohne die Sortierwerte."""
+        emitted, last = 0, None
+        try:
+            for partition in self._result.partitions():
+                rows = partition[:self.limit - emitted]
+                if rows:
+                    emitted += len(rows)
+                    last = rows[-1]
+                    yield [row[:self.width] for row in rows]
+                if len(rows) < len(partition):
+                    # Die zusätzliche Zeile (limit + 1) zeigt eine Folgeseite an
+                    self.next_cursor = encode_cursor(list(last[self.width:]))
+                    break
+        finally:
+            self.close()
+
+    def close(self):
+        self._connection.close()
+
+
+def estimate_count(session, query):
+    """
+    Schätzt die Trefferanzahl einer Query über den Postgres-Planner (EXPLAIN),
+    ohne die Tabelle zu scannen.
+
+    Args:
+        session: Die SQLAlchemy-Session (db.session).
+        query: Gefilterte ORM-Query.
+    Returns:
+        int: Geschätzte Anzahl Zeilen laut Planner.
+    """
+    return int(explain(session, query.order_by(None).statement)["Plan Rows"])
+
+
+def count_total(session, query, mode):
+    """
+    Ermittelt die Gesamtanzahl entsprechend dem gewünschten count-Modus.
+
+    Args:
+        session: Die SQLAlchemy-Session (db.session).
+        query: Gefilterte ORM-Query.
+        mode (str): 'estimate' (Standard), 'exact' oder 'none'.
+    Returns:
+        tuple: (total oder None, True wenn exakt gezählt wurde)
+    """
+    if mode == "none":
+        return None, False
+    if mode == "estimate":
+        estimate = estimate_count(session, query)
+        if estimate >= EXACT_COUNT_THRESHOLD:
+            return estimate, False
+    total = session.execute(
+        select(func.count()).select_from(query.order_by(None).subquery())
+    ).scalar()
+    return total, True
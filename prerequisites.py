@@ -0,0 +1,164 @@
+"""
+Voraussetzungs-Graph zwischen Topics (Tabelle topic_prerequisites).
+Der Graph wird pro Worker-Prozess einmal komplett geladen und als Adjazenzliste im
+Speicher gehalten, sodass Lernpfade ohne Datenbankzugriff pro Kante berechnet werden.
+Schreibende Endpunkte erhöhen nach dem Commit die Version "prerequisites" im
+gemeinsamen Versionsspeicher (cache.versions); jeder Worker lädt neu, sobald sich
+die Version geändert hat.
+"""
+import threading
+
+from sqlalchemy import exists, select, text
+
+import replicas
+from cache import mark_changed, versions
+from models import db, TopicPrerequisite
+
+# Beliebiger, aber fester Schlüssel für pg_advisory_xact_lock: serialisiert das
+# Einfügen von Kanten, damit zwei parallele Requests keinen Zyklus erzeugen können.
+PREREQUISITE_LOCK_KEY = 4711
+
+
+def load_edges():
+    """
+    Lädt alle Kanten aus der Datenbank.
+
+    Returns:
+        dict: topic_id -> Tupel der direkten Voraussetzungen (sortiert).
+    """
+    edges = {}
+    rows = db.session.execute(select(TopicPrerequisite.topic_id, TopicPrerequisite.prerequisite_id))
+    for topic_id, prerequisite_id in rows:
+        edges.setdefault(topic_id, []).append(prerequisite_id)
+    return {topic_id: tuple(sorted(ids)) for topic_id, ids in edges.items()}
+
+
+def reaches(start, target):
+    """
+    Prüft per rekursiver CTE in der Datenbank, ob target von start aus über
+    Voraussetzungs-Kanten erreichbar ist. Die Rekursion folgt nur den Kanten ab start
+    (UNION statt UNION ALL: jedes Topic einmal) und endet an target; EXISTS bricht ab,
+    sobald target gefunden ist.
+    """
+    edge = TopicPrerequisite.__table__
+    reachable = (
+        select(edge.c.prerequisite_id.label("id"))
+        .where(edge.c.topic_id == start)
+        .cte("reachable", recursive=True)
+    )
+    reachable = reachable.union(
+        select(edge.c.prerequisite_id)
+        .join(reachable, edge.c.topic_id == reachable.c.id)
+        .where(reachable.c.id != target)
+    )
+    return db.session.execute(select(exists().where(reachable.c.id == target))).scalar()
+
+
+def has_cycle(edges):
+    """
+    Prüft den gesamten Graphen auf Zyklen (Kahn-Algorithmus), z.B. nach einem Bulk-Import.
+    """
+    indegree = {}
+    for topic_id, prerequisite_ids in edges.items():
+        indegree.setdefault(topic_id, 0)
+        for prerequisite_id in prerequisite_ids:
+            indegree[prerequisite_id] = indegree.get(prerequisite_id, 0) + 1
+    ready = [node for node, degree in indegree.items() if degree == 0]
+    visited = 0
+    while ready:
+        node = ready.pop()
+        visited += 1
+        for nxt in edges.get(node, ()):
+            indegree[nxt] -= 1
+            if indegree[nxt] == 0:
+                ready.append(nxt)
+    return visited < len(indegree)
+
+
+def topological_path(edges, topic_id):
+    """
+    Berechnet alle transitiven Voraussetzungen von topic_id in topologischer
+    Reihenfolge (Voraussetzungen zuerst, topic_id zuletzt).
+    Iterative Tiefensuche, damit auch lange Ketten kein Rekursionslimit erreichen.
+    """
+    order = []
+    seen = {topic_id}
+    stack = [(topic_id, iter(edges.get(topic_id, ())))]
+    while stack:
+        node, pending = stack[-1]
+        for nxt in pending:
+            if nxt not in seen:
+                seen.add(nxt)
+                stack.append((nxt, iter(edges.get(nxt, ()))))
+                break
+        else:
+            stack.pop()
+            order.append(node)
+    return order
+
+
+class PrerequisiteGraph:
+    """
+    Im Speicher gehaltene Adjazenzliste des Voraussetzungs-Graphen eines Worker-Prozesses.
+    """
+
+    def __init__(self, versions, name="prerequisites"):
+        """
+        Args:
+            versions (FileVersionStore): Versionsspeicher, den Schreibzugriffe erhöhen.
+            name (str): Name des Zählers für topic_prerequisites.
+        """
+        self.versions = versions
+        self.name = name
+        self._edges = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def edges(self):
+        """
+        Liefert die Adjazenzliste und lädt sie neu, wenn sich die Version geändert hat.
+        Die Version wird vor dem Laden gelesen: ein paralleler Schreibzugriff führt
+        so höchstens zu einem zusätzlichen Neuladen, nie zu einem veralteten Graphen.
+        """
+        version = self.versions.get(self.name)
+        edges = self._edges
+        if edges is not None and self._version == version:
+            return edges
+        with self._lock:
+            if self._edges is None or self._version != version:
+                replicas.require_versions_lsn()
+                self._edges = load_edges()
+                self._version = version
+            return self._edges
+
+    def learning_path(self, topic_id):
+        """Topologisch sortierter Lernpfad bis einschließlich topic_id (nur IDs)."""
+        return topological_path(self.edges(), topic_id)
+
+
+graph = PrerequisiteGraph(versions)
+
+
+def add_prerequisite(topic_id, prerequisite_id):
+    """
+    Fügt die Kante 'topic_id setzt prerequisite_id voraus' in der laufenden
+    Transaktion ein. Die Zyklusprüfung läuft unter einer Advisory-Sperre gegen
+    den aktuellen Stand der Datenbank, nicht gegen den Cache, und liest nur den
+    Teilgraphen ab prerequisite_id (siehe reaches).
+
+    Returns:
+        bool: True, wenn die Kante neu angelegt wurde, False wenn sie schon existierte.
+    Raises:
+        ValueError: Wenn die Kante einen Zyklus erzeugen würde.
+    """
+    db.session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PREREQUISITE_LOCK_KEY})
+    existing = db.session.execute(select(exists().where(
+        TopicPrerequisite.topic_id == topic_id, TopicPrerequisite.prerequisite_id == prerequisite_id
+    ))).scalar()
+    if existing:
+        return False
+    if topic_id == prerequisite_id or reaches(prerequisite_id, topic_id):
+        raise ValueError("prerequisiteID would create a cycle")
+    db.session.add(TopicPrerequisite(topic_id=topic_id, prerequisite_id=prerequisite_id))
+    mark_changed(db.session, "prerequisites")
+    return True
@@ -0,0 +1,63 @@
+"""
+Hilfsfunktionen rund um EXPLAIN.
+- explain(): liefert den Postgres-Plan einer SQLAlchemy-Abfrage als dict
+- check_plan(): prüft, ob ein Plan die erwarteten Indizes nutzt und ohne Seq Scan auskommt
+Wird von der Count-Schätzung der Listen-Endpunkte und von tests/test_query_plans.py genutzt.
+"""
+from sqlalchemy import text
+
+
+def explain(session, statement):
+    """
+    Führt EXPLAIN (FORMAT JSON) für eine Abfrage aus, ohne sie auszuführen.
+
+    Args:
+        session: Die SQLAlchemy-Session (db.session).
+        statement: Ein SQLAlchemy-Statement (z.B. query.statement).
+    Returns:
+        dict: Der Wurzelknoten des Plans ("Plan" aus der JSON-Ausgabe).
+    """
+    connection = session.connection()
+    compiled = statement.compile(dialect=connection.dialect)
+    result = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params)
+    return result.scalar()[0]["Plan"]
+
+
+def iter_nodes(plan):
+    """Durchläuft alle Knoten eines Plans (Tiefensuche)."""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from iter_nodes(child)
+
+
+def check_plan(session, statement, expect_indexes=(), tables=()):
+    """
+    Prüft den Plan einer Abfrage bei deaktiviertem Seq Scan.
+
+    Mit enable_seqscan = off wählt der Planner einen Seq Scan nur noch, wenn kein
+    Index die Abfrage bedienen kann. Das Ergebnis hängt so nicht von der aktuellen
+    Tabellengröße oder den Statistiken ab.
+
+    Args:
+        session: Die SQLAlchemy-Session (db.session).
+        statement: Das zu prüfende Statement.
+        expect_indexes (iterable): Indexnamen, die im Plan vorkommen müssen.
+        tables (iterable): Tabellen, auf denen kein Seq Scan vorkommen darf.
+    Returns:
+        list: Beschreibungen der gefundenen Probleme (leer, wenn alles passt).
+    """
+    session.execute(text("SET LOCAL enable_seqscan = off"))
+    try:
+        plan = explain(session, statement)
+    finally:
+        session.rollback()
+
+    nodes = list(iter_nodes(plan))
+    used = {n["Index Name"] for n in nodes if "Index Name" in n}
+    problems = [f"index {name} not used" for name in expect_indexes if name not in used]
+    problems += [
+        f"sequential scan on {n['Relation Name']}"
+        for n in nodes
+        if n["Node Type"] == "Seq Scan" and n["Relation Name"] in tables
+    ]
+    return problems
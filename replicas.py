@@ -0,0 +1,239 @@
+"""
+Lese-Replikate mit Read-your-writes-Konsistenz.
+- DATABASE_REPLICA_URLS (kommagetrennt) legt Replikate als SQLALCHEMY_BINDS
+  replica_0, replica_1, ... an; ohne die Variable bleibt alles beim Primary
+- RoutingSession.get_bind schickt die Abfragen von GET/HEAD-Requests an ein Replikat,
+  alles andere (Schreibzugriffe, FOR UPDATE, CLI, Skripte) an den Primary
+- Nach jedem Commit mit Änderungen wird die WAL-Position (LSN) des Primary auf der
+  Verbindung der Transaktion gelesen, als Header X-LSN zurückgegeben und im
+  Versionsspeicher als "lsn" vermerkt
+- Schickt ein Client X-Min-LSN: <lsn> mit, liest er nur von einem Replikat, das diese
+  Position schon wiedergegeben hat (pg_last_wal_replay_lsn()), sonst vom Primary
+- Alles, was an Tabellenversionen hängt (Antwort-Cache, Suchindex, Voraussetzungs-
+  Graph, Änderungs-Feed), ruft require_versions_lsn() auf und liest damit mindestens
+  den Stand des letzten Schreibzugriffs, sonst stünde unter einer neuen Version ein
+  veralteter Stand im Cache
+- REPLICA_FAKE_LAG_MS simuliert Replikationsverzögerung ohne echte Replikation: jedes
+  Replikat meldet dann die LSN, die der Primary vor dieser Zeit hatte (z.B. mit
+  DATABASE_REPLICA_URLS=$DATABASE_URL zum lokalen Testen)
+"""
+import itertools
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from flask import current_app, g, has_request_context, jsonify, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.sql.dml import UpdateBase
+
+import metrics
+from cache import versions
+
+REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+FAKE_LAG = float(os.getenv("REPLICA_FAKE_LAG_MS", 0)) / 1000
+# Wie oft die Position eines zurückliegenden Replikats höchstens abgefragt wird
+LSN_POLL_INTERVAL = float(os.getenv("REPLICA_LSN_POLL_MS", 50)) / 1000
+READ_METHODS = ("GET", "HEAD")
+LSN_FORMAT = re.compile(r"^([0-9A-Fa-f]{1,8})/([0-9A-Fa-f]{1,8})$")
+
+
+def parse_lsn(value):
+    """'16/B374D848' (Format von pg_lsn) -> int; None, wenn der Wert ungültig ist."""
+    match = LSN_FORMAT.match(value or "")
+    if not match:
+        return None
+    return (int(match.group(1), 16) << 32) + int(match.group(2), 16)
+
+
+def format_lsn(lsn):
+    """int -> '16/B374D848'."""
+    return f"{lsn >> 32:X}/{lsn & 0xFFFFFFFF:X}"
+
+
+def binds():
+    """SQLALCHEMY_BINDS für die konfigurierten Replikate."""
+    return {f"replica_{i}": url for i, url in enumerate(REPLICA_URLS)}
+
+
+class Replica:
+    """
+    Ein Replikat mit der zuletzt abgefragten Wiedergabe-Position. Abgefragt wird nur,
+    wenn eine höhere Position verlangt wird, und höchstens alle LSN_POLL_INTERVAL Sekunden.
+    """
+
+    def __init__(self, name, engine, fake_lag=FAKE_LAG):
+        self.name = name
+        self.engine = engine
+        self.fake_lag = fake_lag
+        self.lsn = 0
+        self.checked = 0.0
+        self._history = deque()
+
+    def replay_lsn(self):
+        if self.fake_lag:
+            return self._fake_replay_lsn()
+        with self.engine.connect() as connection:
+            lsn = connection.execute(text("SELECT pg_last_wal_replay_lsn()::text")).scalar()
+        # NULL: der Server ist kein Standby (z.B. dieselbe Datenbank), also aktuell
+        return parse_lsn(lsn) if lsn else float("inf")
+
+    def _fake_replay_lsn(self):
+        now = time.monotonic()
+        self._history.append((now, versions.get("lsn")))
+        lsn = 0
+        while self._history and self._history[0][0] <= now - self.fake_lag:
+            lsn = self._history.popleft()[1]
+        self._history.appendleft((now - self.fake_lag, lsn))
+        return lsn
+
+    def caught_up(self, required):
+        if self.lsn >= required:
+            return True
+        now = time.monotonic()
+        if now - self.checked < LSN_POLL_INTERVAL:
+            return False
+        self.checked = now
+        try:
+            self.lsn = self.replay_lsn()
+        except Exception as e:  # nicht erreichbar: wie zurückliegend behandeln
+            current_app.logger.warning("Replica %s unavailable: %s", self.name, e)
+            return False
+        return self.lsn >= required
+
+
+class ReplicaSet:
+    """Replikate eines Worker-Prozesses; verteilt Lesezugriffe reihum."""
+
+    def __init__(self, replicas):
+        self.replicas = replicas
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def choose(self, required):
+        """Engine eines Replikats mit Position >= required oder None (Primary)."""
+        if not self.replicas:
+            return None
+        start = next(self._next)
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(start + i) % len(self.replicas)]
+            with self._lock:
+                if replica.caught_up(required):
+                    return replica.engine
+        return None
+
+
+_replica_set = None
+
+
+def replica_set():
+    global _replica_set
+    if _replica_set is None:
+        engines = current_app.extensions["sqlalchemy"].engines
+        _replica_set = ReplicaSet([Replica(key, engines[key]) for key in binds()])
+    return _replica_set
+
+
+def required_lsn():
+    """Mindestposition für die Lesezugriffe des aktuellen Requests."""
+    return max(g.get("client_min_lsn", 0), g.get("versions_min_lsn", 0))
+
+
+def require_versions_lsn():
+    """
+    Verlangt für den Rest des Requests mindestens die Position des letzten
+    Schreibzugriffs (Versionsspeicher), z.B. bevor ein Ergebnis unter den aktuellen
+    Tabellenversionen in einen Cache geht.
+    """
+    if not REPLICA_URLS or not has_request_context():
+        return
+    lsn = versions.get("lsn")
+    if lsn > g.get("versions_min_lsn", 0):
+        g.versions_min_lsn = lsn
+        # Wahl neu treffen, falls das bisherige Replikat zurückliegt
+        g.pop("read_bind", None)
+
+
+def read_bind(clause):
+    """Engine für eine Leseabfrage im aktuellen Request oder None (Primary)."""
+    if not REPLICA_URLS or not has_request_context() or request.method not in READ_METHODS:
+        return None
+    if isinstance(clause, UpdateBase) or getattr(clause, "_for_update_arg", None) is not None:
+        return None
+    if "read_bind" not in g:
+        g.read_bind = replica_set().choose(required_lsn())
+        target = "primary" if g.read_bind is None else "replica"
+        metrics.registry.inc("db_read_routing_total", (("target", target),))
+    return g.read_bind
+
+
+class RoutingSession(Session):
+    """
+    Session von db (siehe models.py), die Lesezugriffe von GET-Requests an ein
+    Replikat leitet; alles andere geht wie bisher an den Primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing:
+            engine = read_bind(clause)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _keep_commit_connection(session):
+    # Die Verbindung, auf der die Transaktion committet wird; nach dem Commit gehört sie
+    # bis zum Ende von after_commit noch der Session
+    if REPLICA_URLS and session.info.get("changed_tables"):
+        engine = current_app.extensions["sqlalchemy"].engine
+        session.info["commit_connection"] = session.connection(bind_arguments={"bind": engine})
+
+
+def _record_commit_lsn(session):
+    # Läuft vor cache._bump_changed (insert=True): Die LSN steht im Versionsspeicher,
+    # bevor andere Worker die neuen Versionen sehen. Gelesen wird nach dem Commit (die
+    # Position liegt also hinter dem Commit-Eintrag) auf derselben Verbindung, ohne eine
+    # zweite aus dem Pool zu holen
+    connection = session.info.pop("commit_connection", None)
+    if connection is None:
+        return
+    lsn = parse_lsn(connection.exec_driver_sql("SELECT pg_current_wal_lsn()::text").scalar())
+    versions.advance("lsn", lsn)
+    if has_request_context():
+        g.commit_lsn = lsn
+
+
+def _forget_commit_connection(session):
+    session.info.pop("commit_connection", None)
+
+
+event.listen(OrmSession, "before_commit", _keep_commit_connection)
+event.listen(OrmSession, "after_commit", _record_commit_lsn, insert=True)
+event.listen(OrmSession, "after_rollback", _forget_commit_connection)
+
+
+def _read_client_lsn():
+    value = request.headers.get("X-Min-LSN")
+    if value is None:
+        return None
+    lsn = parse_lsn(value)
+    if lsn is None:
+        return jsonify({"error": "X-Min-LSN must be a log sequence number like 16/B374D848"}), 422
+    g.client_min_lsn = lsn
+    return None
+
+
+def _add_lsn_header(response):
+    if "commit_lsn" in g:
+        response.headers["X-LSN"] = format_lsn(g.commit_lsn)
+    return response
+
+
+def init_app(app):
+    """Registriert die Request-Hooks für X-Min-LSN und X-LSN."""
+    if REPLICA_URLS:
+        app.before_request(_read_client_lsn)
+        app.after_request(_add_lsn_header)
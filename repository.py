@@ -0,0 +1,238 @@
+"""
+Repository-Schnittstelle für Topics und Skills, unabhängig vom Speicher.
+- Repository beschreibt die Operationen der CRUD- und Listen-Endpunkte; beide Apps
+  rufen sie über die gemeinsamen Endpunkte in crud.py auf
+- SqlRepository (sql_repository.py) setzt sie auf Postgres um (app.py),
+  FileRepository auf dem JournaledStore aus data_manager.py (edge_app.py)
+- Fehler werden als NotFoundError (404), ConflictError (409) bzw. InvalidError (422)
+  gemeldet; die Fehlertexte sind für beide Umsetzungen dieselben
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+
+from werkzeug.http import http_date
+
+from models import gen_uuid
+
+
+class RepositoryError(Exception):
+    """
+    Basisklasse der Repository-Fehler. Die Nachricht kann direkt als Fehlertext an den
+    Client gegeben werden, status ist der passende HTTP-Statuscode.
+    """
+    status = 400
+
+
+class NotFoundError(RepositoryError):
+    status = 404
+
+
+class ConflictError(RepositoryError):
+    status = 409
+
+
+class InvalidError(RepositoryError):
+    status = 422
+
+
+class ListPage:
+    """
+    Ergebnis der Listen-Methoden. batches liefert die Datensätze (dicts mit den
+    angefragten Feldern) in Stapeln, total und exact die Gesamtanzahl wie bei
+    pagination.count_total. Bei gestreamten Seiten steht next_cursor erst fest, wenn
+    batches durchlaufen ist; close() gibt dann gehaltene Ressourcen frei.
+    """
+
+    def __init__(self, batches, total, exact, next_cursor=None):
+        self.batches = batches
+        self.total = total
+        self.exact = exact
+        self.next_cursor = next_cursor
+
+    def close(self):
+        pass
+
+
+class Repository(ABC):
+    """
+    Operationen auf Topics und Skills. Datensätze sind dicts im Format von to_dict().
+    Seiten werden über page (Ergebnis von pagination.parse_page_args) und die Namen
+    der gewünschten Felder angefordert und als ListPage geliefert; stream=True erlaubt
+    der Umsetzung, die Zeilen erst beim Durchlaufen zu lesen.
+    """
+
+    @abstractmethod
+    def list_topics(self, page, fields, q=None, parent_id=None, counts=False, stream=False):
+        """counts=True ergänzt skillCount und childCount je Topic."""
+
+    @abstractmethod
+    def get_topic(self, topic_id, counts=False):
+        pass
+
+    @abstractmethod
+    def create_topic(self, name, description=None, parent_id=None):
+        pass
+
+    @abstractmethod
+    def update_topic(self, topic_id, values):
+        """values enthält nur die zu ändernden Felder (name, description, parentTopicID)."""
+
+    @abstractmethod
+    def delete_topic(self, topic_id):
+        pass
+
+    @abstractmethod
+    def list_skills(self, page, fields, q=None, topic_id=None, recursive=False, stream=False):
+        """recursive=True liefert auch die Skills aller Unter-Topics von topic_id."""
+
+    @abstractmethod
+    def get_skill(self, skill_id):
+        pass
+
+    @abstractmethod
+    def create_skill(self, name, topic_id, difficulty="beginner"):
+        pass
+
+    @abstractmethod
+    def update_skill(self, skill_id, values):
+        """values enthält nur die zu ändernden Felder (name, topicID, difficulty)."""
+
+    @abstractmethod
+    def delete_skill(self, skill_id):
+        pass
+
+
+def _now():
+    return http_date(datetime.now(timezone.utc))
+
+
+class FileRepository(Repository):
+    """
+    Repository auf einem JournaledStore. Prüfungen und Schreiben laufen gemeinsam in
+    einer Store-Transaktion, also auch über mehrere Worker-Prozesse hinweg atomar.
+    ?q= ist hier eine Präfixsuche auf dem Namen (ohne Groß-/Kleinschreibung) statt der
+    Trigramm-Suche von Postgres. Die Daten liegen im Speicher, gestreamt wird nicht.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def _list(self, entity, page, fields, q, groups):
+        records, next_cursor, total = self.store.page(entity, page, groups=groups, prefix=q)
+        # Die Indizes zählen exakt und ohne Mehrkosten
+        total, exact = (None, False) if page["count"] == "none" else (total, True)
+        return ListPage([[{name: r[name] for name in fields} for r in records]], total, exact, next_cursor)
+
+    def _get(self, entity, record_id, message):
+        record = self.store.get(entity, record_id)
+        if record is None:
+            raise NotFoundError(message)
+        return record
+
+    def _add_counts(self, topics):
+        """Ergänzt skillCount und childCount aus den Gruppen-Indizes."""
+        ids = [topic["id"] for topic in topics]
+        for topic, skills, children in zip(
+            topics, self.store.group_sizes("skills", ids), self.store.group_sizes("topics", ids)
+        ):
+            topic.update(skillCount=skills, childCount=children)
+
+    # --- Topics ---
+
+    def list_topics(self, page, fields, q=None, parent_id=None, counts=False, stream=False):
+        result = self._list("topics", page, fields, q, {parent_id} if parent_id else None)
+        if counts:
+            self._add_counts(result.batches[0])
+        return result
+
+    def get_topic(self, topic_id, counts=False):
+        topic = self._get("topics", topic_id, "Topic not found")
+        if counts:
+            topic = dict(topic)
+            self._add_counts([topic])
+        return topic
+
+    def create_topic(self, name, description=None, parent_id=None):
+        with self.store.transaction() as tx:
+            if parent_id and self.store.get("topics", parent_id) is None:
+                raise InvalidError("parentTopicID not found")
+            topic = {
+                "id": gen_uuid(),
+                "name": name,
+                "description": description,
+                "parentTopicID": parent_id,
+                "createdAt": _now(),
+            }
+            tx.put("topics", topic)
+        return topic
+
+    def update_topic(self, topic_id, values):
+        with self.store.transaction() as tx:
+            topic = dict(self.get_topic(topic_id), **values)
+            parent_id = values.get("parentTopicID")
+            if parent_id:
+                if self.store.get("topics", parent_id) is None:
+                    raise InvalidError("parentTopicID not found")
+                if topic_id in self._ancestry(parent_id):
+                    raise InvalidError("parentTopicID would create a cycle")
+            tx.put("topics", topic)
+        return topic
+
+    def _ancestry(self, topic_id):
+        """topic_id und alle Vorfahren, über den id-Index entlang parentTopicID."""
+        seen = []
+        while topic_id and topic_id not in seen:
+            seen.append(topic_id)
+            topic = self.store.get("topics", topic_id)
+            topic_id = topic["parentTopicID"] if topic else None
+        return seen
+
+    def delete_topic(self, topic_id):
+        with self.store.transaction() as tx:
+            self.get_topic(topic_id)
+            if self.store.group_ids("skills", topic_id):
+                raise ConflictError("The topic has dependent skills, cannot delete the topic")
+            if self.store.group_ids("topics", topic_id):
+                raise ConflictError("The topic has dependent topics, cannot delete the topic")
+            tx.delete("topics", topic_id)
+
+    # --- Skills ---
+
+    def list_skills(self, page, fields, q=None, topic_id=None, recursive=False, stream=False):
+        groups = None
+        if topic_id:
+            groups = self.store.subtree_ids("topics", topic_id) if recursive else {topic_id}
+        return self._list("skills", page, fields, q, groups)
+
+    def get_skill(self, skill_id):
+        return self._get("skills", skill_id, "Skill not found")
+
+    def create_skill(self, name, topic_id, difficulty="beginner"):
+        with self.store.transaction() as tx:
+            if self.store.get("topics", topic_id) is None:
+                raise InvalidError("topicID not found")
+            skill = {
+                "id": gen_uuid(),
+                "name": name,
+                "topicID": topic_id,
+                "difficulty": difficulty,
+                "createdAt": _now(),
+            }
+            tx.put("skills", skill)
+        return skill
+
+    def update_skill(self, skill_id, values):
+        with self.store.transaction() as tx:
+            skill = dict(self.get_skill(skill_id), **values)
+            if "topicID" in values:
+                if not values["topicID"]:
+                    raise InvalidError("Field 'topicID' is required")
+                if self.store.get("topics", values["topicID"]) is None:
+                    raise InvalidError("topicID not found")
+            tx.put("skills", skill)
+        return skill
+
+    def delete_skill(self, skill_id):
+        with self.store.transaction() as tx:
+            self.get_skill(skill_id)
+            tx.delete("skills", skill_id)
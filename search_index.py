@@ -0,0 +1,406 @@
+"""
+Suchindex für GET /search und GET /suggest über Topics und Skills.
+- Invertierter Index im Speicher jedes Worker-Prozesses: Token -> Dokumente, getrennt
+  nach Namen und Beschreibungen, dazu eine sortierte Token-Liste für Präfixe
+- Accent Folding: "für", "fur" und "fuer" finden "Grundlagen für Webanwendungen",
+  "strasse" findet "Straße" (casefold + Entfernen der diakritischen Zeichen, Umlaute
+  zusätzlich als ae/oe/ue)
+- Aufgebaut wird beim Start jedes Workers in einem Hintergrund-Thread (Gunicorn
+  post_worker_init, sonst beim ersten Such-Request), danach inkrementell aus dem
+  Änderungsprotokoll (changes.fetch), sobald sich die Version "changes" ändert. Bis
+  der Index steht, antworten /search und /suggest mit 503 und Retry-After
+  (SEARCH_RETRY_AFTER, Standard 5 Sekunden); ein Request baut nie selbst auf
+- Schreibzugriffe ohne Protokolleintrag (bulk_load.py, seed.py) erhöhen die Version
+  "unlogged"; dann wird im Hintergrund neu aufgebaut, gesucht wird solange auf dem
+  bisherigen Index
+- Speicherbudget SEARCH_INDEX_MAX_MB (grobe Schätzung): darüber werden Beschreibungen
+  nicht mehr indiziert, danach keine weiteren Dokumente; meta.complete zeigt das an
+"""
+import heapq
+import math
+import os
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from functools import lru_cache
+
+from flask import current_app, jsonify
+from sqlalchemy import func, select
+
+import changes
+import replicas
+from cache import versions
+from models import db, Change, Topic, Skill
+
+MAX_BYTES = int(float(os.getenv("SEARCH_INDEX_MAX_MB", 256)) * 1024 * 1024)
+# Grobe Speicherkosten für das Budget (CPython, 64 Bit)
+DOC_BYTES = 200
+POSTING_BYTES = 80
+TOKEN_BYTES = 120
+# Ein Treffer im Namen zählt so viel wie NAME_WEIGHT Treffer in der Beschreibung
+NAME_WEIGHT = 3.0
+# Obergrenzen, damit kurze Präfixe ("a") die Antwortzeit nicht sprengen
+MAX_PREFIX_TOKENS = 200
+MAX_SUGGEST_CANDIDATES = 2000
+SYNC_BATCH_SIZE = 1000
+RETRY_AFTER = int(os.getenv("SEARCH_RETRY_AFTER", 5))
+
+WORD = re.compile(r"\w+")
+UMLAUTS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue"})
+PREFIX_END = "\U0010ffff"
+
+
+def fold(text):
+    """Kleinschreibung ohne diakritische Zeichen, ß -> ss ("Für" -> "fur")."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def query_terms(text):
+    """Tokens einer Suchanfrage."""
+    return WORD.findall(fold(text or ""))
+
+
+def index_terms(text):
+    """
+    Tokens eines indizierten Texts. Wörter mit Umlauten zusätzlich in der
+    Schreibweise mit ae/oe/ue, damit auch "fuer" "für" findet.
+    """
+    terms = set()
+    for word in WORD.findall(unicodedata.normalize("NFC", text or "").casefold()):
+        terms.update(_word_terms(word))
+    return terms
+
+
+@lru_cache(maxsize=1 << 16)
+def _word_terms(word):
+    # Gecacht: beim Aufbau wiederholen sich die meisten Wörter
+    if word.isascii():
+        return (word,)
+    folded = fold(word)
+    if any(c in word for c in "äöü"):
+        return folded, fold(word.translate(UMLAUTS))
+    return (folded,)
+
+
+class SearchIndex:
+    """
+    Invertierter Index über Dokumente (entity, id, name). Dokumente bekommen interne
+    Nummern; names und descriptions bilden Token auf Mengen dieser Nummern ab.
+    Nicht thread-sicher, die Sperre hält LiveSearchIndex.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.docs = []           # Nummer -> (entity, id, name, gefalteter Name, Namens-/Beschreibungs-Tokens)
+        self.numbers = {}        # (entity, id) -> Nummer
+        self.free = []           # wiederverwendbare Nummern gelöschter Dokumente
+        self.names = {}          # Token -> Nummern der Dokumente mit dem Token im Namen
+        self.descriptions = {}   # Token -> Nummern mit dem Token in der Beschreibung
+        self.tokens = []         # alle Tokens sortiert (Präfixsuche)
+        self.size = 0            # geschätzte Bytes
+        self.complete = True
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def _link(self, postings, token, number):
+        entries = postings.get(token)
+        if entries is None:
+            if token not in self.names and token not in self.descriptions:
+                insort(self.tokens, token)
+                self.size += TOKEN_BYTES + len(token)
+            entries = postings[token] = set()
+        entries.add(number)
+        self.size += POSTING_BYTES
+
+    def _unlink(self, postings, token, number):
+        entries = postings[token]
+        entries.discard(number)
+        self.size -= POSTING_BYTES
+        if not entries:
+            del postings[token]
+            if token not in self.names and token not in self.descriptions:
+                del self.tokens[bisect_left(self.tokens, token)]
+                self.size -= TOKEN_BYTES + len(token)
+
+    def put(self, entity, doc_id, name, description=None):
+        """Nimmt ein Dokument auf bzw. ersetzt es."""
+        self.remove(entity, doc_id)
+        name_terms = index_terms(name)
+        description_terms = index_terms(description) - name_terms
+        folded = " ".join(query_terms(name))
+        cost = DOC_BYTES + len(name) + len(folded) + POSTING_BYTES * len(name_terms)
+        if self.size + cost + POSTING_BYTES * len(description_terms) > self.max_bytes:
+            # Budget: zuerst auf Beschreibungen verzichten, dann auf ganze Dokumente
+            description_terms = set()
+            self.complete = False
+            if self.size + cost > self.max_bytes:
+                return
+        number = self.free.pop() if self.free else len(self.docs)
+        doc = (entity, doc_id, name, folded, tuple(name_terms), tuple(description_terms))
+        if number == len(self.docs):
+            self.docs.append(doc)
+        else:
+            self.docs[number] = doc
+        self.numbers[(entity, doc_id)] = number
+        self.size += DOC_BYTES + len(name) + len(folded)
+        for token in name_terms:
+            self._link(self.names, token, number)
+        for token in description_terms:
+            self._link(self.descriptions, token, number)
+
+    def remove(self, entity, doc_id):
+        """Entfernt ein Dokument (falls vorhanden)."""
+        number = self.numbers.pop((entity, doc_id), None)
+        if number is None:
+            return
+        _, _, name, folded, name_terms, description_terms = self.docs[number]
+        for token in name_terms:
+            self._unlink(self.names, token, number)
+        for token in description_terms:
+            self._unlink(self.descriptions, token, number)
+        self.docs[number] = None
+        self.free.append(number)
+        self.size -= DOC_BYTES + len(name) + len(folded)
+
+    def _expand(self, prefix):
+        """Tokens, die mit prefix beginnen (höchstens MAX_PREFIX_TOKENS)."""
+        start = bisect_left(self.tokens, prefix)
+        end = bisect_left(self.tokens, prefix + PREFIX_END, start, min(len(self.tokens), start + MAX_PREFIX_TOKENS))
+        return self.tokens[start:end]
+
+    def _idf(self, token):
+        df = len(self.names.get(token, ())) + len(self.descriptions.get(token, ()))
+        return math.log(1 + len(self.numbers) / (1 + df))
+
+    def _match(self, number, group):
+        """Bestes Gewicht eines Dokuments für eine Gruppe von Tokens (0 = kein Treffer)."""
+        best = 0.0
+        for token, idf in group:
+            if number in self.names.get(token, ()):
+                best = max(best, NAME_WEIGHT * idf)
+            elif number in self.descriptions.get(token, ()):
+                best = max(best, idf)
+        return best
+
+    def search(self, q, limit, entity=None):
+        """
+        Rangliste für q: alle Wörter müssen in Name oder Beschreibung vorkommen, das
+        letzte auch als Präfix ("web entw" findet "Web Entwicklung"). Bewertet wird
+        per Summe von idf-Gewichten, Treffer im Namen zählen NAME_WEIGHT-fach.
+        Kandidaten liefert das seltenste Wort; die übrigen werden nur noch per
+        Mengen-Lookup geprüft.
+
+        Returns:
+            list: Tupel (Score, entity, id, name), beste zuerst.
+        """
+        terms = query_terms(q)
+        if not terms:
+            return []
+        groups = [[(t, self._idf(t))] for t in terms[:-1]]
+        groups.append([(t, self._idf(t)) for t in self._expand(terms[-1])])
+        groups.sort(key=lambda g: sum(len(self.names.get(t, ())) + len(self.descriptions.get(t, ())) for t, _ in g))
+
+        candidates = set()
+        for token, _ in groups[0]:
+            candidates.update(self.names.get(token, ()), self.descriptions.get(token, ()))
+        ranked = []
+        for number in candidates:
+            doc = self.docs[number]
+            if entity is not None and doc[0] != entity:
+                continue
+            total = 0.0
+            for group in groups:
+                score = self._match(number, group)
+                if not score:
+                    break
+                total += score
+            else:
+                ranked.append((total, doc))
+        best = heapq.nsmallest(limit, ranked, key=lambda item: (-item[0], item[1][2], item[1][1]))
+        return [(round(score, 4), doc[0], doc[1], doc[2]) for score, doc in best]
+
+    def suggest(self, prefix, limit, entity=None):
+        """
+        Autovervollständigung über Namen: alle Wörter bis auf das letzte müssen im Namen
+        vorkommen, das letzte als Präfix. Namen, die mit der Eingabe beginnen, zuerst,
+        danach kürzere Namen.
+
+        Returns:
+            list: Tupel (entity, id, name).
+        """
+        terms = query_terms(prefix)
+        if not terms:
+            return []
+        required = None
+        for token in terms[:-1]:
+            numbers = self.names.get(token, set())
+            required = numbers if required is None else required & numbers
+        candidates = set()
+        for token in self._expand(terms[-1]):
+            numbers = self.names.get(token, ())
+            candidates.update(numbers if required is None else required.intersection(numbers))
+            if len(candidates) >= MAX_SUGGEST_CANDIDATES:
+                break
+        typed = " ".join(terms)
+        docs = (self.docs[n] for n in candidates)
+        docs = [d for d in docs if entity is None or d[0] == entity]
+        best = heapq.nsmallest(limit, docs, key=lambda d: (not d[3].startswith(typed), len(d[2]), d[2], d[1]))
+        return [(d[0], d[1], d[2]) for d in best]
+
+
+def load_index(max_bytes=MAX_BYTES):
+    """
+    Baut einen Index aus allen Topics und Skills auf.
+
+    Returns:
+        tuple: (SearchIndex, höchste seq des Änderungsprotokolls vor dem Laden)
+    """
+    # seq vor den Zeilen lesen: Änderungen dazwischen werden danach erneut (idempotent) angewendet
+    seq = db.session.execute(select(func.coalesce(func.max(Change.seq), 0))).scalar()
+    index = SearchIndex(max_bytes)
+    rows = db.session.execute(
+        select(Topic.id, Topic.name, Topic.description).execution_options(yield_per=SYNC_BATCH_SIZE)
+    )
+    for row in rows:
+        index.put("topic", row.id, row.name, row.description)
+    rows = db.session.execute(select(Skill.id, Skill.name).execution_options(yield_per=SYNC_BATCH_SIZE))
+    for row in rows:
+        index.put("skill", row.id, row.name)
+    return index, seq
+
+
+class NotReady(Exception):
+    """Der Suchindex dieses Workers wird noch aufgebaut."""
+
+
+class LiveSearchIndex:
+    """
+    SearchIndex eines Worker-Prozesses, der vor jeder Suche mit der Datenbank
+    abgeglichen wird: neue Einträge im Änderungsprotokoll werden angewendet, nach
+    Änderungen ohne Protokolleintrag wird neu aufgebaut. Aufgebaut wird immer in
+    einem Hintergrund-Thread (start), danach wird der Index unter der Sperre
+    ausgetauscht. Unter der Sperre laufen nur das Anwenden bereits gelesener
+    Änderungen und die Abfragen selbst.
+    """
+
+    def __init__(self, versions, max_bytes=MAX_BYTES):
+        self.versions = versions
+        self.max_bytes = max_bytes
+        self.index = None
+        self.seq = 0
+        self._unlogged = None
+        self._changes = None
+        self._lock = threading.Lock()
+        self._builder = None
+        self._builder_lock = threading.Lock()
+
+    def start(self, app):
+        """Startet den Aufbau im Hintergrund, falls nicht schon einer läuft."""
+        with self._builder_lock:
+            if self._builder is not None and self._builder.is_alive():
+                return
+            self._builder = threading.Thread(target=self._build, args=(app,), name="search-index", daemon=True)
+            self._builder.start()
+
+    def _build(self, app):
+        with app.app_context():
+            # Version vor dem Laden lesen (wie in _sync)
+            unlogged = self.versions.get("unlogged")
+            try:
+                index, seq = load_index(self.max_bytes)
+                seq = apply_changes(index, seq, fetch_changes(seq))
+            except Exception:
+                # Der nächste Such-Request startet einen neuen Versuch
+                app.logger.exception("Search index build failed")
+                return
+            with self._lock:
+                self.index, self.seq, self._unlogged = index, seq, unlogged
+                # Neuere Änderungen wendet _sync danach auf den neuen Index an
+                self._changes = None
+            app.logger.info(
+                "Search index built: %d documents, ~%d MB%s", len(index),
+                index.size // (1024 * 1024), "" if index.complete else " (over budget, incomplete)",
+            )
+
+    def _sync(self):
+        """
+        Bringt den Index auf den aktuellen Stand. Die Versionen werden vor dem Lesen
+        gelesen: ein paralleler Schreibzugriff führt so höchstens zu einem weiteren
+        Abgleich, nie zu einem veralteten Index.
+
+        Raises:
+            NotReady: Solange der erste Aufbau läuft.
+        """
+        unlogged = self.versions.get("unlogged")
+        changed = self.versions.get("changes")
+        if self.index is None:
+            self.start(current_app._get_current_object())
+            raise NotReady()
+        if unlogged != self._unlogged:
+            self.start(current_app._get_current_object())
+        if changed != self._changes:
+            replicas.require_versions_lsn()
+            items = fetch_changes(self.seq)
+            with self._lock:
+                self.seq = apply_changes(self.index, self.seq, items)
+                self._changes = changed
+
+    def search(self, q, limit, entity=None):
+        """Wie SearchIndex.search, auf dem aktuellen Stand. Liefert (Treffer, vollständig)."""
+        self._sync()
+        with self._lock:
+            return self.index.search(q, limit, entity), self.index.complete
+
+    def suggest(self, prefix, limit, entity=None):
+        """Wie SearchIndex.suggest, auf dem aktuellen Stand. Liefert (Treffer, vollständig)."""
+        self._sync()
+        with self._lock:
+            return self.index.suggest(prefix, limit, entity), self.index.complete
+
+
+def fetch_changes(seq):
+    """Alle Einträge des Änderungsprotokolls nach seq, in Stapeln gelesen."""
+    items = []
+    while True:
+        batch, more = changes.fetch(seq, SYNC_BATCH_SIZE)
+        items.extend(batch)
+        if not more:
+            return items
+        seq = batch[-1]["seq"]
+
+
+def apply_changes(index, seq, items):
+    """
+    Wendet die Einträge mit seq > seq auf index an (bereits angewendete, z.B. von
+    einem parallelen Abgleich, werden übersprungen). Liefert die neue seq.
+    """
+    for item in items:
+        if item["seq"] <= seq:
+            continue
+        if item["op"] == "delete":
+            index.remove(item["entity"], item["id"])
+        else:
+            data = item["data"]
+            index.put(item["entity"], item["id"], data["name"], data.get("description"))
+        seq = item["seq"]
+    return seq
+
+
+index = LiveSearchIndex(versions)
+
+
+def _not_ready(e):
+    response = jsonify({"error": "The search index is being built, please retry later"})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(RETRY_AFTER)
+    return response
+
+
+def init_app(app):
+    """Registriert die 503-Antwort, solange der Suchindex aufgebaut wird."""
+    app.register_error_handler(NotReady, _not_ready)
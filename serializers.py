@@ -0,0 +1,116 @@
+"""
+Schnelle JSON-Serialisierung für die Listen-Endpunkte.
+- ?fields=id,name (Sparse Fieldsets): selektiert werden nur die angefragten Spalten,
+  ohne ORM-Objekte und ohne z.B. die TEXT-Spalte description
+- Pro Feldauswahl wird einmal eine Funktion Zeile -> dict erzeugt und gecacht, statt
+  für jede Zeile to_dict() und den Flask-Encoder zu durchlaufen
+- Ist orjson installiert, wird damit kodiert, sonst mit json aus der Standardbibliothek;
+  die Ausgabe (sortierte Schlüssel, Zeitstempel als HTTP-Datum) ist in beiden Fällen
+  dieselbe wie bei jsonify
+"""
+import json
+from functools import lru_cache
+
+from flask import Response
+from sqlalchemy import DateTime
+from werkzeug.http import http_date
+
+from models import Topic, Skill
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+# Feldname in der API -> Spalte; die Feldnamen entsprechen denen aus to_dict()
+TOPIC_FIELDS = [
+    ("id", Topic.id),
+    ("name", Topic.name),
+    ("description", Topic.description),
+    ("parentTopicID", Topic.parent_topic_id),
+    ("createdAt", Topic.created_at),
+]
+
+SKILL_FIELDS = [
+    ("id", Skill.id),
+    ("name", Skill.name),
+    ("topicID", Skill.topic_id),
+    ("difficulty", Skill.difficulty),
+    ("createdAt", Skill.created_at),
+]
+
+
+class FieldsError(ValueError):
+    """
+    Der Parameter fields bzw. include enthält unbekannte Namen. Die Nachricht kann direkt
+    als Fehlertext (422) an den Client gegeben werden.
+    """
+
+
+def parse_fields(value, available):
+    """
+    Liest ?fields=a,b,c und liefert die passenden (Feldname, Spalte)-Paare in der
+    Reihenfolge von available. Ohne Parameter werden alle Felder geliefert.
+
+    Raises:
+        FieldsError: Wenn ein Feldname unbekannt ist.
+    """
+    if not value:
+        return available
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = requested - {name for name, _ in available}
+    if unknown or not requested:
+        raise FieldsError(f"fields must be a comma-separated subset of {', '.join(n for n, _ in available)}")
+    return [(name, column) for name, column in available if name in requested]
+
+
+def parse_include(value, available):
+    """
+    Liest ?include=a,b (zusätzlich berechnete Angaben, z.B. counts).
+
+    Returns:
+        set: Die angefragten Namen (leer ohne Parameter).
+    Raises:
+        FieldsError: Wenn ein Name unbekannt ist.
+    """
+    requested = {name.strip() for name in (value or "").split(",") if name.strip()}
+    if requested - set(available):
+        raise FieldsError(f"include must be a comma-separated subset of {', '.join(available)}")
+    return requested
+
+
+@lru_cache(maxsize=64)
+def _compile(keys, datetime_positions):
+    if not datetime_positions:
+        return lambda row: dict(zip(keys, row))
+
+    def serialize(row):
+        values = list(row)
+        for i in datetime_positions:
+            if values[i] is not None:
+                values[i] = http_date(values[i])
+        return dict(zip(keys, values))
+    return serialize
+
+
+def row_serializer(fields):
+    """
+    Liefert eine Funktion, die eine Zeile (Werte in der Reihenfolge von fields)
+    in das dict der API umwandelt. Zeitstempel werden wie bei jsonify als HTTP-Datum
+    formatiert. Die Funktion wird pro Feldauswahl nur einmal erzeugt.
+    """
+    keys = tuple(name for name, _ in fields)
+    datetime_positions = tuple(i for i, (_, column) in enumerate(fields) if isinstance(column.type, DateTime))
+    return _compile(keys, datetime_positions)
+
+
+def dumps(obj):
+    """Kodiert obj als kompaktes JSON (bytes) mit sortierten Schlüsseln."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(obj, status=200):
+    """Wie jsonify, aber über dumps() kodiert."""
+    return Response(dumps(obj), status=status, mimetype="application/json")
@@ -0,0 +1,91 @@
+"""
+Lastabwurf bei überlastetem Verbindungspool.
+- Jeder Pool merkt sich, seit wann die Requests warten, die gerade auf eine Verbindung
+  warten. Wartet einer davon schon länger als SHED_POOL_WAIT_MS, ist der Pool überlastet
+  (die mittlere oder kürzeste Wartezeit taugt dafür nicht: QueuePool bedient nicht
+  streng der Reihe nach, einzelne Requests warten sehr lange, andere gar nicht)
+- Solange das gilt, bekommt ein Request, der seine erste Verbindung anfordert, sofort
+  503 mit Retry-After statt sich hinten anzustellen. Requests, die keine Verbindung
+  brauchen (Treffer im Antwort-Cache, Follower beim Single-Flight), laufen weiter;
+  ein Request, der schon eine Verbindung hatte (z.B. nach dem Commit), wird nicht
+  mehr abgebrochen
+- Läuft das Warten bis DB_POOL_TIMEOUT, gibt es ebenfalls 503 statt 500
+- Metrik http_shed_requests_total{reason=pool_wait|pool_timeout}
+- SHED_POOL_WAIT_MS=0 schaltet den Lastabwurf ab
+"""
+import itertools
+import os
+import threading
+import time
+
+from flask import g, has_request_context, jsonify
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+import metrics
+
+POOL_WAIT_THRESHOLD = float(os.getenv("SHED_POOL_WAIT_MS", 250)) / 1000
+RETRY_AFTER = int(os.getenv("SHED_RETRY_AFTER", 1))
+
+
+class Overloaded(Exception):
+    """Der Pool ist überlastet; der Request wird abgewiesen."""
+
+
+class Waiters:
+    """Beginn der Wartezeit aller gerade wartenden Checkouts eines Pools."""
+
+    def __init__(self):
+        self._started = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+
+    def enter(self):
+        token = next(self._tokens)
+        with self._lock:
+            self._started[token] = time.monotonic()
+        return token
+
+    def leave(self, token):
+        with self._lock:
+            del self._started[token]
+
+    def longest(self):
+        """Wartezeit des am längsten wartenden Checkouts in Sekunden (0 ohne Wartende)."""
+        with self._lock:
+            if not self._started:
+                return 0.0
+            return time.monotonic() - min(self._started.values())
+
+
+class SheddingPoolMixin:
+    """
+    Weist die erste Verbindungsanforderung eines Requests ab, solange der Pool
+    überlastet ist (siehe oben). Vor einer Pool-Klasse aus metrics einzumischen.
+    """
+
+    def _do_get(self):
+        waiters = self.__dict__.setdefault("_waiters", Waiters())
+        if POOL_WAIT_THRESHOLD and has_request_context() and "db_checked_out" not in g:
+            if waiters.longest() > POOL_WAIT_THRESHOLD:
+                raise Overloaded()
+        token = waiters.enter()
+        try:
+            return super()._do_get()
+        finally:
+            waiters.leave(token)
+            if has_request_context():
+                g.db_checked_out = True
+
+
+def _reject(reason):
+    metrics.registry.inc("http_shed_requests_total", (("reason", reason),))
+    response = jsonify({"error": "The service is overloaded, please retry later"})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(RETRY_AFTER)
+    return response
+
+
+def init_app(app):
+    """Registriert die 503-Antworten für abgewiesene Requests und Pool-Timeouts."""
+    app.register_error_handler(Overloaded, lambda e: _reject("pool_wait"))
+    app.register_error_handler(PoolTimeoutError, lambda e: _reject("pool_timeout"))
@@ -0,0 +1,373 @@
+"""
+Repository-Umsetzung auf Postgres (siehe repository.py), genutzt von app.py.
+- Listen selektieren nur die angefragten Spalten und paginieren per Keyset oder
+  offset (pagination.py); große Seiten kommen auf Wunsch aus einem serverseitigen Cursor
+- Jede Schreiboperation ist ein einziges Statement mit RETURNING; Prüfungen wie
+  "Eltern-Topic existiert" übernehmen Foreign Keys bzw. die WHERE-Klausel
+- Geänderte Zeilen gehen in den Änderungs-Feed (changes.py) und erhöhen die
+  Tabellenversionen (cache.mark_changed), danach wird committet
+- Die Query-Bausteine (topics_query, skills_query, ...) nutzen auch app.py für
+  Facetten und tests/test_query_plans.py
+"""
+from sqlalchemy import DOUBLE_PRECISION, cast, delete, exists, func, insert, select, update
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import aliased
+
+import changes
+import hierarchy
+import serializers
+from batch import is_uuid
+from cache import mark_changed
+from models import db, gen_uuid, Topic, Skill
+from pagination import PageStream, count_total, fetch_page
+from repository import ConflictError, InvalidError, ListPage, NotFoundError, Repository
+from serializers import row_serializer
+
+topics = Topic.__table__
+skills = Skill.__table__
+
+# Feldname in der API -> Spalte für update_topic bzw. update_skill
+TOPIC_COLUMNS = {"name": "name", "description": "description", "parentTopicID": "parent_topic_id"}
+SKILL_COLUMNS = {"name": "name", "topicID": "topic_id", "difficulty": "difficulty"}
+
+
+def violated_constraint(error):
+    """
+    Name des verletzten Constraints einer IntegrityError (psycopg2), z.B.
+    'topics_parent_topic_id_fkey'. Bei NOT-NULL-Verletzungen der Spaltenname.
+    """
+    diag = getattr(error.orig, "diag", None)
+    return getattr(diag, "constraint_name", None) or getattr(diag, "column_name", None)
+
+
+def name_search(column, q):
+    """
+    Baut Filter und Ranking für den q-Parameter.
+    ILIKE '%q%' wird vom Trigramm-GIN-Index (pg_trgm) bedient; sortiert wird nach
+    absteigender Ähnlichkeit. Die Ähnlichkeit wird als double precision geliefert,
+    damit sie verlustfrei im Cursor landet.
+
+    Returns:
+        tuple: (Filter-Ausdruck, aufsteigend sortierbarer Ranking-Ausdruck)
+    """
+    pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    rank = -cast(func.similarity(column, q), DOUBLE_PRECISION)
+    return column.ilike(pattern, escape="\\"), rank
+
+
+def topics_query(q=None, parent_id=None, fields=serializers.TOPIC_FIELDS):
+    """
+    Gefilterte Topic-Query und Sortierschlüssel für list_topics.
+    Selektiert werden nur die Spalten aus fields, keine ORM-Objekte.
+    """
+    query = db.session.query(*[column for _, column in fields])
+    sort_keys = [Topic.name, Topic.id]
+    if q:
+        match, rank = name_search(Topic.name, q)
+        query = query.filter(match)
+        sort_keys.insert(0, rank)
+    if parent_id:
+        query = query.filter(Topic.parent_topic_id == parent_id)
+    return query, sort_keys
+
+
+def topic_count_fields():
+    """
+    Felder skillCount und childCount als korrelierte Unterabfragen. Sie werden mit der
+    Seite in derselben Abfrage berechnet (nur für die gelieferten Zeilen) und lesen
+    über die Indizes auf skills.topic_id bzw. topics.parent_topic_id.
+    """
+    children = aliased(Topic)
+    return [
+        ("skillCount", select(func.count()).where(Skill.topic_id == Topic.id).scalar_subquery().label("skill_count")),
+        ("childCount", select(func.count()).where(children.parent_topic_id == Topic.id).scalar_subquery().label("child_count")),
+    ]
+
+
+def skills_query(q=None, topic_id=None, recursive=False, fields=serializers.SKILL_FIELDS):
+    """
+    Gefilterte Skill-Query und Sortierschlüssel für list_skills.
+    Mit recursive=True werden auch Skills aller Unter-Topics von topic_id geliefert.
+    """
+    query = db.session.query(*[column for _, column in fields])
+    sort_keys = [Skill.name, Skill.id]
+    if q:
+        match, rank = name_search(Skill.name, q)
+        query = query.filter(match)
+        sort_keys.insert(0, rank)
+    if topic_id and recursive:
+        subtree = hierarchy.subtree_cte(topic_id)
+        query = query.filter(Skill.topic_id.in_(select(subtree.c.id)))
+    elif topic_id:
+        query = query.filter(Skill.topic_id == topic_id)
+    return query, sort_keys
+
+
+def delete_topic_statement(topic_id):
+    """
+    Statement für delete_topic: liefert (has_skills, has_topics, gelöscht) und löscht
+    das Topic nur, wenn weder Skills noch Unter-Topics daran hängen.
+    """
+    children = topics.alias("children")
+    target = (
+        select(
+            topics.c.id,
+            exists().where(skills.c.topic_id == topics.c.id).label("has_skills"),
+            exists().where(children.c.parent_topic_id == topics.c.id).label("has_topics"),
+        )
+        .where(topics.c.id == topic_id)
+        .cte("target")
+    )
+    deleted = (
+        delete(topics)
+        .where(topics.c.id == target.c.id, ~target.c.has_skills, ~target.c.has_topics)
+        .returning(topics.c.id)
+        .cte("deleted")
+    )
+    return select(target.c.has_skills, target.c.has_topics, select(func.count()).select_from(deleted).scalar_subquery())
+
+
+def _fields(available, names):
+    """(Feldname, Spalte)-Paare für die Feldnamen names."""
+    columns = dict(available)
+    return [(name, columns[name]) for name in names]
+
+
+class StreamedPage(ListPage):
+    """ListPage aus einem PageStream: die Zeilen werden erst beim Durchlaufen gelesen."""
+
+    def __init__(self, stream, serialize, total, exact):
+        super().__init__(self._serialize(stream, serialize), total, exact)
+        self._stream = stream
+
+    def _serialize(self, stream, serialize):
+        for rows in stream:
+            yield [serialize(row) for row in rows]
+        self.next_cursor = stream.next_cursor
+
+    def close(self):
+        self._stream.close()
+
+
+class SqlRepository(Repository):
+    """
+    Repository auf db.session. Fehler der Datenbank (Foreign Key, ungültige UUID)
+    werden in die Repository-Fehler mit den Texten der API übersetzt, vorher wird
+    zurückgerollt.
+    """
+
+    def __init__(self, stream_batch_size=1000):
+        """
+        Args:
+            stream_batch_size (int): Zeilen pro Fetch aus dem serverseitigen Cursor.
+        """
+        self.stream_batch_size = stream_batch_size
+
+    def _page(self, query, sort_keys, page, fields, count_query, stream):
+        """
+        Lädt eine Seite; count_query ist die Query ohne Zusatzspalten für die Gesamtanzahl.
+
+        Raises:
+            PaginationError: Wenn der Cursor ungültig ist.
+        """
+        serialize = row_serializer(fields)
+        if stream:
+            # Erst zählen und die Verbindung der Session zurückgeben, dann den Stream mit
+            # eigener Verbindung öffnen: eine Anfrage belegt so nie zwei Verbindungen
+            # zugleich (sonst wartet sie bei ausgeschöpftem Pool auf sich selbst)
+            total, exact = count_total(db.session, count_query, page["count"])
+            db.session.rollback()
+            rows = PageStream(query, sort_keys, page, self.stream_batch_size)
+            return StreamedPage(rows, serialize, total, exact)
+        rows, next_cursor = fetch_page(query, sort_keys, page)
+        total, exact = count_total(db.session, count_query, page["count"])
+        return ListPage([[serialize(row) for row in rows]], total, exact, next_cursor)
+
+    # --- Topics ---
+
+    def list_topics(self, page, fields, q=None, parent_id=None, counts=False, stream=False):
+        fields = _fields(serializers.TOPIC_FIELDS, fields)
+        query, sort_keys = topics_query(q, parent_id, fields)
+        page_fields = fields + topic_count_fields() if counts else fields
+        return self._page(
+            query.add_columns(*[column for _, column in page_fields[len(fields):]]),
+            sort_keys, page, page_fields, query, stream,
+        )
+
+    def get_topic(self, topic_id, counts=False):
+        fields = serializers.TOPIC_FIELDS + (topic_count_fields() if counts else [])
+        try:
+            row = db.session.execute(
+                select(*[column for _, column in fields]).where(Topic.id == topic_id)
+            ).first()
+        except DataError:
+            db.session.rollback()
+            row = None
+        if row is None:
+            raise NotFoundError("Topic not found")
+        return row_serializer(fields)(row)
+
+    def create_topic(self, name, description=None, parent_id=None):
+        # Ob das Eltern-Topic existiert, prüft der Foreign Key
+        try:
+            row = db.session.execute(
+                insert(topics)
+                .values(id=gen_uuid(), name=name, description=description, parent_topic_id=parent_id)
+                .returning(*topics.c)
+            ).one()
+        except (IntegrityError, DataError):
+            # FK-Verletzung oder keine gültige UUID: das Eltern-Topic existiert nicht
+            db.session.rollback()
+            raise InvalidError("parentTopicID not found")
+        topic = Topic.row_to_dict(row)
+        changes.record(db.session, "topic", "insert", [topic])
+        mark_changed(db.session, "topics")
+        db.session.commit()
+        return topic
+
+    def update_topic(self, topic_id, values):
+        # Die Zyklusprüfung für ein neues Eltern-Topic steckt in der WHERE-Klausel. Nur
+        # wenn keine Zeile zurückkommt, wird nachgesehen, ob das Topic fehlt (404) oder
+        # der Zyklus der Grund war (422)
+        values = {TOPIC_COLUMNS[name]: value for name, value in values.items()}
+        parent_id = values.get("parent_topic_id")
+        if "parent_topic_id" in values:
+            # Ein neues Eltern-Topic ist eine Verschiebung: sperren wie POST /topics/<id>/move,
+            # sonst kommen zwei gegenläufige Verschiebungen (A unter B, B unter A) beide
+            # durch die Zyklusprüfung
+            try:
+                locked = {row.id for row in hierarchy.lock_for_move(topic_id, parent_id)}
+            except DataError:
+                db.session.rollback()
+                if is_uuid(topic_id):
+                    raise InvalidError("parentTopicID not found")
+                raise NotFoundError("Topic not found")
+            if topic_id not in locked:
+                db.session.rollback()
+                raise NotFoundError("Topic not found")
+            if parent_id and parent_id not in locked:
+                db.session.rollback()
+                raise InvalidError("parentTopicID not found")
+        statement = update(topics).where(topics.c.id == topic_id)
+        statement = statement.values(**values) if values else statement.values(name=topics.c.name)
+        if parent_id:
+            statement = statement.where(~hierarchy.in_ancestry(topic_id, parent_id))
+
+        try:
+            row = db.session.execute(statement.returning(*topics.c)).first()
+        except IntegrityError:
+            db.session.rollback()
+            raise InvalidError("parentTopicID not found")
+        except DataError:
+            db.session.rollback()
+            raise NotFoundError("Topic not found")
+        if row is None:
+            db.session.rollback()
+            if db.session.get(Topic, topic_id) is None:
+                raise NotFoundError("Topic not found")
+            raise InvalidError("parentTopicID would create a cycle")
+        topic = Topic.row_to_dict(row)
+        changes.record(db.session, "topic", "update", [topic])
+        mark_changed(db.session, "topics")
+        db.session.commit()
+        return topic
+
+    def delete_topic(self, topic_id):
+        # Prüfung auf abhängige Skills/Topics und Löschen in einem Statement
+        try:
+            row = db.session.execute(delete_topic_statement(topic_id)).first()
+        except DataError:
+            db.session.rollback()
+            row = None
+        except IntegrityError:
+            # Parallel wurde ein Unter-Topic angelegt
+            db.session.rollback()
+            raise ConflictError("The topic has dependent topics, cannot delete the topic")
+
+        if row is None:
+            raise NotFoundError("Topic not found")
+        has_skills, has_topics, _ = row
+        if has_skills:
+            db.session.rollback()
+            raise ConflictError("The topic has dependent skills, cannot delete the topic")
+        if has_topics:
+            db.session.rollback()
+            raise ConflictError("The topic has dependent topics, cannot delete the topic")
+
+        # ON DELETE CASCADE entfernt auch die Voraussetzungs-Kanten des Topics
+        changes.record(db.session, "topic", "delete", [topic_id])
+        mark_changed(db.session, "topics", "prerequisites")
+        db.session.commit()
+
+    # --- Skills ---
+
+    def list_skills(self, page, fields, q=None, topic_id=None, recursive=False, stream=False):
+        fields = _fields(serializers.SKILL_FIELDS, fields)
+        query, sort_keys = skills_query(q, topic_id, recursive, fields)
+        return self._page(query, sort_keys, page, fields, query, stream)
+
+    def get_skill(self, skill_id):
+        try:
+            row = db.session.execute(select(*skills.c).where(skills.c.id == skill_id)).first()
+        except DataError:
+            db.session.rollback()
+            row = None
+        if row is None:
+            raise NotFoundError("Skill not found")
+        return Skill.row_to_dict(row)
+
+    def create_skill(self, name, topic_id, difficulty="beginner"):
+        try:
+            row = db.session.execute(
+                insert(skills)
+                .values(id=gen_uuid(), name=name, topic_id=topic_id, difficulty=difficulty)
+                .returning(*skills.c)
+            ).one()
+        except (IntegrityError, DataError):
+            db.session.rollback()
+            raise InvalidError("topicID not found")
+        skill = Skill.row_to_dict(row)
+        changes.record(db.session, "skill", "insert", [skill])
+        mark_changed(db.session, "skills")
+        db.session.commit()
+        return skill
+
+    def update_skill(self, skill_id, values):
+        values = {SKILL_COLUMNS[name]: value for name, value in values.items()}
+        statement = update(skills).where(skills.c.id == skill_id)
+        statement = statement.values(**values) if values else statement.values(name=skills.c.name)
+        try:
+            row = db.session.execute(statement.returning(*skills.c)).first()
+        except IntegrityError as e:
+            db.session.rollback()
+            if violated_constraint(e) == "topic_id":
+                # NOT-NULL-Verletzung: topicID wurde auf null gesetzt
+                raise InvalidError("Field 'topicID' is required")
+            raise InvalidError("topicID not found")
+        except DataError:
+            db.session.rollback()
+            if "topic_id" in values and is_uuid(skill_id):
+                raise InvalidError("topicID not found")
+            raise NotFoundError("Skill not found")
+        if row is None:
+            db.session.rollback()
+            raise NotFoundError("Skill not found")
+        skill = Skill.row_to_dict(row)
+        changes.record(db.session, "skill", "update", [skill])
+        mark_changed(db.session, "skills")
+        db.session.commit()
+        return skill
+
+    def delete_skill(self, skill_id):
+        try:
+            row = db.session.execute(
+                delete(skills).where(skills.c.id == skill_id).returning(skills.c.id)
+            ).first()
+        except DataError:
+            row = None
+        if row is None:
+            db.session.rollback()
+            raise NotFoundError("Skill not found")
+        changes.record(db.session, "skill", "delete", [row.id])
+        mark_changed(db.session, "skills")
+        db.session.commit()
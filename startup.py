@@ -0,0 +1,112 @@
+"""
+Startvorbereitung für den Container (entrypoint.sh), in einem einzigen Prozess:
+- Wartet, bis Postgres Verbindungen annimmt
+- Vergleicht alembic_version mit den Head-Revisionen aus migrations/versions
+  (eine Abfrage; die Heads werden aus den Revisionsdateien gelesen, ohne Alembic
+  oder die App zu importieren)
+- Nur wenn sie abweichen, wird die App geladen und flask_migrate.upgrade()
+  ausgeführt; schlägt die Migration fehl, bricht der Start ab
+
+Aufruf:
+    python startup.py            # warten, prüfen, ggf. migrieren
+    python startup.py --check    # nur prüfen: Exit-Code 1, wenn Migrationen ausstehen
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+import psycopg2
+from psycopg2 import errors
+
+BASE_DIR = Path(__file__).resolve().parent
+VERSIONS_DIR = BASE_DIR / "migrations" / "versions"
+WAIT_ATTEMPTS = int(os.getenv("DB_WAIT_ATTEMPTS", 60))
+WAIT_INTERVAL = float(os.getenv("DB_WAIT_INTERVAL", 2))
+
+REVISION = re.compile(r"^revision\s*=\s*['\"]([^'\"]+)['\"]", re.MULTILINE)
+DOWN_REVISION = re.compile(r"^down_revision\s*=\s*(.+)$", re.MULTILINE)
+QUOTED = re.compile(r"['\"]([^'\"]+)['\"]")
+
+
+def head_revisions(directory=VERSIONS_DIR):
+    """Revisionen, auf die keine andere Revision als down_revision verweist."""
+    revisions, parents = set(), set()
+    for path in directory.glob("*.py"):
+        source = path.read_text(encoding="utf-8")
+        revision = REVISION.search(source)
+        if not revision:
+            continue
+        revisions.add(revision.group(1))
+        down = DOWN_REVISION.search(source)
+        if down:
+            parents.update(QUOTED.findall(down.group(1)))
+    return revisions - parents
+
+
+def connect(url):
+    """Verbindung zu Postgres; wartet bis zu WAIT_ATTEMPTS * WAIT_INTERVAL Sekunden."""
+    dsn = url.replace("+psycopg2", "")
+    for attempt in range(1, WAIT_ATTEMPTS + 1):
+        try:
+            return psycopg2.connect(dsn, connect_timeout=3)
+        except psycopg2.OperationalError as e:
+            print(f"Waiting for Postgres... ({attempt}/{WAIT_ATTEMPTS}) {str(e).strip()}", flush=True)
+            time.sleep(WAIT_INTERVAL)
+    raise SystemExit("Postgres did not become ready in time.")
+
+
+def current_revisions(connection):
+    """Inhalt von alembic_version; leer, wenn die Tabelle (noch) nicht existiert."""
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("SELECT version_num FROM alembic_version")
+        except errors.UndefinedTable:
+            connection.rollback()
+            return set()
+        return {row[0] for row in cursor.fetchall()}
+
+
+def upgrade():
+    """Führt die ausstehenden Migrationen mit Flask-Migrate aus (lädt die App)."""
+    from flask_migrate import upgrade as migrate_upgrade
+
+    from app import app
+
+    with app.app_context():
+        migrate_upgrade(directory=str(BASE_DIR / "migrations"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wartet auf Postgres und migriert nur bei Bedarf.")
+    parser.add_argument("--check", action="store_true", help="nur prüfen, nicht migrieren")
+    args = parser.parse_args(argv)
+
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise SystemExit("DATABASE_URL is not set")
+
+    started = time.perf_counter()
+    connection = connect(url)
+    try:
+        current = current_revisions(connection)
+    finally:
+        connection.close()
+    heads = head_revisions()
+
+    if current == heads:
+        print(f"Database schema is up to date ({', '.join(sorted(heads))}), "
+              f"checked in {(time.perf_counter() - started) * 1000:.0f} ms.", flush=True)
+        return
+    pending = f"{', '.join(sorted(current)) or 'empty'} -> {', '.join(sorted(heads))}"
+    if args.check:
+        print(f"Migrations pending: {pending}", flush=True)
+        sys.exit(1)
+    print(f"Applying migrations: {pending}", flush=True)
+    upgrade()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Regressionstest für JournaledStore mit mehreren Prozessen: Schreibzugriffe paralleler
+Worker dürfen weder verloren gehen noch doppelte seq-Nummern erzeugen.
+"""
+import json
+import multiprocessing
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager import JournaledStore
+
+PROCESSES = 4
+PUTS = 300
+
+
+def _write(directory, compact_every, errors):
+    try:
+        store = JournaledStore(directory, compact_every=compact_every)
+        for i in range(PUTS):
+            record_id = str(uuid.uuid4())
+            with store.transaction() as tx:
+                tx.put("skills", {"id": record_id, "name": f"skill {i}", "topicID": None})
+    except Exception as e:
+        errors.put(repr(e))
+
+
+def _run_workers(directory, compact_every):
+    context = multiprocessing.get_context("fork")
+    errors = context.Queue()
+    processes = [context.Process(target=_write, args=(directory, compact_every, errors)) for _ in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+    assert all(process.exitcode == 0 for process in processes)
+    assert errors.empty(), errors.get()
+
+
+@pytest.mark.parametrize("compact_every", [10**6, 250])
+def test_concurrent_transactions_keep_every_record(tmp_path, compact_every):
+    _run_workers(str(tmp_path), compact_every)
+
+    store = JournaledStore(str(tmp_path))
+    assert len(store.by_id["skills"]) == PROCESSES * PUTS
+    assert store.seq == PROCESSES * PUTS
+
+    with open(store.journal_path, encoding="utf-8") as f:
+        seqs = [json.loads(line)["seq"] for line in f]
+    assert len(seqs) == len(set(seqs))
+    assert seqs == sorted(seqs)
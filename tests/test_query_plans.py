@@ -0,0 +1,155 @@
+"""
+Prüft per EXPLAIN, dass die Listen-, Such- und Löschabfragen ihre Indizes nutzen und
+ohne Seq Scan auskommen (query_plans.check_plan, mit enable_seqscan = off). Braucht
+eine migrierte Datenbank in DATABASE_URL, sonst werden die Tests übersprungen.
+
+Aufruf:
+    DATABASE_URL=postgresql+psycopg2://... python -m pytest tests/test_query_plans.py
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytestmark = pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="DATABASE_URL is not set")
+
+SOME_ID = "00000000-0000-0000-0000-000000000000"
+FIRST_PAGE = {"limit": 50, "offset": 0, "cursor": None, "count": "none"}
+
+
+def _next_page():
+    from pagination import encode_cursor
+
+    return dict(FIRST_PAGE, cursor=encode_cursor(["m", SOME_ID]))
+
+
+def _list(build, page=FIRST_PAGE):
+    """Statement der Seite einer Listen-Query (query, sort_keys) wie in SqlRepository."""
+    def statement():
+        from pagination import page_query
+
+        query, sort_keys = build()
+        return page_query(query, sort_keys, page() if callable(page) else page).statement
+    return statement
+
+
+def _topics(**filters):
+    from sql_repository import topics_query
+
+    return topics_query(**filters)
+
+
+def _skills(**filters):
+    from sql_repository import skills_query
+
+    return skills_query(**filters)
+
+
+def _topics_with_counts():
+    from pagination import page_query
+    from sql_repository import topic_count_fields, topics_query
+
+    query, sort_keys = topics_query()
+    with_counts = query.add_columns(*[column for _, column in topic_count_fields()])
+    return page_query(with_counts, sort_keys, FIRST_PAGE).statement
+
+
+def _delete_topic():
+    from sql_repository import delete_topic_statement
+
+    return delete_topic_statement(SOME_ID)
+
+
+def _subtree_summary():
+    import hierarchy
+
+    return hierarchy.subtree_summary(SOME_ID)
+
+
+# Abhängigkeitsprüfung beim Löschen und die Abfragen, die Postgres für die Foreign
+# Keys (ON DELETE CASCADE bzw. RESTRICT) beim Löschen eines Topics ausführt
+def _fk_skills():
+    from sqlalchemy import delete
+
+    from models import Skill
+
+    return delete(Skill.__table__).where(Skill.__table__.c.topic_id == SOME_ID)
+
+
+def _fk_topics():
+    from sqlalchemy import select
+
+    from models import Topic
+
+    topics = Topic.__table__
+    return select(topics.c.id).where(topics.c.parent_topic_id == SOME_ID)
+
+
+def _fk_prerequisites():
+    from sqlalchemy import delete
+
+    from models import TopicPrerequisite
+
+    return delete(TopicPrerequisite).where(TopicPrerequisite.prerequisite_id == SOME_ID)
+
+
+# (Name, Statement-Funktion, erwartete Indizes, Tabellen ohne Seq Scan)
+CHECKS = [
+    ("topics", _list(_topics), ["ix_topics_name_id"], ["topics"]),
+    ("topics?cursor=", _list(_topics, _next_page), ["ix_topics_name_id"], ["topics"]),
+    ("topics?parentId=", _list(lambda: _topics(parent_id=SOME_ID)), ["ix_topics_parent_topic_id_name_id"], ["topics"]),
+    ("skills", _list(_skills), ["ix_skills_name_id"], ["skills"]),
+    ("skills?cursor=", _list(_skills, _next_page), ["ix_skills_name_id"], ["skills"]),
+    ("skills?topicId=", _list(lambda: _skills(topic_id=SOME_ID)), ["ix_skills_topic_id_name_id"], ["skills"]),
+    ("topics?include=counts", _topics_with_counts,
+     ["ix_topics_name_id", "ix_skills_topic_id_name_id", "ix_topics_parent_topic_id_name_id"], ["topics", "skills"]),
+    ("DELETE /topics/<id>", _delete_topic,
+     ["ix_skills_topic_id_name_id", "ix_topics_parent_topic_id_name_id"], ["topics", "skills"]),
+    ("DELETE /topics/<id>?cascade=true", _subtree_summary,
+     ["ix_topics_parent_topic_id_name_id", "ix_skills_topic_id_name_id", "ix_topic_prerequisites_prerequisite_id"],
+     ["topics", "skills", "topic_prerequisites"]),
+    ("FK skills.topic_id", _fk_skills, ["ix_skills_topic_id_name_id"], ["skills"]),
+    ("FK topics.parent_topic_id", _fk_topics, ["ix_topics_parent_topic_id_name_id"], ["topics"]),
+    ("FK topic_prerequisites.prerequisite_id", _fk_prerequisites,
+     ["ix_topic_prerequisites_prerequisite_id"], ["topic_prerequisites"]),
+]
+
+
+@pytest.fixture(scope="module")
+def session():
+    from app import app
+    from models import db
+
+    with app.app_context():
+        yield db.session
+        db.session.rollback()
+
+
+@pytest.mark.parametrize("statement, indexes, tables", [c[1:] for c in CHECKS], ids=[c[0] for c in CHECKS])
+def test_plan_uses_indexes(session, statement, indexes, tables):
+    from query_plans import check_plan
+
+    assert check_plan(session, statement(), indexes, tables) == []
+
+
+@pytest.mark.parametrize("entity, index", [("topics", "ix_topics_name_trgm"), ("skills", "ix_skills_name_trgm")])
+def test_name_search_uses_trigram_index(session, entity, index):
+    """?q= auf /topics bzw. /skills: Seite und exakte Gesamtanzahl lesen aus dem GIN-Index."""
+    from sqlalchemy import func, select, text
+
+    from pagination import page_query
+    from query_plans import check_plan
+    from sql_repository import skills_query, topics_query
+
+    available = session.execute(text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar()
+    session.rollback()
+    if not available:
+        pytest.skip("pg_trgm is not available on this server")
+
+    query, sort_keys = (topics_query if entity == "topics" else skills_query)(q="web")
+    page = page_query(query, sort_keys, FIRST_PAGE).statement
+    count = select(func.count()).select_from(query.order_by(None).subquery())
+    assert check_plan(session, page, [index], [entity]) == []
+    assert check_plan(session, count, [index], [entity]) == []